@@ -0,0 +1,54 @@
+"""denormalise clinic_id / flagged onto form_submissions for the doctor dashboard
+
+Revision ID: 2b9e61c4d8f0
+Revises: 7c2f4d1a9b3e
+Create Date: 2026-10-19 11:40:05.271904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b9e61c4d8f0'
+down_revision: Union[str, Sequence[str], None] = '7c2f4d1a9b3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_pg = op.get_bind().dialect.name == 'postgresql'
+    op.add_column('form_submissions', sa.Column('clinic_id', sa.Integer(), nullable=True))
+    op.add_column('form_submissions', sa.Column('flagged', sa.Boolean(),
+                                                nullable=False, server_default=sa.false()))
+    if is_pg:
+        op.create_foreign_key('fk_form_submissions_clinic_id', 'form_submissions', 'clinics',
+                              ['clinic_id'], ['id'])
+
+    # backfill existing rows (small tables today; large ones: backfill in batches first)
+    op.execute("""
+        UPDATE form_submissions SET clinic_id = ps.clinic_id
+        FROM patient_sessions ps WHERE ps.id = form_submissions.session_id
+    """)
+    op.execute("""
+        UPDATE form_submissions SET flagged = true
+        WHERE EXISTS (SELECT 1 FROM submission_redflags s WHERE s.submission_id = form_submissions.id)
+    """)
+
+    op.create_index(
+        'ix_submissions_clinic_flagged', 'form_submissions',
+        ['clinic_id', sa.text('submitted_at DESC'), sa.text('id DESC')],
+        postgresql_where=sa.text('flagged'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_submissions_clinic_flagged', table_name='form_submissions')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('fk_form_submissions_clinic_id', 'form_submissions', type_='foreignkey')
+    op.drop_column('form_submissions', 'flagged')
+    op.drop_column('form_submissions', 'clinic_id')
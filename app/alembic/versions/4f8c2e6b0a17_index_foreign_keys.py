@@ -0,0 +1,75 @@
+"""index the foreign keys and lookup columns that had no index
+
+Revision ID: 4f8c2e6b0a17
+Revises: 9d3a5f7e1c26
+Create Date: 2026-10-19 15:21:48.604113
+
+Foreign keys that already lead a unique constraint (questions.form_id,
+options.question_id, *_localised.<parent>_id, redflag_videos /
+redflag_references.redflag_id) are covered by it and get nothing new.
+
+On PostgreSQL every index is built without blocking writes: plain tables
+with CREATE INDEX CONCURRENTLY, partitioned ones by creating the index
+ON ONLY the parent, building each partition's index concurrently and
+attaching it.  Partitions created later inherit the index.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f8c2e6b0a17'
+down_revision: Union[str, Sequence[str], None] = '9d3a5f7e1c26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns)
+INDEXES = [
+    ('ix_answers_submission', 'answers', ['submission_id']),
+    ('ix_submission_redflags_submission', 'submission_redflags', ['submission_id']),
+    ('ix_submission_redflags_redflag', 'submission_redflags', ['redflag_id']),
+    ('ix_submissions_form', 'form_submissions', ['form_id', 'submitted_at']),
+    ('ix_submissions_clinic', 'form_submissions', ['clinic_id', 'submitted_at']),
+    ('ix_patient_sessions_clinic', 'patient_sessions', ['clinic_id', 'created_at']),
+    ('ix_options_redflag', 'options', ['redflag_id']),
+    ('ix_users_clinic', 'users', ['clinic_id']),
+    ('ix_redflag_videos_video', 'redflag_videos', ['video_id']),
+    ('ix_redflag_references_reference', 'redflag_references', ['reference_id']),
+]
+PARTITIONED = {'patient_sessions', 'form_submissions', 'answers'}
+
+
+def _partitions(table: str) -> list[str]:
+    return op.get_bind().execute(sa.text("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:t AS regclass) ORDER BY c.relname
+    """), {'t': table}).scalars().all()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns)
+        return
+
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            cols = ', '.join(columns)
+            if table not in PARTITIONED:
+                op.execute(f'CREATE INDEX CONCURRENTLY {name} ON {table} ({cols})')
+                continue
+            op.execute(f'CREATE INDEX {name} ON ONLY {table} ({cols})')
+            for part in _partitions(table):
+                child = f'{name}_{part[len(table) + 1:]}'  # ix_answers_submission_p202510
+                op.execute(f'CREATE INDEX CONCURRENTLY {child} ON {part} ({cols})')
+                op.execute(f'ALTER INDEX {name} ATTACH PARTITION {child}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        # dropping a partitioned index drops the attached partition indexes with it
+        op.drop_index(name, table_name=table)
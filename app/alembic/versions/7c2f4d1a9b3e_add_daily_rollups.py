@@ -0,0 +1,61 @@
+"""add daily reporting rollups
+
+Revision ID: 7c2f4d1a9b3e
+Revises: e8e134a92317
+Create Date: 2026-10-19 10:12:41.508113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2f4d1a9b3e'
+down_revision: Union[str, Sequence[str], None] = 'e8e134a92317'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rollup_daily_submissions',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('clinic_id', sa.Integer(), nullable=False),
+    sa.Column('form_id', sa.Integer(), nullable=False),
+    sa.Column('submissions', sa.Integer(), nullable=False),
+    sa.Column('flagged_submissions', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['clinic_id'], ['clinics.id'], ),
+    sa.ForeignKeyConstraint(['form_id'], ['forms.id'], ),
+    sa.PrimaryKeyConstraint('day', 'clinic_id', 'form_id')
+    )
+    op.create_table('rollup_daily_redflags',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('clinic_id', sa.Integer(), nullable=False),
+    sa.Column('form_id', sa.Integer(), nullable=False),
+    sa.Column('redflag_id', sa.Integer(), nullable=False),
+    sa.Column('triggered', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['clinic_id'], ['clinics.id'], ),
+    sa.ForeignKeyConstraint(['form_id'], ['forms.id'], ),
+    sa.ForeignKeyConstraint(['redflag_id'], ['redflags.id'], ),
+    sa.PrimaryKeyConstraint('day', 'clinic_id', 'form_id', 'redflag_id')
+    )
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(length=40), nullable=False),
+    sa.Column('last_submission_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # reports filter by clinic first, then a day range
+    op.create_index('ix_rollup_subs_clinic_day', 'rollup_daily_submissions', ['clinic_id', 'day'])
+    op.create_index('ix_rollup_rfs_clinic_day', 'rollup_daily_redflags', ['clinic_id', 'day'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_rollup_rfs_clinic_day', table_name='rollup_daily_redflags')
+    op.drop_index('ix_rollup_subs_clinic_day', table_name='rollup_daily_submissions')
+    op.drop_table('rollup_watermarks')
+    op.drop_table('rollup_daily_redflags')
+    op.drop_table('rollup_daily_submissions')
@@ -0,0 +1,144 @@
+"""range-partition patient_sessions, form_submissions and answers by month
+
+Revision ID: 9d3a5f7e1c26
+Revises: 2b9e61c4d8f0
+Create Date: 2026-10-19 14:02:37.518310
+
+PostgreSQL only (other dialects just get answers.submitted_at).  Each
+table is rebuilt as a partitioned parent – the old table is renamed, its
+rows copied into monthly partitions, its id sequence handed over and the
+old table dropped – so this takes an exclusive lock for the duration of
+the copy: run it in a maintenance window.
+
+Foreign keys *into* these tables (form_submissions.session_id,
+answers.submission_id, submission_redflags.submission_id) are dropped:
+PostgreSQL can't reference a partitioned table unless the reference
+includes the partition key.
+
+Partitions are created from the oldest row's month to 3 months ahead;
+after that app/db/partitions.py keeps future months ready.
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3a5f7e1c26'
+down_revision: Union[str, Sequence[str], None] = '2b9e61c4d8f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+# table → (partition key, outgoing FKs (name, column, target), indexes (name, DDL tail))
+TABLES = {
+    'patient_sessions': (
+        'created_at',
+        [('fk_patient_sessions_clinic_id', 'clinic_id', 'clinics(id)')],
+        [('ix_patient_day', '(patient_phone_e164, created_at)')],
+    ),
+    'form_submissions': (
+        'submitted_at',
+        [('fk_form_submissions_form_id', 'form_id', 'forms(id)'),
+         ('fk_form_submissions_lang_code', 'lang_code', 'languages(code)'),
+         ('fk_form_submissions_clinic_id', 'clinic_id', 'clinics(id)')],
+        [('ix_session_day', '(session_id, submitted_at)'),
+         ('ix_submissions_clinic_flagged',
+          '(clinic_id, submitted_at DESC, id DESC) WHERE flagged')],
+    ),
+    'answers': (
+        'submitted_at',
+        [('fk_answers_question_id', 'question_id', 'questions(id)')],
+        [],
+    ),
+}
+
+# FKs pointing into the tables above, as created by the initial schema
+INBOUND = [
+    ('form_submissions', 'form_submissions_session_id_fkey', 'session_id', 'patient_sessions(id)'),
+    ('answers', 'answers_submission_id_fkey', 'submission_id', 'form_submissions(id)'),
+    ('submission_redflags', 'submission_redflags_submission_id_fkey', 'submission_id',
+     'form_submissions(id)'),
+]
+
+
+def _add_months(m: date, n: int) -> date:
+    y, mo = divmod(m.year * 12 + m.month - 1 + n, 12)
+    return date(y, mo + 1, 1)
+
+
+def _months(first: date, last: date):
+    m = first
+    while m <= last:
+        yield m
+        m = _add_months(m, 1)
+
+
+def _rebuild(table: str, partitioned: bool) -> None:
+    key, fks, indexes = TABLES[table]
+    old = f'{table}_old'
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    # index names are schema-wide: free <table>_pkey and the secondary indexes
+    op.execute(f'ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey')
+    for name, _ in indexes:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+    if partitioned:
+        op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE ({key})')
+        op.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id, {key})')
+        bind = op.get_bind()
+        oldest = bind.execute(sa.text(f'SELECT min({key}) FROM {old}')).scalar()
+        this_month = datetime.now(timezone.utc).date().replace(day=1)
+        if oldest is not None and oldest.tzinfo is not None:
+            # bounds are UTC months; the session's time zone may put the row in the next one
+            oldest = oldest.astimezone(timezone.utc)
+        first = min(oldest.date().replace(day=1), this_month) if oldest else this_month
+        for m in _months(first, _add_months(this_month, MONTHS_AHEAD)):
+            op.execute(
+                f"CREATE TABLE {table}_p{m:%Y%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{m.isoformat()} 00:00:00+00') "
+                f"TO ('{_add_months(m, 1).isoformat()} 00:00:00+00')"
+            )
+    else:
+        op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)')
+        op.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id)')
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+    op.execute(f'DROP TABLE {old}')
+    for name, column, target in fks:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} '
+                   f'FOREIGN KEY ({column}) REFERENCES {target}')
+    for name, tail in indexes:
+        op.execute(f'CREATE INDEX {name} ON {table} {tail}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the partition key for answers: the submission's submitted_at
+    op.add_column('answers', sa.Column('submitted_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("""
+        UPDATE answers SET submitted_at = fs.submitted_at
+        FROM form_submissions fs WHERE fs.id = answers.submission_id
+    """)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.alter_column('answers', 'submitted_at', nullable=False)
+
+    for table, name, _, _ in INBOUND:
+        op.drop_constraint(name, table, type_='foreignkey')
+    for table in TABLES:
+        _rebuild(table, partitioned=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in TABLES:
+            # detached partitions (app/db/partitions.py) are left alone
+            _rebuild(table, partitioned=False)
+        for table, name, column, target in INBOUND:
+            op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} '
+                       f'FOREIGN KEY ({column}) REFERENCES {target}')
+    op.drop_column('answers', 'submitted_at')
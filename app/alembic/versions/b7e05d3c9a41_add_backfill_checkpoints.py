@@ -0,0 +1,38 @@
+"""add backfill_checkpoints for batched data migrations
+
+Revision ID: b7e05d3c9a41
+Revises: 4f8c2e6b0a17
+Create Date: 2026-10-19 16:05:12.840377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e05d3c9a41'
+down_revision: Union[str, Sequence[str], None] = '4f8c2e6b0a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('backfill_checkpoints',
+    sa.Column('name', sa.String(length=80), nullable=False),
+    sa.Column('table_name', sa.String(length=80), nullable=False),
+    sa.Column('last_id', sa.BigInteger(), nullable=False),
+    sa.Column('upper_id', sa.BigInteger(), nullable=False),
+    sa.Column('rows_done', sa.BigInteger(), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('backfill_checkpoints')
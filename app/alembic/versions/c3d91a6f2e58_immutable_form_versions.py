@@ -0,0 +1,123 @@
+"""immutable form versions with an active-version pointer on forms
+
+Revision ID: c3d91a6f2e58
+Revises: b7e05d3c9a41
+Create Date: 2026-10-19 17:12:36.215904
+
+Every existing form becomes one published version ("forms.version",
+title and description copied) that is also its active version; its
+questions move into that version.  form_submissions.form_version_id is
+backfilled with the form's only version – batched and resumable on
+PostgreSQL (app/db/backfill.py), since that table is the big one.
+
+forms.active_version_id ↔ form_versions.form_id is a cycle, so its FK is
+added after both tables exist (PostgreSQL only, like the other added FKs).
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db import backfill
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d91a6f2e58'
+down_revision: Union[str, Sequence[str], None] = 'b7e05d3c9a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_pg = op.get_bind().dialect.name == 'postgresql'
+
+    op.create_table('form_versions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('form_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.String(length=20), nullable=False),
+    sa.Column('title_en', sa.String(length=120), nullable=False),
+    sa.Column('description_en', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['form_id'], ['forms.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('form_id', 'version', name='uq_form_version')
+    )
+    op.execute(sa.text("""
+        INSERT INTO form_versions (form_id, version, title_en, description_en, created_at, published_at)
+        SELECT id, version, title_en, description_en, :now, :now FROM forms
+    """).bindparams(now=datetime.now(timezone.utc)))
+
+    op.add_column('forms', sa.Column('active_version_id', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE forms SET active_version_id =
+            (SELECT fv.id FROM form_versions fv WHERE fv.form_id = forms.id)
+    """)
+    if is_pg:
+        op.create_foreign_key('fk_forms_active_version', 'forms', 'form_versions',
+                              ['active_version_id'], ['id'])
+
+    # questions: small table (form content), one UPDATE
+    op.add_column('questions', sa.Column('form_version_id', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE questions SET form_version_id =
+            (SELECT fv.id FROM form_versions fv WHERE fv.form_id = questions.form_id)
+    """)
+    with op.batch_alter_table('questions') as batch:
+        batch.alter_column('form_version_id', existing_type=sa.Integer(), nullable=False)
+        batch.create_foreign_key('fk_questions_form_version_id', 'form_versions',
+                                 ['form_version_id'], ['id'])
+        batch.drop_constraint('uq_question_order', type_='unique')
+        batch.create_unique_constraint('uq_question_version_order', ['form_version_id', 'order_idx'])
+    # form_id lost the unique constraint that covered it
+    op.create_index('ix_questions_form', 'questions', ['form_id'])
+
+    # form_submissions: big and partitioned – nullable, filled in batches
+    op.add_column('form_submissions', sa.Column('form_version_id', sa.Integer(), nullable=True))
+    fill = """
+        UPDATE form_submissions SET form_version_id =
+            (SELECT fv.id FROM form_versions fv WHERE fv.form_id = form_submissions.form_id)
+        WHERE form_version_id IS NULL
+    """
+    if not is_pg:
+        op.execute(fill)
+        return
+    with op.get_context().autocommit_block():
+        backfill.run(op.get_bind().engine, backfill.Job(
+            'form_submissions_form_version_id', 'form_submissions',
+            fill + ' AND id > :lo AND id <= :hi',
+        ))
+    op.create_foreign_key('fk_form_submissions_form_version_id', 'form_submissions', 'form_versions',
+                          ['form_version_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    several = bind.scalar(sa.text(
+        "SELECT count(*) FROM (SELECT form_id FROM form_versions GROUP BY form_id HAVING count(*) > 1) m"
+    ))
+    if several:
+        raise RuntimeError(
+            f"{several} forms have more than one version; delete all but the active one first"
+        )
+    is_pg = bind.dialect.name == 'postgresql'
+
+    if is_pg:
+        op.drop_constraint('fk_form_submissions_form_version_id', 'form_submissions', type_='foreignkey')
+    op.drop_column('form_submissions', 'form_version_id')
+
+    op.drop_index('ix_questions_form', table_name='questions')
+    with op.batch_alter_table('questions') as batch:
+        batch.drop_constraint('uq_question_version_order', type_='unique')
+        batch.create_unique_constraint('uq_question_order', ['form_id', 'order_idx'])
+        batch.drop_constraint('fk_questions_form_version_id', type_='foreignkey')
+        batch.drop_column('form_version_id')
+
+    if is_pg:
+        op.drop_constraint('fk_forms_active_version', 'forms', type_='foreignkey')
+    op.drop_column('forms', 'active_version_id')
+    op.drop_table('form_versions')
+    op.execute("DELETE FROM backfill_checkpoints WHERE name = 'form_submissions_form_version_id'")
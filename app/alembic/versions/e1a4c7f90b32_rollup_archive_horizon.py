@@ -0,0 +1,30 @@
+"""archive horizon on rollup_watermarks
+
+Revision ID: e1a4c7f90b32
+Revises: c3d91a6f2e58
+Create Date: 2026-10-20 09:41:07.332518
+
+The "archived" row's horizon is the newest cutoff the archive has
+deleted up to; rollups.rebuild() refuses days before it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a4c7f90b32'
+down_revision: Union[str, Sequence[str], None] = 'c3d91a6f2e58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('rollup_watermarks', sa.Column('horizon', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('rollup_watermarks', 'horizon')
@@ -0,0 +1,199 @@
+# app/db/backfill.py
+"""
+Batched, resumable backfills for data migrations.
+
+A single `UPDATE answers SET …` holds its row locks (and bloats the
+table) for as long as it runs.  run() instead walks the table in primary
+key order, `batch_size` ids at a time, one short transaction per batch:
+
+    batch   ids (last_id, hi] – hi found by keyset, never OFFSET
+            the job's statement runs with :lo / :hi bound to that range
+            backfill_checkpoints.last_id = hi        (same transaction)
+    sleep   `sleep` seconds, so replicas and autovacuum keep up
+
+The checkpoint moves in the batch's own transaction, so a run that dies
+– or is stopped – resumes exactly where it stopped, even for statements
+that aren't idempotent.  The checkpoint row is locked per batch, so two
+runners of one job take turns instead of doing the work twice.  Only ids
+up to the table's max id at the first start are visited: rows inserted
+after that must already be written correctly by the application.
+
+On PostgreSQL each batch sets lock_timeout; a batch that can't get its
+locks in time is retried with backoff rather than queueing behind (and
+in front of) other traffic.
+
+Typical online column change, from a migration:
+
+    op.add_column("answers", sa.Column("x", sa.Integer(), nullable=True))
+    with op.get_context().autocommit_block():   # commit the DDL first
+        backfill.run(op.get_bind().engine, backfill.Job(
+            "answers_x", "answers",
+            "UPDATE answers SET x = … WHERE id > :lo AND id <= :hi AND x IS NULL",
+        ))
+        backfill.set_not_null(op.get_bind(), "answers", "x")
+
+Progress goes to `progress` (print by default), at most every
+`report_every` seconds.  `python -m app.scripts.backfill status` shows
+every job's checkpoint.
+"""
+
+import itertools
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.engine import Connection, Engine, Row
+from sqlalchemy.exc import OperationalError
+
+from app.db import models
+from app.settings import backfill_cfg
+
+CP = models.BackfillCheckpoint
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+@dataclass(frozen=True)
+class Job:
+    name: str     # checkpoint key – unique per backfill, e.g. "answers_submitted_at"
+    table: str
+    sql: str      # one statement over ids (:lo, :hi]
+    pk: str = "id"
+
+    def __post_init__(self):
+        if ":lo" not in self.sql or ":hi" not in self.sql:
+            raise ValueError(f"backfill {self.name}: statement must use :lo and :hi")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _lock_timed_out(exc: OperationalError) -> bool:
+    orig = exc.orig
+    return LOCK_NOT_AVAILABLE in (getattr(orig, "pgcode", None), getattr(orig, "sqlstate", None))
+
+
+def _start(engine: Engine, job: Job) -> Row:
+    with engine.begin() as conn:
+        row = conn.execute(select(CP).where(CP.name == job.name)).one_or_none()
+        if row is None:
+            upper = conn.scalar(text(f"SELECT max({job.pk}) FROM {job.table}")) or 0
+            conn.execute(insert(CP).values(
+                name=job.name, table_name=job.table, last_id=0, upper_id=upper,
+                rows_done=0, started_at=_now(), updated_at=_now(),
+            ))
+            row = conn.execute(select(CP).where(CP.name == job.name)).one()
+    return row
+
+
+def _batch(conn: Connection, job: Job, batch_size: int, lock_timeout_ms: int) -> tuple[int, int, int]:
+    """One batch in `conn`'s transaction: (hi, rows changed, upper id)."""
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql(f"SET LOCAL lock_timeout = '{int(lock_timeout_ms)}ms'")
+    lo, upper = conn.execute(
+        select(CP.last_id, CP.upper_id).where(CP.name == job.name).with_for_update()
+    ).one()
+    if lo >= upper:
+        return lo, 0, upper
+    hi = conn.scalar(text(
+        f"SELECT max({job.pk}) FROM (SELECT {job.pk} FROM {job.table} "
+        f"WHERE {job.pk} > :lo AND {job.pk} <= :upper ORDER BY {job.pk} LIMIT :n) AS chunk"
+    ), {"lo": lo, "upper": upper, "n": batch_size})
+    hi = upper if hi is None else hi
+    n = conn.execute(text(job.sql), {"lo": lo, "hi": hi}).rowcount
+    conn.execute(
+        update(CP).where(CP.name == job.name)
+        .values(last_id=hi, rows_done=CP.rows_done + max(n, 0), updated_at=_now())
+    )
+    return hi, n, upper
+
+
+def run(
+    engine: Engine,
+    job: Job,
+    batch_size: int | None = None,
+    sleep: float | None = None,
+    progress=print,
+) -> int:
+    """Run (or resume) `job` to the end; returns rows changed by this call."""
+    cfg = backfill_cfg()
+    batch_size = batch_size or cfg["batch_size"]
+    sleep = cfg["sleep"] if sleep is None else sleep
+
+    cp = _start(engine, job)
+    if cp.finished_at is not None:
+        progress(f"  {job.name}: finished {cp.finished_at.isoformat()}, nothing to do")
+        return 0
+    first = cp.last_id
+    if first:
+        progress(f"  {job.name}: resuming after id {first} of {cp.upper_id}")
+
+    rows = 0
+    t0 = last_report = time.monotonic()
+    while True:
+        for attempt in itertools.count():
+            try:
+                with engine.begin() as conn:
+                    hi, n, upper = _batch(conn, job, batch_size, cfg["lock_timeout_ms"])
+                break
+            except OperationalError as exc:
+                if not _lock_timed_out(exc) or attempt >= cfg["max_retries"]:
+                    raise
+                time.sleep(max(sleep, 0.5) * 2 ** attempt)
+        rows += max(n, 0)
+        now = time.monotonic()
+        done = hi >= upper
+        if done or now - last_report >= cfg["report_every"]:
+            last_report = now
+            pct = 100.0 * hi / max(upper, 1)
+            rate = rows / max(now - t0, 1e-9)
+            eta = (now - t0) * (upper - hi) / max(hi - first, 1)
+            progress(f"  {job.name}: {pct:5.1f}%  id {hi}/{upper}  "
+                     f"{rows} rows  {rate:,.0f} rows/s  eta {eta:,.0f}s")
+        if done:
+            break
+        if sleep:
+            time.sleep(sleep)
+
+    with engine.begin() as conn:
+        conn.execute(update(CP).where(CP.name == job.name).values(finished_at=_now()))
+    return rows
+
+
+def reset(engine: Engine, name: str) -> bool:
+    """Forget a job's checkpoint so it runs from the start again."""
+    with engine.begin() as conn:
+        return conn.execute(CP.__table__.delete().where(CP.name == name)).rowcount > 0
+
+
+# --------------------------------------------------------------------- #
+# NOT NULL without a long exclusive lock
+# --------------------------------------------------------------------- #
+def _children(conn: Connection, table: str) -> list[str]:
+    return conn.scalars(text("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:t AS regclass)
+    """), {"t": table}).all()
+
+
+def set_not_null(conn: Connection, table: str, column: str) -> None:
+    """
+    ALTER COLUMN … SET NOT NULL after a backfill, PostgreSQL only.
+
+    A NOT VALID check constraint is added (instant) and validated (a scan
+    that doesn't block writes); SET NOT NULL then trusts it instead of
+    scanning under an exclusive lock.  Partitioned tables get the check
+    on every partition, since NOT VALID can't be put on the parent.
+    Call it with autocommit on (inside an autocommit_block).
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    name = f"ck_{column}_not_null"
+    targets = _children(conn, table) or [table]
+    for t in targets:
+        conn.exec_driver_sql(f"ALTER TABLE {t} ADD CONSTRAINT {name} CHECK ({column} IS NOT NULL) NOT VALID")
+        conn.exec_driver_sql(f"ALTER TABLE {t} VALIDATE CONSTRAINT {name}")
+    conn.exec_driver_sql(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+    for t in targets:
+        conn.exec_driver_sql(f"ALTER TABLE {t} DROP CONSTRAINT {name}")
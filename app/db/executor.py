@@ -0,0 +1,89 @@
+# app/db/executor.py
+"""
+Dedicated thread pool for sync DB work, plus admission control.
+
+The pool has exactly as many threads as the engine has connections
+(pool_size + max_overflow): more threads would only queue inside
+SQLAlchemy's pool, fewer would leave connections idle.
+
+`pending` counts DB jobs submitted and not yet finished.  Everything
+beyond the thread count is queued; once that queue is longer than
+`max_queued`, `admit_db_work` sheds new patient requests with 503 +
+Retry-After instead of letting them pile up until everything times out.
+All bookkeeping happens on the event loop thread, so no locks.
+"""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, Request, status
+
+from app.services.metrics import REGISTRY
+from app.settings import db_pool_cfg
+
+T = TypeVar("T")
+
+queue_depth = REGISTRY.gauge(
+    "rfa_db_queue_depth", "DB jobs waiting for a pool thread", (),
+)
+in_flight = REGISTRY.gauge(
+    "rfa_db_jobs_in_flight", "DB jobs submitted and not finished", (),
+)
+shed = REGISTRY.counter(
+    "rfa_db_shed_total", "Requests rejected with 503 by DB admission control", ("route",),
+)
+
+
+class DbExecutor:
+    def __init__(self, workers: int, max_queued: int, retry_after: int):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retry_after = retry_after
+        self.pending = 0
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rfa-db")
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.pending - self.workers)
+
+    def _publish(self) -> None:
+        in_flight.set((), self.pending)
+        queue_depth.set((), self.queued)
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run fn in the DB pool; context vars (per-request SQL stats) come along."""
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, fn, *args, **kwargs)
+        self.pending += 1
+        self._publish()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, call)
+        finally:
+            self.pending -= 1
+            self._publish()
+
+    def overloaded(self) -> bool:
+        return self.queued >= self.max_queued
+
+
+_cfg = db_pool_cfg()
+db_executor = DbExecutor(
+    workers=_cfg["pool_size"] + _cfg["max_overflow"],
+    max_queued=_cfg["max_queued"],
+    retry_after=_cfg["retry_after"],
+)
+
+
+async def admit_db_work(request: Request) -> None:
+    """Route dependency: fail fast with 503 while the DB queue is over its limit."""
+    if db_executor.overloaded():
+        route = getattr(request.scope.get("route"), "path", request.url.path)
+        shed.inc((route,))
+        raise HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            "Server busy, please retry",
+            headers={"Retry-After": str(db_executor.retry_after)},
+        )
@@ -0,0 +1,136 @@
+# app/db/form_versions.py
+"""
+Immutable form versions and the active-version pointer.
+
+    draft      create_draft() – a new FormVersion; the importer fills in its
+               questions / options / localisations, over as many commits as
+               it likes
+    published  publish() – from here on the version's rows are frozen: the
+               flush guard below refuses any change to the version, its
+               questions, options or their localisations
+    active     activate() – forms.active_version_id (and the mirrored
+               version / title columns) switched in one UPDATE
+
+A swap only moves the pointer.  Pages rendered from the previous version
+carry its id, and submit against it; compiled forms are cached by version
+id (app/services/form_store.py), so nothing in flight is invalidated.
+
+Red flags are shared between forms and versions and are *not* frozen.
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+FV = models.FormVersion
+
+
+class VersionImmutable(ValueError):
+    pass
+
+
+# --------------------------------------------------------------------- #
+# Flush guard
+# --------------------------------------------------------------------- #
+def _version_of(db: Session, obj) -> models.FormVersion | None:
+    if isinstance(obj, FV):
+        return obj
+    if isinstance(obj, models.Question):
+        return obj.version or (obj.form_version_id and db.get(FV, obj.form_version_id))
+    if isinstance(obj, models.Option):
+        q = obj.question or (obj.question_id and db.get(models.Question, obj.question_id))
+        return q and _version_of(db, q)
+    if isinstance(obj, models.QuestionLocalised):
+        q = obj.question_id and db.get(models.Question, obj.question_id)
+        return q and _version_of(db, q)
+    if isinstance(obj, models.OptionLocalised):
+        o = obj.option_id and db.get(models.Option, obj.option_id)
+        return o and _version_of(db, o)
+    return None
+
+
+def _was_published(fv: models.FormVersion) -> bool:
+    """Published before this flush – a version is still writable in the flush that publishes it."""
+    fv.published_at  # load it if expired – history is empty for unloaded attributes
+    hist = inspect(fv).attrs.published_at.history
+    before = hist.deleted or hist.unchanged
+    return bool(before) and before[0] is not None
+
+
+def _guard(db: Session, flush_context, instances) -> None:
+    changed = [o for o in db.dirty if db.is_modified(o)]
+    for obj in (*db.new, *changed, *db.deleted):
+        fv = _version_of(db, obj)
+        if fv is None or not _was_published(fv):
+            continue
+        raise VersionImmutable(
+            f"form version {fv.id} ({fv.version}) is published and can't be changed; "
+            "import a new version instead"
+        )
+
+
+def install(session_factory) -> None:
+    """Guard every session made by `session_factory` (called from app/db/session.py)."""
+    event.listen(session_factory, "before_flush", _guard)
+
+
+# --------------------------------------------------------------------- #
+# Operations
+# --------------------------------------------------------------------- #
+def next_label(db: Session, form: models.Form | None) -> str:
+    """"1" for a new form, else one past the highest numeric label."""
+    if form is None:
+        return "1"
+    labels = db.scalars(select(FV.version).where(FV.form_id == form.id)).all()
+    return str(max((int(v) for v in labels if v.isdigit()), default=0) + 1)
+
+
+def create_draft(
+    db: Session, form: models.Form, version: str, title_en: str, description_en: str | None = None
+) -> models.FormVersion:
+    exists = db.scalar(select(func.count()).select_from(FV).where(FV.form_id == form.id, FV.version == version))
+    if exists:
+        raise VersionImmutable(f"{form.slug} version {version!r} already exists")
+    fv = FV(form_id=form.id, version=version, title_en=title_en, description_en=description_en)
+    db.add(fv)
+    db.flush()
+    return fv
+
+
+def publish(db: Session, fv: models.FormVersion) -> None:
+    if fv.published_at is None:
+        fv.published_at = datetime.now(timezone.utc)
+        db.flush()
+
+
+def activate(db: Session, form: models.Form, fv: models.FormVersion) -> None:
+    """Point `form` at `fv` (published, of this form); caller commits and publishes on the bus."""
+    if fv.form_id != form.id:
+        raise ValueError(f"version {fv.id} belongs to another form")
+    if fv.published_at is None:
+        raise ValueError(f"{form.slug} version {fv.version!r} is not published")
+    db.refresh(form, with_for_update=True)  # concurrent swaps queue up
+    form.active_version_id = fv.id
+    form.version, form.title_en = fv.version, fv.title_en
+    form.description_en = fv.description_en or ""
+    db.flush()
+
+
+def resolve(db: Session, slug: str, version: str | None = None) -> int:
+    """Version id for `slug` – the active one, or the published one labelled `version`."""
+    if version is None:
+        stmt = select(models.Form.active_version_id).where(
+            models.Form.slug == slug, models.Form.is_active.is_(True)
+        )
+    else:
+        stmt = (
+            select(FV.id).join(models.Form, models.Form.id == FV.form_id)
+            .where(models.Form.slug == slug, FV.version == version, FV.published_at.is_not(None))
+        )
+    vid = db.scalar(stmt)
+    if vid is None:
+        raise ValueError(f"Form slug '{slug}'" + (f" version '{version}'" if version else "") + " not found")
+    return vid
@@ -2,7 +2,7 @@
 from __future__ import annotations
 import enum
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 import sqlalchemy as sa
 from sqlalchemy import (     Enum, ForeignKey, Index, UniqueConstraint,     Boolean, Column, DateTime, Integer, String, Text, JSON )
@@ -53,6 +53,9 @@ class Clinic(Base):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_clinic", "clinic_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     google_sub: Mapped[str] = mapped_column(String(255), unique=True)
@@ -72,6 +75,10 @@ class Language(Base):
     native_name: Mapped[str] = mapped_column(String(60))
 
 
+# A form's content lives in FormVersions.  A published version is never
+# changed (app/db/form_versions.py refuses the flush); the form's active
+# version is a pointer, swapped in one UPDATE.  `version` / `title_en` /
+# `description_en` on the form mirror the active version.
 class Form(Base):
     __tablename__ = "forms"
 
@@ -81,8 +88,39 @@ class Form(Base):
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     title_en: Mapped[str] = mapped_column(String(120))
     description_en: Mapped[str] = mapped_column(Text)
-    questions: Mapped[list["Question"]] = relationship(
+    active_version_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("form_versions.id", use_alter=True, name="fk_forms_active_version")
+    )
+
+    versions: Mapped[list["FormVersion"]] = relationship(
         back_populates="form",
+        foreign_keys="FormVersion.form_id",
+        order_by="FormVersion.id",
+    )
+    active_version: Mapped[Optional["FormVersion"]] = relationship(
+        foreign_keys=[active_version_id], post_update=True,
+    )
+
+
+class FormVersion(Base):
+    __tablename__ = "form_versions"
+    __table_args__ = (
+        UniqueConstraint("form_id", "version", name="uq_form_version"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    form_id: Mapped[int] = mapped_column(ForeignKey("forms.id"))
+    version: Mapped[str] = mapped_column(String(20))
+    title_en: Mapped[str] = mapped_column(String(120))
+    description_en: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow
+    )
+    published_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+    form: Mapped["Form"] = relationship(back_populates="versions", foreign_keys=[form_id])
+    questions: Mapped[list["Question"]] = relationship(
+        back_populates="version",
         cascade="all, delete-orphan",
         order_by="Question.order_idx",
     )
@@ -91,11 +129,13 @@ class Form(Base):
 class Question(Base):
     __tablename__ = "questions"
     __table_args__ = (
-        UniqueConstraint("form_id", "order_idx", name="uq_question_order"),
+        UniqueConstraint("form_version_id", "order_idx", name="uq_question_version_order"),
+        Index("ix_questions_form", "form_id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    form_id: Mapped[int] = mapped_column(ForeignKey("forms.id"))
+    form_id: Mapped[int] = mapped_column(ForeignKey("forms.id"))  # = version.form_id
+    form_version_id: Mapped[int] = mapped_column(ForeignKey("form_versions.id"))
     order_idx: Mapped[int] = mapped_column(Integer)
     input_type: Mapped[InputType] = mapped_column(
         sa.Enum(InputType), default=InputType.radio, nullable=False
@@ -103,7 +143,7 @@ class Question(Base):
 
     question_key: Mapped[Optional[str]] = mapped_column(String)
 
-    form: Mapped["Form"] = relationship(back_populates="questions")
+    version: Mapped["FormVersion"] = relationship(back_populates="questions")
 
     # one question ↔ many options
     options: Mapped[list["Option"]] = relationship(
@@ -134,6 +174,7 @@ class Option(Base):
     __tablename__ = "options"
     __table_args__ = (
         UniqueConstraint("question_id", "order_idx", name="uq_opt_order"),
+        Index("ix_options_redflag", "redflag_id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -203,6 +244,7 @@ class RedFlagReference(Base):
     __tablename__ = "redflag_references"
     __table_args__ = (
         UniqueConstraint("redflag_id", "reference_id", name="uq_rf_ref"),
+        Index("ix_redflag_references_reference", "reference_id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -224,6 +266,7 @@ class RedFlagVideo(Base):
     __tablename__ = "redflag_videos"
     __table_args__ = (
         UniqueConstraint("redflag_id", "video_id", "type", name="uq_rf_video"),
+        Index("ix_redflag_videos_video", "video_id"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -233,17 +276,24 @@ class RedFlagVideo(Base):
 
 
 # ---------- patient flow ----------
+# patient_sessions, form_submissions and answers are range-partitioned by
+# month on PostgreSQL (app/db/partitions.py).  The partition key has to be
+# part of the primary key, and foreign keys can't point into a partitioned
+# table, so ids referencing these tables are plain columns.  ids come from
+# the tables' own sequences (ignored on SQLite, where callers pass them).
 class PatientSession(Base):
     __tablename__ = "patient_sessions"
     __table_args__ = (
         Index("ix_patient_day", "patient_phone_e164", "created_at"),
+        Index("ix_patient_sessions_clinic", "clinic_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    id: Mapped[int] = mapped_column(sa.Sequence("patient_sessions_id_seq"), primary_key=True)
     clinic_id: Mapped[int] = mapped_column(ForeignKey("clinics.id"))
     patient_phone_e164: Mapped[str] = mapped_column(String(20))
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=datetime.utcnow
+        DateTime(timezone=True), primary_key=True, default=datetime.utcnow
     )
 
 
@@ -251,32 +301,116 @@ class FormSubmission(Base):
     __tablename__ = "form_submissions"
     __table_args__ = (
         Index("ix_session_day", "session_id", "submitted_at"),
+        Index("ix_submissions_form", "form_id", "submitted_at"),
+        Index("ix_submissions_clinic", "clinic_id", "submitted_at"),
+        # doctor dashboard: keyset over a clinic's flagged submissions, newest first
+        Index(
+            "ix_submissions_clinic_flagged",
+            "clinic_id", sa.text("submitted_at DESC"), sa.text("id DESC"),
+            postgresql_where=sa.text("flagged"),
+        ),
+        {"postgresql_partition_by": "RANGE (submitted_at)"},
     )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    session_id: Mapped[int] = mapped_column(ForeignKey("patient_sessions.id"))
+    id: Mapped[int] = mapped_column(sa.Sequence("form_submissions_id_seq"), primary_key=True)
+    session_id: Mapped[int] = mapped_column(Integer)  # patient_sessions.id
+    # copied from the session (and `flagged` from the evaluation) when the
+    # submission is written, so the dashboard never joins to filter
+    clinic_id: Mapped[Optional[int]] = mapped_column(ForeignKey("clinics.id"))
+    flagged: Mapped[bool] = mapped_column(Boolean, default=False, server_default=sa.false())
     form_id: Mapped[int] = mapped_column(ForeignKey("forms.id"))
+    # the version the patient answered – the one their page was rendered from
+    form_version_id: Mapped[Optional[int]] = mapped_column(ForeignKey("form_versions.id"))
     submitted_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=datetime.utcnow
+        DateTime(timezone=True), primary_key=True, default=datetime.utcnow
     )
     lang_code: Mapped[str] = mapped_column(ForeignKey("languages.code"))
 
 
 class Answer(Base):
     __tablename__ = "answers"
+    __table_args__ = (
+        Index("ix_answers_submission", "submission_id"),
+        {"postgresql_partition_by": "RANGE (submitted_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    submission_id: Mapped[int] = mapped_column(ForeignKey("form_submissions.id"))
+    id: Mapped[int] = mapped_column(sa.Sequence("answers_id_seq"), primary_key=True)
+    submission_id: Mapped[int] = mapped_column(Integer)  # form_submissions.id
+    # the submission's submitted_at: the partition key, so reads by
+    # submission can pass it and touch one partition
+    submitted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     question_id: Mapped[int] = mapped_column(ForeignKey("questions.id"))
     option_key: Mapped[str] = mapped_column(String(64))
 
 
 class SubmissionRedFlag(Base):
     __tablename__ = "submission_redflags"
+    __table_args__ = (
+        Index("ix_submission_redflags_submission", "submission_id"),
+        Index("ix_submission_redflags_redflag", "redflag_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    submission_id: Mapped[int] = mapped_column(ForeignKey("form_submissions.id"))
+    submission_id: Mapped[int] = mapped_column(Integer)  # form_submissions.id
     redflag_id: Mapped[int] = mapped_column(ForeignKey("redflags.id"))
 
 
+# ---------- reporting rollups ----------
+# maintained by app/services/rollups.py from form_submissions /
+# submission_redflags; never written by the request path
+class DailySubmissionRollup(Base):
+    __tablename__ = "rollup_daily_submissions"
+    __table_args__ = (
+        Index("ix_rollup_subs_clinic_day", "clinic_id", "day"),
+    )
+
+    day: Mapped[date] = mapped_column(sa.Date, primary_key=True)
+    clinic_id: Mapped[int] = mapped_column(ForeignKey("clinics.id"), primary_key=True)
+    form_id: Mapped[int] = mapped_column(ForeignKey("forms.id"), primary_key=True)
+    submissions: Mapped[int] = mapped_column(Integer, default=0)
+    # submissions that triggered at least one red flag
+    flagged_submissions: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class DailyRedFlagRollup(Base):
+    __tablename__ = "rollup_daily_redflags"
+    __table_args__ = (
+        Index("ix_rollup_rfs_clinic_day", "clinic_id", "day"),
+    )
 
+    day: Mapped[date] = mapped_column(sa.Date, primary_key=True)
+    clinic_id: Mapped[int] = mapped_column(ForeignKey("clinics.id"), primary_key=True)
+    form_id: Mapped[int] = mapped_column(ForeignKey("forms.id"), primary_key=True)
+    redflag_id: Mapped[int] = mapped_column(ForeignKey("redflags.id"), primary_key=True)
+    triggered: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+
+    name: Mapped[str] = mapped_column(String(40), primary_key=True)
+    last_submission_id: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow
+    )
+    # "archived" row only: submissions before this may have left the live tables
+    horizon: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+
+# ---------- data migrations ----------
+# one row per batched backfill (app/db/backfill.py): how far it got
+class BackfillCheckpoint(Base):
+    __tablename__ = "backfill_checkpoints"
+
+    name: Mapped[str] = mapped_column(String(80), primary_key=True)
+    table_name: Mapped[str] = mapped_column(String(80))
+    last_id: Mapped[int] = mapped_column(sa.BigInteger, default=0)
+    upper_id: Mapped[int] = mapped_column(sa.BigInteger, default=0)  # max id when it started
+    rows_done: Mapped[int] = mapped_column(sa.BigInteger, default=0)
+    started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
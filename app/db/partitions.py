@@ -0,0 +1,155 @@
+# app/db/partitions.py
+"""
+Monthly range partitions (PostgreSQL) for the patient-flow tables.
+
+    patient_sessions   PARTITION BY RANGE (created_at)
+    form_submissions   PARTITION BY RANGE (submitted_at)
+    answers            PARTITION BY RANGE (submitted_at)   – copied from the submission
+
+One child per UTC month, named <table>_pYYYYMM, covering
+['YYYY-MM-01', first of next month).  Children are not created on demand:
+an insert into a month without a partition fails, so ensure() keeps
+`months_ahead` months ready – at startup (`[partitions] auto_create`) and
+from `python -m app.scripts.partitions ensure`, run from cron.
+
+Old months go with detach_older_than(): DETACH PARTITION is a catalog
+change, not a DELETE, and the detached table can be archived, dumped or
+dropped at leisure.
+
+Queries prune only when they constrain the partition key, so anything
+reading answers by submission should also pass the submission's time
+(see `answers.submitted_at`).  On SQLite (benchmarks) everything here is
+a no-op.
+
+Ids of the partitioned tables come from explicit sequences (the primary
+key is (id, partition key)).  SQLite has neither sequences nor
+autoincrement on a composite key, so inserts there must pass the id:
+next_id() hands one out on either backend.
+"""
+
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+# table → partition key
+PARTITIONED = {
+    "patient_sessions": "created_at",
+    "form_submissions": "submitted_at",
+    "answers": "submitted_at",
+}
+LOCK_KEY = "rfa_partitions"
+
+
+def month_start(d: date | datetime) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(m: date, n: int) -> date:
+    y, mo = divmod(m.year * 12 + m.month - 1 + n, 12)
+    return date(y, mo + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _bound(month: date) -> str:
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+def _is_pg(conn: Connection) -> bool:
+    return conn.dialect.name == "postgresql"
+
+
+def next_id(db: Session, table: str) -> int:
+    """An id for a new row of a PARTITIONED table: its sequence on PostgreSQL, max + 1 elsewhere."""
+    if table not in PARTITIONED:
+        raise ValueError(f"{table} is not partitioned")
+    if db.get_bind().dialect.name == "postgresql":
+        return db.scalar(text(f"SELECT nextval('{table}_id_seq')"))
+    return (db.scalar(text(f"SELECT max(id) FROM {table}")) or 0) + 1
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(add_months(month, 1))}')"
+    )
+
+
+def existing(conn: Connection, table: str) -> dict[date, str]:
+    """Attached monthly partitions of `table`: {month: name}."""
+    if not _is_pg(conn):
+        return {}
+    names = conn.scalars(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:t AS regclass)
+    """), {"t": table}).all()
+    pattern = re.compile(rf"^{re.escape(table)}_p(\d{{4}})(\d{{2}})$")
+    out = {}
+    for name in names:
+        if m := pattern.match(name):
+            out[date(int(m[1]), int(m[2]), 1)] = name
+    return out
+
+
+def ensure(
+    conn: Connection,
+    months_ahead: int = 3,
+    since: date | None = None,
+    now: datetime | None = None,
+) -> list[str]:
+    """
+    Create missing partitions from `since` (default: this month) up to
+    `months_ahead` months past the current one.  Returns the names created.
+    Serialised with an advisory lock, so concurrent app starts are fine.
+    """
+    if not _is_pg(conn):
+        return []
+    current = month_start(now or datetime.now(timezone.utc))
+    first = month_start(since) if since else current
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:k))"), {"k": LOCK_KEY})
+    created = []
+    for table in PARTITIONED:
+        have = existing(conn, table)
+        month = first
+        while month <= add_months(current, months_ahead):
+            if month not in have:
+                conn.execute(text(create_partition_sql(table, month)))
+                created.append(partition_name(table, month))
+            month = add_months(month, 1)
+    return created
+
+
+def detach_older_than(
+    conn: Connection,
+    keep_months: int,
+    drop: bool = False,
+    now: datetime | None = None,
+) -> list[str]:
+    """
+    Detach every partition whose whole month lies before the last
+    `keep_months` months (the current month counts as one).  With `drop`
+    the detached tables are dropped too.  Returns the names detached.
+    """
+    if not _is_pg(conn):
+        return []
+    if keep_months < 1:
+        raise ValueError("keep_months must be at least 1")
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), 1 - keep_months)
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:k))"), {"k": LOCK_KEY})
+    detached = []
+    # children first: answers before submissions before sessions
+    for table in reversed(PARTITIONED):
+        for month, name in sorted(existing(conn, table).items()):
+            if month >= cutoff:
+                break
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if drop:
+                conn.execute(text(f"DROP TABLE {name}"))
+            detached.append(name)
+    return detached
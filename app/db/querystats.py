@@ -0,0 +1,175 @@
+# app/db/querystats.py
+"""
+Per-request SQL accounting via SQLAlchemy cursor events.
+
+Every statement executed while a request is in flight is counted against
+that request (statement count, DB time, and how often each statement
+*shape* repeats).  At the end of the request the totals go to the log and
+to /metrics.
+
+[db_audit] mode
+    "count" – just count (production default)
+    "warn"  – also log a warning when a request goes over budget
+    "raise" – raise QueryBudgetExceeded at the offending statement (dev/test)
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.services.metrics import REGISTRY
+
+log = logging.getLogger("querystats")
+
+db_statements = REGISTRY.histogram(
+    "rfa_db_statements_per_request", "SQL statements issued per request",
+    ("route",), (1, 2, 3, 5, 10, 20, 50, 100, 200),
+)
+db_seconds = REGISTRY.histogram(
+    "rfa_db_seconds_per_request", "Time spent in SQL per request",
+    ("route",), (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A request issued more (or more repetitive) SQL than allowed."""
+
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.I)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(sql: str) -> str:
+    """SQL with literals and IN-lists folded, so N+1 siblings compare equal."""
+    sql = _IN_LIST.sub("IN (?)", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds", "shapes", "flagged")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter[str] = Counter()
+        self.flagged = False
+
+    def top_repeats(self, n: int = 3) -> list[tuple[str, int]]:
+        return [(s, c) for s, c in self.shapes.most_common(n) if c > 1]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("rfa_query_stats", default=None)
+
+
+class _Auditor:
+    def __init__(self):
+        self.mode = "count"
+        self.max_statements = 20
+        self.max_repeats = 5
+
+    def record(self, stats: QueryStats, statement: str, elapsed: float) -> None:
+        stats.count += 1
+        stats.seconds += elapsed
+        shape = statement_shape(statement)
+        stats.shapes[shape] += 1
+
+        if self.mode == "count" or stats.flagged:
+            return
+        problem = None
+        if stats.count > self.max_statements:
+            problem = f"{stats.count} statements (budget {self.max_statements})"
+        elif stats.shapes[shape] > self.max_repeats:
+            problem = (
+                f"same statement {stats.shapes[shape]}× (limit {self.max_repeats}), "
+                f"likely N+1: {shape[:200]}"
+            )
+        if problem is None:
+            return
+        stats.flagged = True  # one report per request
+        if self.mode == "raise":
+            raise QueryBudgetExceeded(problem)
+        log.warning("query budget exceeded: %s", problem)
+
+
+AUDITOR = _Auditor()
+
+
+# ---------- engine hooks ---------------------------------------------
+# The start time lives on the statement's execution context, not the
+# connection: a statement that raises never reaches _after, and anything
+# left on a pooled connection would skew its later timings.
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.rfa_query_t0 = time.perf_counter()
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    t0 = getattr(context, "rfa_query_t0", None)
+    elapsed = time.perf_counter() - t0 if t0 is not None else 0.0
+    stats = _current.get()
+    if stats is not None:
+        AUDITOR.record(stats, statement, elapsed)
+
+
+def install(
+    engine: Engine,
+    mode: str = "count",
+    max_statements: int = 20,
+    max_repeats: int = 5,
+) -> None:
+    if mode not in ("count", "warn", "raise"):
+        raise ValueError(f"db_audit mode must be count|warn|raise, got {mode!r}")
+    AUDITOR.mode = mode
+    AUDITOR.max_statements = max_statements
+    AUDITOR.max_repeats = max_repeats
+    if not event.contains(engine, "before_cursor_execute", _before):
+        event.listen(engine, "before_cursor_execute", _before)
+        event.listen(engine, "after_cursor_execute", _after)
+
+
+# ---------- request scope --------------------------------------------
+def begin() -> tuple[QueryStats, object]:
+    """Start counting for the current context; returns (stats, token)."""
+    stats = QueryStats()
+    return stats, _current.set(stats)
+
+
+def end(token) -> None:
+    _current.reset(token)
+
+
+class QueryStatsMiddleware:
+    """Attach a QueryStats to each request; log + export it afterwards."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = begin()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end(token)
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            db_statements.observe((route,), stats.count)
+            db_seconds.observe((route,), stats.seconds)
+            if stats.count:
+                log.info(
+                    "%s %s: %d statements, %.1f ms in DB%s",
+                    scope["method"], scope["path"], stats.count, stats.seconds * 1000,
+                    f", repeats {stats.top_repeats()}" if stats.top_repeats() else "",
+                )
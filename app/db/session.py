@@ -3,10 +3,19 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
 
-from app.settings import db_url
+from app.db import form_versions, querystats
+from app.settings import db_audit_cfg, db_pool_cfg, db_url
 
-engine = create_engine(db_url(), pool_pre_ping=True, future=True)
+engine = create_engine(
+    db_url(),
+    pool_pre_ping=True,
+    pool_size=db_pool_cfg()["pool_size"],
+    max_overflow=db_pool_cfg()["max_overflow"],
+    future=True,
+)
+querystats.install(engine, **db_audit_cfg())
 SessionLocal = sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+form_versions.install(SessionLocal)
 
 
 def get_session() -> Generator[Session, None, None]:
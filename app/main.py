@@ -1,39 +1,59 @@
 # app/main.py (updated)
-from fastapi import FastAPI, Request, Depends, HTTPException, status
-from fastapi.responses import HTMLResponse
+import asyncio
+
+from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
 
-from app.db.session import get_session
-from app.services import form_logic
-from app.routers import patient
+from app.db import partitions
+from app.db.executor import db_executor
+from app.db.querystats import QueryStatsMiddleware
+from app.db.session import engine
+from app.routers import doctor, exports, forms_api, health, patient, reports
+from app.services import cache_bus, metrics
+from app.services.compression import CompressionMiddleware
+from app.services.profiler import ProfilerMiddleware
+from app.services.traffic_recorder import TrafficRecorder
+from app.settings import compression_cfg, metrics_cfg, partitions_cfg, profiling_cfg, traffic_cfg
 
 app = FastAPI(title="Inditech RFA")
-templates = Jinja2Templates(directory="app/templates")
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.add_middleware(CompressionMiddleware, path_prefix="/patient", **compression_cfg())
+app.add_middleware(QueryStatsMiddleware)
+if traffic_cfg()["record_path"]:
+    app.add_middleware(TrafficRecorder, **traffic_cfg())
+app.add_middleware(ProfilerMiddleware, **profiling_cfg())
+# outermost, so sizes are what actually went over the wire
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.configure(**metrics_cfg())
 
-# ---------------- patient entry ----------------
-@app.get("/patient/open/{session_id}/{form_slug}", response_class=HTMLResponse)
-def open_form(
-    request: Request,
-    session_id: int,
-    form_slug: str,
-    lang: str = "EN",
-    db: Session = Depends(get_session),
-):
-    fp = form_logic.FormPack.by_slug(db, form_slug)
-    qs_loc = fp.localised(lang)
-    return templates.TemplateResponse(
-        "form.html",
-        {
-            "request": request,
-            "lang": lang,
-            "title": fp.meta.title_en,
-            "form_meta": fp.meta,
-            "questions": qs_loc,
-            "session_id": session_id,
-        },
-    )
-
+# patient entry (open / submit) lives in app/routers/patient.py
 app.include_router(patient.router)
+app.include_router(forms_api.router)
+app.include_router(reports.router)
+app.include_router(exports.router)
+app.include_router(doctor.router)
+app.include_router(health.router)
+
+
+# ---------------- partitions ----------------
+def _ensure_partitions() -> list[str]:
+    with engine.begin() as conn:
+        return partitions.ensure(conn, partitions_cfg()["months_ahead"])
+
+
+@app.on_event("startup")
+async def _ensure_future_partitions():
+    # inserts into a month without a partition fail – keep the next few ready
+    if partitions_cfg()["auto_create"]:
+        await db_executor.run(_ensure_partitions)
+
+
+# ---------------- cache invalidation ----------------
+@app.on_event("startup")
+async def _listen_for_invalidations():
+    app.state.cache_bus_task = asyncio.create_task(cache_bus.get_bus().listen())
+
+
+@app.on_event("shutdown")
+async def _stop_listening():
+    app.state.cache_bus_task.cancel()
@@ -0,0 +1,64 @@
+# app/routers/doctor.py
+"""
+GET /api/doctor/flagged?limit=20[&cursor=…]
+
+The doctor's clinic comes from their token (app/services/doctor_auth.py);
+page through with `next_cursor` until it is null.  Polling for new rows
+is just page 1 again – the cost of a page doesn't depend on its position.
+
+GET /api/doctor/redflags
+     every red flag that some active form can raise, with those forms
+GET /api/doctor/redflags/{id or slug}
+     the (form, question, option) tuples that trigger it
+
+Both read the per-worker red-flag index (app/services/redflag_index.py).
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.db.executor import admit_db_work, db_executor
+from app.db.session import get_session
+from app.services import dashboard, redflag_index
+from app.services.doctor_auth import require_doctor
+from app.services.session_tokens import DoctorClaims
+
+router = APIRouter(
+    prefix="/api/doctor",
+    tags=["doctor"],
+    dependencies=[Depends(admit_db_work)],
+)
+
+
+@router.get("/flagged", name="doctor_flagged")
+async def flagged(
+    limit: int = 20,
+    cursor: str | None = None,
+    doctor: DoctorClaims = Depends(require_doctor),
+    db: Session = Depends(get_session),
+):
+    try:
+        return await db_executor.run(dashboard.flagged_page, db, doctor.clinic_id, limit, cursor)
+    except dashboard.BadCursor as exc:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(exc)) from None
+
+
+@router.get("/redflags", name="doctor_redflags")
+async def redflags(doctor: DoctorClaims = Depends(require_doctor)):
+    index = await redflag_index.aget_index()
+    return [
+        {**index.flags[rid]._asdict(), "forms": forms, "triggers": len(index.triggers[rid])}
+        for rid, forms in sorted(index.forms.items(), key=lambda kv: index.flags[kv[0]].slug)
+    ]
+
+
+@router.get("/redflags/{ref}", name="doctor_redflag_triggers")
+async def redflag_triggers(ref: str, doctor: DoctorClaims = Depends(require_doctor)):
+    index = await redflag_index.aget_index()
+    rid = index.resolve(int(ref) if ref.isdigit() else ref)
+    if rid is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Red flag not found")
+    return {
+        **index.flags[rid]._asdict(),
+        "triggers": [t._asdict() for t in index.triggers_for(rid)],
+    }
@@ -0,0 +1,65 @@
+# app/routers/exports.py
+"""
+GET /api/exports/submissions.{csv|ndjson}?clinic_id=&form_id=&start=&end=&gzip=1
+
+Streams the export (app/services/exports.py) while it is being read from
+the DB.  The export opens its own session – the request's one is closed
+before the body is sent – and every chunk is pulled on the DB executor,
+so a long export holds one pool thread per chunk, never the event loop.
+"""
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.db.executor import admit_db_work, db_executor
+from app.db.session import SessionLocal
+from app.services import exports
+from app.services.admin_auth import require_admin
+
+router = APIRouter(
+    prefix="/api/exports",
+    tags=["exports"],
+    dependencies=[Depends(require_admin), Depends(admit_db_work)],
+)
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+async def _stream(flt: exports.ExportFilter, fmt: str, gzip: bool):
+    db = SessionLocal()
+    chunks = exports.export_chunks(db, flt, fmt, gzip)
+    try:
+        while True:
+            chunk = await db_executor.run(next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        await db_executor.run(_close, chunks, db)
+
+
+def _close(chunks, db) -> None:
+    chunks.close()
+    db.close()
+
+
+@router.get("/submissions.{fmt}", name="export_submissions")
+async def export_submissions(
+    fmt: str,
+    clinic_id: int | None = None,
+    form_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    gzip: bool = False,
+):
+    if fmt not in exports.FORMATS:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"Unknown export format {fmt!r}")
+    flt = exports.ExportFilter(clinic_id, form_id, start, end)
+    filename = f"submissions.{fmt}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        _stream(flt, fmt, gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
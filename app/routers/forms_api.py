@@ -0,0 +1,152 @@
+# app/routers/forms_api.py
+"""
+Compact JSON twin of the patient pages, for client-side rendering.
+
+GET  /api/forms/{slug}/{version}/{lang}.json
+     {"s": slug, "v": version, "l": lang, "t": title,
+      "q": [{"i": question_id, "y": input_type, "t": text,
+             "o": [[option_id, text, is_redflag], ...]}, ...]}
+     The URL names the version, so the body never changes → cached as
+     immutable by CDNs / service workers.  Any published version can be
+     fetched, not only the active one.
+
+POST /api/forms/{slug}/{version}/submit/{session_id}
+     {"p": phone, "l": lang, "o": [option_id, ...], "t": session token}
+     → {"rf": [{"s": slug, "n": localised name, "u": patient video url}], "w": whatsapp_link}
+"""
+
+import hashlib
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.db.executor import admit_db_work
+from app.db.session import get_session
+from app.services import idempotency
+from app.services.clinics import aclinic_for_session, aget_clinic
+from app.services.form_logic import FormPack
+from app.services.form_store import SharedForm, aget_form_version
+from app.services.quota import check_submit
+from app.services.redflag_bundles import abundles_for
+from app.services.session_tokens import check_link
+from app.services.whatsapp import deeplink
+
+router = APIRouter(prefix="/api/forms", tags=["forms-api"])
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+# ---------- helpers -----------------------------------------------
+async def _load(slug: str, version: str) -> FormPack | SharedForm:
+    # versions are immutable, so the URL always serves the same content
+    try:
+        return await aget_form_version(slug, version)
+    except ValueError:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Form version not found")
+
+
+def compact(fp: FormPack | SharedForm, lang: str) -> dict:
+    return {
+        "s": fp.meta.slug,
+        "v": fp.meta.version,
+        "l": lang,
+        "t": fp.meta.title_en,
+        "q": [
+            {
+                "i": q["id"],
+                "y": q["input_type"],
+                "t": q["text"],
+                "o": [[o["id"], o["text"], int(o["is_redflag"])] for o in q["options"]],
+            }
+            for q in fp.localised(lang)
+        ],
+    }
+
+
+class SubmitIn(BaseModel):
+    p: str                  # patient phone (E.164)
+    l: str = "EN"           # language the form was shown in
+    o: list[int]            # chosen option ids
+    t: str | None = None    # signed session token from the patient link
+
+
+# ---------- form (GET) --------------------------------------------
+@router.get("/{slug}/{version}/{lang}.json", name="form_json")
+async def form_json(
+    slug: str,
+    version: str,
+    lang: str,
+    request: Request,
+):
+    fp = await _load(slug, version)
+    body = json.dumps(compact(fp, lang), separators=(",", ":"), ensure_ascii=False).encode()
+    etag = '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+    headers = {"Cache-Control": IMMUTABLE, "ETag": etag}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+# ---------- submit (POST) -----------------------------------------
+@router.post(
+    "/{slug}/{version}/submit/{session_id}",
+    name="submit_json",
+    dependencies=[Depends(admit_db_work)],
+)
+async def submit_json(
+    slug: str,
+    version: str,
+    session_id: int,
+    payload: SubmitIn,
+    db: Session = Depends(get_session),
+):
+    claims = check_link(payload.t, session_id, payload.p, slug)
+    # a retried POST gets the first result back: no evaluation, writes or quota
+    key = idempotency.submit_key("json", session_id, slug, payload.p)
+    body = await idempotency.claim(key, "json")
+    if body is not None:
+        return Response(body, media_type="application/json",
+                        headers={"X-Idempotent-Replay": "true"})
+    try:
+        result = await _submit(slug, version, session_id, payload, db, claims)
+    except BaseException:
+        await idempotency.release(key)
+        raise
+    body = json.dumps(result, separators=(",", ":"), ensure_ascii=False)
+    await idempotency.finish(key, body)
+    return Response(body, media_type="application/json")
+
+
+async def _submit(slug, version, session_id, payload: SubmitIn, db: Session, claims) -> dict:
+    fp = await _load(slug, version)
+    unknown = set(payload.o) - fp.rule_by_option_id.keys()
+    if unknown:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            f"Options not on this form: {sorted(unknown)}",
+        )
+
+    await check_submit(payload.p)
+    redflags = await abundles_for(fp, fp.evaluate_options(payload.o), payload.l)
+
+    if claims is not None:
+        clinic = await aget_clinic(claims.clinic_id)
+    else:
+        clinic = await aclinic_for_session(db, session_id)
+    if clinic is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Clinic not found (seed some data first)",
+        )
+
+    wa_msg = (
+        f"I just completed the {fp.meta.title_en} form and received advice. "
+        "Please contact me back."
+    )
+    return {
+        "rf": [{"s": rf.slug, "n": rf.name, "u": rf.patient_video_url} for rf in redflags],
+        "w": deeplink(clinic.phone_whatsapp, wa_msg),
+    }
@@ -1,8 +1,19 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services import metrics
 
 router = APIRouter(tags=["system"])
 
 
 @router.get("/", summary="Simple liveness check")
 async def read_health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@router.get("/metrics", summary="Prometheus metrics", response_class=PlainTextResponse)
+def read_metrics():
+    return PlainTextResponse(
+        metrics.render_latest(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -3,11 +3,17 @@ from fastapi import APIRouter, Request, Depends, HTTPException, status
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 
+from app.db.executor import admit_db_work
 from app.db.session import get_session
 from app.db import models
-from app.services.form_logic import FormPack
+from app.services import idempotency
+from app.services.clinics import aclinic_for_session, aget_clinic
+from app.services.form_store import aget_form
+from app.services.metrics import stage
+from app.services.redflag_bundles import abundles_for
+from app.services.session_tokens import SessionClaims, check_link
 from app.services.whatsapp import deeplink
-import app.templates  # Jinja2Templates instance
+from app.templates import templates  # Jinja2Templates instance
 
 from fastapi import APIRouter, Depends, Request
 from app.services.quota import check_open, check_submit
@@ -20,11 +26,11 @@ async def get_phone(request: Request) -> str:
     """
     Extract the WhatsApp number the patient uses to authenticate.
     • GET /open  : read from query ?phone=...
-    • POST /submit : read from hidden field in form
+    • POST       : the form posts back to its own URL, so ?phone=... is still
+                   there; older pages sent it as a hidden field instead
     """
-    if request.method == "GET":
-        phone = request.query_params.get("phone")
-    else:  # POST
+    phone = request.query_params.get("phone")
+    if not phone and request.method == "POST":
         form = await request.form()
         phone = form.get("patient_phone")
     if not phone:
@@ -32,39 +38,62 @@ async def get_phone(request: Request) -> str:
     return phone
 
 
+async def get_claims(
+    request: Request,
+    session_id: int,
+    form_slug: str,
+    phone: str = Depends(get_phone),
+) -> SessionClaims | None:
+    """Verify the signed link (?t=…) against session, phone and form – no DB."""
+    token = request.query_params.get("t")
+    if not token and request.method == "POST":
+        token = (await request.form()).get("t")
+    return check_link(token, session_id, phone, form_slug)
+
+
 # ---------- open form (GET) ----------
 @router.get(
     "/open/{session_id}/{form_slug}",
     response_class=HTMLResponse,
     name="open_form",
+    dependencies=[Depends(admit_db_work), Depends(get_claims)],
 )
 async def open_form(
     request: Request,
     session_id: int,
     form_slug: str,
     lang: str = "EN",
-    db: Session = Depends(get_session),
 ):
-    fp = FormPack.by_slug(db, form_slug)
+    fp = await aget_form(form_slug)
     qloc = fp.localised(lang)
-    return templates.TemplateResponse(
-        "form.html",
-        {
-            "request": request,
-            "lang": lang,
-            "title": fp.meta.title_en,
-            "form_meta": fp.meta,
-            "questions": qloc,
-            "session_id": session_id,
-        },
-    )
+    # page carries nothing session-specific, so its gzip can be memoised
+    request.state.render_key = (form_slug, fp.meta.version_id, lang)
+    with stage("render"):
+        return templates.TemplateResponse(
+            "form.html",
+            {
+                "request": request,
+                "lang": lang,
+                "title": fp.meta.title_en,
+                "form_meta": fp.meta,
+                "questions": qloc,
+                "session_id": session_id,
+            },
+        )
 
 
 # ---------- submit form (POST) ----------
+# form.html posts back to the open URL; /submit is kept for older pages
+@router.post(
+    "/open/{session_id}/{form_slug}",
+    response_class=HTMLResponse,
+    dependencies=[Depends(admit_db_work)],
+)
 @router.post(
     "/submit/{session_id}/{form_slug}",
     response_class=HTMLResponse,
     name="submit_form",
+    dependencies=[Depends(admit_db_work)],
 )
 async def submit_form(
     session_id: int,
@@ -72,20 +101,56 @@ async def submit_form(
     request: Request,
     db: Session = Depends(get_session),
     phone: str = Depends(get_phone),
+    lang: str = "EN",
+    claims: SessionClaims | None = Depends(get_claims),
+):
+    # a repeat tap replays the first result: no evaluation, writes or quota
+    key = idempotency.submit_key("html", session_id, form_slug, phone)
+    body = await idempotency.claim(key, "html")
+    if body is not None:
+        return HTMLResponse(body, headers={"X-Idempotent-Replay": "true"})
+    try:
+        response = await _submit(session_id, form_slug, request, db, phone, lang, claims)
+    except BaseException:
+        await idempotency.release(key)
+        raise
+    await idempotency.finish(key, response.body.decode())
+    return response
+
+
+async def _submit(
+    session_id: int,
+    form_slug: str,
+    request: Request,
+    db: Session,
+    phone: str,
+    lang: str,
+    claims: SessionClaims | None,
 ):
     await check_submit(phone)
     # grab data out of the HTML form
     form_data = await request.form()
-    answers = {k: v for k, v in form_data.items()}  # {question_key: option_key}
-
-    fp = FormPack.by_slug(db, form_slug)
-    redflags = fp.evaluate(answers)
+    # (field, value) pairs – checkbox groups post the same name several times
+    answers = [(k, v) for k, v in form_data.multi_items() if isinstance(v, str)]
+
+    # evaluate against the version the page was rendered from (older pages: the active one)
+    version_id = form_data.get("v")
+    try:
+        fp = await aget_form(form_slug, int(version_id) if version_id else None)
+    except ValueError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Unknown form version")
+    # localised names / videos for the page, preloaded per form
+    redflags = await abundles_for(fp, fp.evaluate(answers), lang)
 
     # TODO:  insert rows into patient_sessions / form_submissions / answers
+    #        (form_submissions.form_version_id = fp.meta.version_id)
     #        and enforce daily-quota limits here.
 
-    # --- stub clinic lookup (replace with real query) ---
-    clinic = db.query(models.Clinic).first()
+    # signed links carry the clinic; unsigned ones still look the session up
+    if claims is not None:
+        clinic = await aget_clinic(claims.clinic_id)
+    else:
+        clinic = await aclinic_for_session(db, session_id)
     if clinic is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -98,16 +163,17 @@ async def submit_form(
     )
     wa_link = deeplink(clinic.phone_whatsapp, wa_msg)
 
-    return templates.TemplateResponse(
-        "redflag_response.html",
-        {
-            "request": request,
-            "lang": lang,
-            "redflags": redflags,
-            "clinic": clinic,
-            "whatsapp_msg": wa_msg,
-            "whatsapp_link": wa_link,
-        },
-    )
+    with stage("render"):
+        return templates.TemplateResponse(
+            "redflag_response.html",
+            {
+                "request": request,
+                "lang": lang,
+                "redflags": redflags,
+                "clinic": clinic,
+                "whatsapp_msg": wa_msg,
+                "whatsapp_link": wa_link,
+            },
+        )
 
 
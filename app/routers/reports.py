@@ -0,0 +1,62 @@
+# app/routers/reports.py
+"""
+Reporting API – answered from the daily rollups only (app/services/rollups.py),
+so the cost depends on the date range, not on how many submissions exist.
+
+GET /api/reports/clinics/{clinic_id}/daily?start=YYYY-MM-DD&end=YYYY-MM-DD[&form_id=]
+GET /api/reports/clinics/{clinic_id}/summary?start=…&end=…
+
+Both carry `as_of_submission_id` / `updated_at` – how far the aggregator got.
+"""
+
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.db.executor import admit_db_work, db_executor
+from app.db.session import get_session
+from app.services import rollups
+from app.services.admin_auth import require_admin
+
+router = APIRouter(
+    prefix="/api/reports",
+    tags=["reports"],
+    dependencies=[Depends(require_admin), Depends(admit_db_work)],
+)
+
+MAX_DAYS = 366
+
+
+def _range(start: date | None, end: date | None) -> tuple[date, date]:
+    end = end or rollups.today()
+    start = start or end - timedelta(days=29)
+    if start > end or (end - start).days >= MAX_DAYS:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            f"start must be <= end and the range at most {MAX_DAYS} days",
+        )
+    return start, end
+
+
+@router.get("/clinics/{clinic_id}/daily", name="report_daily")
+async def daily(
+    clinic_id: int,
+    start: date | None = None,
+    end: date | None = None,
+    form_id: int | None = None,
+    db: Session = Depends(get_session),
+):
+    start, end = _range(start, end)
+    return await db_executor.run(rollups.daily_report, db, clinic_id, start, end, form_id)
+
+
+@router.get("/clinics/{clinic_id}/summary", name="report_summary")
+async def summary(
+    clinic_id: int,
+    start: date | None = None,
+    end: date | None = None,
+    db: Session = Depends(get_session),
+):
+    start, end = _range(start, end)
+    return await db_executor.run(rollups.summary_report, db, clinic_id, start, end)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Move old submissions (+ answers, red flags) to Parquet, and read them back.
+
+    python -m app.scripts.archive run [--older-than-days 365] [--max-chunks N]
+    python -m app.scripts.archive export answers --from 2024-01-01 --to 2024-07-01 \
+        --out answers_h1.parquet   (or .csv)
+
+`run` is safe to interrupt and re-run: see app/services/archive.py.
+Needs pyarrow.
+"""
+
+import argparse
+from datetime import datetime, timezone
+
+from app.db.session import SessionLocal
+from app.services import archive
+
+
+def _ts(s: str) -> datetime:
+    return datetime.fromisoformat(s).replace(tzinfo=timezone.utc)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run")
+    r.add_argument("--older-than-days", type=int, default=None)
+    r.add_argument("--max-chunks", type=int, default=None)
+    e = sub.add_parser("export")
+    e.add_argument("table", choices=archive.TABLES)
+    e.add_argument("--from", dest="start", type=_ts)
+    e.add_argument("--to", dest="end", type=_ts)
+    e.add_argument("--out", required=True)
+    args = ap.parse_args()
+
+    if args.cmd == "run":
+        with SessionLocal() as db:
+            n = archive.run(db, args.older_than_days, args.max_chunks)
+        print(f"✓ archived {n} submissions")
+        return
+
+    table = archive.read_archive(args.table, args.start, args.end)
+    if args.out.endswith(".csv"):
+        import pyarrow.csv
+        pyarrow.csv.write_csv(table, args.out)
+    else:
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(table, args.out)
+    print(f"✓ {table.num_rows} rows written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
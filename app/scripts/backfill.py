@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+Inspect and reset batched backfills (app/db/backfill.py).
+
+    python -m app.scripts.backfill status
+    python -m app.scripts.backfill reset answers_submitted_at
+
+Backfills themselves run from their migration; an interrupted one
+resumes from its checkpoint when the migration is run again.  `reset`
+makes the next run start over from the first id.
+"""
+
+import argparse
+
+from sqlalchemy import select
+
+from app.db import backfill, models
+from app.db.session import engine
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("status")
+    r = sub.add_parser("reset")
+    r.add_argument("name")
+    args = ap.parse_args()
+
+    if args.cmd == "reset":
+        if not backfill.reset(engine, args.name):
+            ap.error(f"no checkpoint named {args.name!r}")
+        print(f"✓ {args.name} will start from the beginning")
+        return
+
+    CP = models.BackfillCheckpoint
+    with engine.connect() as conn:
+        rows = conn.execute(select(CP).order_by(CP.started_at)).all()
+    if not rows:
+        print("no backfills recorded")
+    for cp in rows:
+        pct = 100.0 * cp.last_id / cp.upper_id if cp.upper_id else 100.0
+        state = f"done {cp.finished_at:%Y-%m-%d %H:%M}" if cp.finished_at else f"{pct:5.1f}%"
+        print(f"{cp.name:32} {cp.table_name:18} {state:>18}  id {cp.last_id}/{cp.upper_id}  "
+              f"{cp.rows_done} rows  updated {cp.updated_at:%Y-%m-%d %H:%M:%S}")
+
+
+if __name__ == "__main__":
+    main()
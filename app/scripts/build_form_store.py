@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+(Re)build the shared form segment that every worker maps read-only.
+
+    python -m app.scripts.build_form_store [--path /dev/shm/rfa_forms.bin]
+
+Defaults to `[form_store] path` from inditech_secrets.toml.  Safe to run
+while the app serves traffic: the file is replaced atomically and workers
+pick the new one up within `check_interval` seconds.
+
+With --watch it stays up as the host's loader: it rebuilds whenever a
+form invalidation arrives on the cache bus (run one per host).
+"""
+
+import argparse
+import asyncio
+
+from app.db.session import SessionLocal
+from app.services import cache_bus
+from app.services.form_store import build_segment
+from app.settings import form_store_cfg
+
+
+def rebuild(path: str) -> None:
+    db = SessionLocal()
+    try:
+        generation = build_segment(db, path)
+    finally:
+        db.close()
+    print(f"✓ form store written to {path} (generation {generation})")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--path", default=form_store_cfg()["path"])
+    ap.add_argument("--watch", action="store_true")
+    args = ap.parse_args()
+    if not args.path:
+        ap.error("no --path and no [form_store] path configured")
+
+    rebuild(args.path)
+    if args.watch:
+        cache_bus.on("form")(lambda slug, version: rebuild(args.path))
+        cache_bus.on_reset(lambda: rebuild(args.path))
+        asyncio.run(cache_bus.get_bus().listen())
+
+
+if __name__ == "__main__":
+    main()
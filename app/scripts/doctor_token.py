@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+"""
+Issue a dashboard token for a doctor.
+
+    python -m app.scripts.doctor_token --email dr@clinic.test [--ttl-hours 12]
+
+The token is bound to the doctor's clinic at issue time; re-issue after
+moving a doctor to another clinic (old tokens run out after their TTL,
+or rotate [session_tokens] keys to cut them off at once).
+"""
+
+import argparse
+
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.session_tokens import issue_doctor
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--email", required=True)
+    ap.add_argument("--ttl-hours", type=float, default=None)
+    args = ap.parse_args()
+
+    with SessionLocal() as db:
+        user = db.query(models.User).filter_by(email=args.email).one_or_none()
+        if user is None:
+            ap.error(f"no user with email {args.email}")
+        if user.role != models.UserRole.DOCTOR:
+            ap.error(f"{args.email} is a {user.role.value}, not a doctor")
+        print(issue_doctor(user.id, user.clinic_id, args.ttl_hours))
+
+
+if __name__ == "__main__":
+    main()
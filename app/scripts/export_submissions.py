@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Export submissions with answers and red flags, streamed (constant memory).
+
+    python -m app.scripts.export_submissions --format csv --out july.csv.gz --gzip \
+        [--clinic 3] [--form 7] [--from 2025-07-01] [--to 2025-08-01]
+
+--out - writes to stdout.  Same rows as GET /api/exports/submissions.*
+"""
+
+import argparse
+import sys
+from datetime import datetime
+
+from app.db.session import SessionLocal
+from app.services import exports
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--format", choices=exports.FORMATS, default="csv")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--gzip", action="store_true")
+    ap.add_argument("--clinic", type=int)
+    ap.add_argument("--form", type=int)
+    ap.add_argument("--from", dest="start", type=datetime.fromisoformat)
+    ap.add_argument("--to", dest="end", type=datetime.fromisoformat)
+    args = ap.parse_args()
+
+    flt = exports.ExportFilter(args.clinic, args.form, args.start, args.end)
+    out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+    written = 0
+    try:
+        with SessionLocal() as db:
+            for chunk in exports.export_chunks(db, flt, args.format, args.gzip):
+                out.write(chunk)
+                written += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"✓ {written} bytes written", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
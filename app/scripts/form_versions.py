@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+List a form's versions, or swap the active one (app/db/form_versions.py).
+
+    python -m app.scripts.form_versions list SLUG
+    python -m app.scripts.form_versions activate SLUG VERSION
+
+`activate` works for any published version – rolling back is activating
+the previous one.  The swap is one UPDATE; workers pick it up from the
+cache bus, and pages already open keep submitting against their version.
+"""
+
+import argparse
+
+from sqlalchemy import func, select
+
+from app.db import form_versions, models
+from app.db.session import SessionLocal
+from app.services import cache_bus
+from app.services.form_store import build_segment
+from app.settings import form_store_cfg
+
+FV = models.FormVersion
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list").add_argument("slug")
+    a = sub.add_parser("activate")
+    a.add_argument("slug")
+    a.add_argument("version")
+    args = ap.parse_args()
+
+    with SessionLocal() as db:
+        form = db.query(models.Form).filter_by(slug=args.slug).one_or_none()
+        if form is None:
+            ap.error(f"no form '{args.slug}'")
+
+        if args.cmd == "list":
+            rows = db.execute(
+                select(FV.id, FV.version, FV.created_at, FV.published_at, func.count(models.Question.id))
+                .outerjoin(models.Question, models.Question.form_version_id == FV.id)
+                .where(FV.form_id == form.id)
+                .group_by(FV.id)
+                .order_by(FV.id)
+            ).all()
+            for vid, label, created, published, n_q in rows:
+                mark = "*" if vid == form.active_version_id else " "
+                state = f"published {published:%Y-%m-%d %H:%M}" if published else "draft"
+                print(f"{mark} {label:10} id {vid:<6} {n_q:3} questions  "
+                      f"created {created:%Y-%m-%d %H:%M}  {state}")
+            return
+
+        fv = db.query(FV).filter_by(form_id=form.id, version=args.version).one_or_none()
+        if fv is None:
+            ap.error(f"{args.slug} has no version '{args.version}'")
+        form_versions.activate(db, form, fv)
+        db.commit()
+        print(f"✓ {args.slug} → version {args.version}")
+
+        if form_store_cfg()["path"]:
+            build_segment(db, form_store_cfg()["path"])
+            print("✓ form store rebuilt")
+    cache_bus.publish("form", args.slug)
+
+
+if __name__ == "__main__":
+    main()
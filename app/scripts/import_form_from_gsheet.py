@@ -4,6 +4,12 @@ Import a condition form from a Google Sheet laid out LONG-wise:
 one row per option, grouped by "Sr No".
 
 No 'QuestionKey' column is required.
+
+Every run imports into a new draft version of the form (--version, default
+one past the highest), publishes it and makes it the active version in
+one swap – pages already open keep submitting against the version they
+were rendered from.  --no-activate stops after publishing;
+`python -m app.scripts.form_versions activate` swaps later (or back).
 """
 
 from __future__ import annotations
@@ -16,7 +22,10 @@ from unidecode import unidecode
 from sqlalchemy.orm import Session
 
 from app.db.session import SessionLocal
-from app.db import models
+from app.db import form_versions, models
+from app.services import cache_bus
+from app.services.form_store import build_segment
+from app.settings import form_store_cfg
 
 
 # ---------------- helpers --------------------------------------------------- #
@@ -38,7 +47,9 @@ def upsert(db: Session, model, match: Dict, defaults: Dict):
 
 
 # ---------------- core ingest ---------------------------------------------- #
-def ingest_tab(df: pd.DataFrame, lang: str, form: models.Form, db: Session):
+def ingest_tab(df: pd.DataFrame, lang: str, fv: models.FormVersion, db: Session) -> set[int]:
+    """Upsert one language tab into draft `fv`; returns the ids of the red flags it touched."""
+    touched: set[int] = set()
 
     # standardise headers -> remove spaces, lower-case, replace with underscores
     df.columns = [re.sub(r"[^A-Za-z0-9]", "_", c).lower() for c in df.columns]
@@ -72,15 +83,15 @@ def ingest_tab(df: pd.DataFrame, lang: str, form: models.Form, db: Session):
         if not q_text:
             continue
 
-        # ① upsert QUESTION by (form, order)
+        # ① upsert QUESTION by (version, order)
         # detect type: single 'Free text' row ⇒ text, ≥1 rows & "multi" flag later ⇒ checkbox
         first_opt = str(group["option"].iloc[0]).strip().lower()
         input_type = models.InputType.text if first_opt == "free text" else models.InputType.radio
         question = upsert(
                 db,
                 models.Question,
-                {"form_id": form.id, "order_idx": order_idx},
-                {"input_type": input_type},
+                {"form_version_id": fv.id, "order_idx": order_idx},
+                {"form_id": fv.form_id, "input_type": input_type},
         )
         db.flush()
         upsert(
@@ -147,6 +158,7 @@ def ingest_tab(df: pd.DataFrame, lang: str, form: models.Form, db: Session):
                 db.flush()  # <-- Ensure rf.id is assigned
 
                 option.redflag_id = rf.id
+                touched.add(rf.id)
 
                 upsert(
                     db,
@@ -164,6 +176,7 @@ def ingest_tab(df: pd.DataFrame, lang: str, form: models.Form, db: Session):
 
     db.commit()
     print(f"✓ {lang} imported")
+    return touched
 
 
 # ---------------- CLI ------------------------------------------------------- #
@@ -171,27 +184,30 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--sheet", required=True)
     ap.add_argument("--slug", required=True)
-    ap.add_argument("--version", default="1")
+    ap.add_argument("--version", help="label of the new version (default: next number)")
     ap.add_argument("--langs", nargs="+", required=True)
+    ap.add_argument("--no-activate", action="store_true",
+                    help="publish the version but leave the current one active")
     args = ap.parse_args()
 
     gs = gspread.service_account(filename="gsa_inditech.json")  # JSON pointed to by $GOOGLE_APPLICATION_CREDENTIALS
     sh = gs.open_by_key(args.sheet)
 
     db: Session = SessionLocal()
-    form = upsert(
-        db,
-        models.Form,
-        {"slug": args.slug},
-        {
-            "version": args.version,
-            "is_active": True,
-            "title_en": sh.title,
-            "description_en": f"{sh.title} imported",
-        },
-    )
+    form = db.query(models.Form).filter_by(slug=args.slug).one_or_none()
+    label = args.version or form_versions.next_label(db, form)
+    if form is None:
+        # version / title mirror the active version once there is one
+        form = models.Form(
+            slug=args.slug, version=label, is_active=True,
+            title_en=sh.title, description_en=f"{sh.title} imported",
+        )
+        db.add(form)
+        db.flush()
+    fv = form_versions.create_draft(db, form, label, sh.title, f"{sh.title} imported")
     db.commit()
 
+    redflag_ids: set[int] = set()
     for lang in args.langs:
         try:
             ws = sh.worksheet(lang)
@@ -205,7 +221,22 @@ def main():
             continue
 
         df = pd.DataFrame(rows[1:], columns=rows[0])
-        ingest_tab(df, lang, form, db)
+        redflag_ids |= ingest_tab(df, lang, fv, db)
+
+    form_versions.publish(db, fv)
+    if not args.no_activate:
+        form_versions.activate(db, form, fv)
+    db.commit()
+    print(f"✓ version {label} published" + ("" if args.no_activate else " and active"))
+
+    # refresh this host's shared segment, then tell every worker on every host
+    if form_store_cfg()["path"]:
+        build_segment(db, form_store_cfg()["path"])
+        print("✓ form store rebuilt")
+    version = cache_bus.publish("form", args.slug)
+    print(f"✓ invalidation published (form {args.slug} v{version})")
+    for rid in sorted(redflag_ids):  # cached response-page bundles
+        cache_bus.publish("redflag", rid)
 
     db.close()
     print("✓ Import complete")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+Maintain the monthly partitions of patient_sessions / form_submissions /
+answers on PostgreSQL (app/db/partitions.py).
+
+    python -m app.scripts.partitions list
+    python -m app.scripts.partitions ensure [--months-ahead 3]
+    python -m app.scripts.partitions detach --keep-months 24 [--drop]
+
+Run `ensure` daily from cron (the app also runs it at startup when
+`[partitions] auto_create` is on).  `detach` removes whole months from
+the parent tables without a DELETE; archive them first
+(app.scripts.archive) if they are still wanted.
+"""
+
+import argparse
+
+from app.db import partitions
+from app.db.session import engine
+from app.settings import partitions_cfg
+
+
+def main():
+    cfg = partitions_cfg()
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list")
+    e = sub.add_parser("ensure")
+    e.add_argument("--months-ahead", type=int, default=cfg["months_ahead"])
+    d = sub.add_parser("detach")
+    d.add_argument("--keep-months", type=int, default=cfg["retention_months"])
+    d.add_argument("--drop", action="store_true", help="drop the detached tables as well")
+    args = ap.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        ap.error("partitions are PostgreSQL only")
+
+    if args.cmd == "list":
+        with engine.connect() as conn:
+            for table in partitions.PARTITIONED:
+                months = sorted(partitions.existing(conn, table))
+                span = f"{months[0]:%Y-%m} … {months[-1]:%Y-%m}" if months else "none"
+                print(f"{table:18} {len(months):4} partitions  {span}")
+        return
+
+    if args.cmd == "ensure":
+        with engine.begin() as conn:
+            created = partitions.ensure(conn, args.months_ahead)
+        print(f"✓ created {len(created)} partitions" + "".join(f"\n  {n}" for n in created))
+        return
+
+    if args.keep_months is None:
+        ap.error("--keep-months is required (or set [partitions] retention_months)")
+    with engine.begin() as conn:
+        detached = partitions.detach_older_than(conn, args.keep_months, drop=args.drop)
+    verb = "dropped" if args.drop else "detached"
+    print(f"✓ {verb} {len(detached)} partitions" + "".join(f"\n  {n}" for n in detached))
+
+
+if __name__ == "__main__":
+    main()
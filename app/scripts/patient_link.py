@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""
+Doctor-side link generator: opens a patient session and prints the signed
+link to send on WhatsApp.
+
+    python -m app.scripts.patient_link --clinic 1 --phone 919812345678 \
+        --form fever_child [--lang HI] [--ttl-hours 72] \
+        [--base-url https://rfa.example.org]
+
+The link carries an HMAC token over session, clinic, phone and form (see
+app/services/session_tokens.py), so the patient pages never look the
+session up.  Needs `[session_tokens] keys` / `current` configured.
+"""
+
+import argparse
+
+from app.db import models, partitions
+from app.db.session import SessionLocal
+from app.services.session_tokens import patient_link
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clinic", type=int, required=True)
+    ap.add_argument("--phone", required=True)
+    ap.add_argument("--form", required=True, help="form slug")
+    ap.add_argument("--lang", default="EN")
+    ap.add_argument("--ttl-hours", type=float, default=None)
+    ap.add_argument("--base-url", default="http://localhost:8000")
+    args = ap.parse_args()
+
+    with SessionLocal() as db:
+        if db.get(models.Clinic, args.clinic) is None:
+            ap.error(f"clinic {args.clinic} not found")
+        session = models.PatientSession(
+            id=partitions.next_id(db, "patient_sessions"),  # SQLite can't generate it
+            clinic_id=args.clinic, patient_phone_e164=args.phone,
+        )
+        db.add(session)
+        db.commit()
+        session_id = session.id
+
+    print(patient_link(
+        args.base_url, session_id, args.clinic, args.phone, args.form,
+        lang=args.lang, ttl_hours=args.ttl_hours,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Maintain the daily reporting rollups (app/services/rollups.py).
+
+    python -m app.scripts.rollups run [--loop]          # fold new submissions
+    python -m app.scripts.rollups rebuild               # everything still live, from scratch
+    python -m app.scripts.rollups rebuild --from 2025-07-01 --to 2025-07-31
+
+`run --loop` is the aggregator: one per deployment is enough, a second
+one just waits on the watermark lock.  `rebuild` with a range replaces
+only those days, e.g. after backfilling or correcting submissions.
+"""
+
+import argparse
+import time
+from datetime import date
+
+from app.db.session import SessionLocal
+from app.services import rollups
+from app.settings import rollups_cfg
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run")
+    r.add_argument("--loop", action="store_true")
+    r.add_argument("--interval", type=float, default=rollups_cfg()["interval"])
+    b = sub.add_parser("rebuild")
+    b.add_argument("--from", dest="day_from", type=date.fromisoformat)
+    b.add_argument("--to", dest="day_to", type=date.fromisoformat)
+    args = ap.parse_args()
+
+    if args.cmd == "rebuild":
+        with SessionLocal() as db:
+            try:
+                n = rollups.rebuild(db, args.day_from, args.day_to)
+            except rollups.ArchivedRange as exc:
+                ap.error(str(exc))
+        print(f"✓ rebuilt from {n} submissions")
+        return
+
+    while True:
+        with SessionLocal() as db:
+            n = rollups.run(db)
+        print(f"✓ folded {n} submissions")
+        if not args.loop:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
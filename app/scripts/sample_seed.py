@@ -6,7 +6,7 @@ Run with:  INDITECH_CFG=~/redflag-alert-system/dev_secrets.toml  \
 
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal, engine
-from app.db import models
+from app.db import form_versions, models
 
 
 # ---- helper ---------------------------------------------------------------
@@ -84,6 +84,17 @@ def main() -> None:
         },
         slug="rash_body",
     )
+    fv = add_if_missing(
+        db,
+        models.FormVersion,
+        {"title_en": form.title_en, "description_en": form.description_en},
+        form_id=form.id,
+        version="1",
+    )
+    if fv.published_at is not None:
+        db.close()
+        print("✓ Sample data already present.")
+        return
 
     # 5) question -----------------------------------------------------------
     q = add_if_missing(
@@ -93,6 +104,7 @@ def main() -> None:
             "form_id": form.id,
             "order_idx": 1,
         },
+        form_version_id=fv.id,
         question_key="rash_color",
     )
 
@@ -143,6 +155,11 @@ def main() -> None:
         lang_code=en.code,
     )
 
+    # 7) publish + activate -------------------------------------------------
+    form_versions.publish(db, fv)
+    form_versions.activate(db, form, fv)
+    db.commit()
+
     db.close()
     print("✓ Sample data inserted.")
 
@@ -0,0 +1,35 @@
+# app/services/admin_auth.py
+"""
+Shared-secret check for admin-only features (profiling, exports, reports).
+Tokens live in `[admin] tokens = ["…", "…"]` in inditech_secrets.toml;
+more than one so they can be rotated.
+"""
+
+import hmac
+
+from fastapi import HTTPException, Request, status
+
+from app.settings import admin_tokens
+
+
+def is_admin_token(token: str | None) -> bool:
+    if not token:
+        return False
+    # compare against every token so timing doesn't reveal which one matched
+    ok = False
+    for t in admin_tokens():
+        ok |= hmac.compare_digest(token.encode(), t.encode())
+    return ok
+
+
+def token_from(request: Request) -> str | None:
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        return auth[7:].strip()
+    return request.headers.get("x-admin-token")
+
+
+async def require_admin(request: Request) -> None:
+    """FastAPI dependency: 403 unless the request carries an admin token."""
+    if not is_admin_token(token_from(request)):
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Admin token required")
@@ -0,0 +1,346 @@
+# app/services/archive.py
+"""
+Archive old submissions – with their answers and red flags – to Parquet.
+
+Layout (Hive partitioning by the submission's month, UTC):
+
+    <dir>/submissions/year=2025/month=7/part-<first_id>-<last_id>.parquet
+    <dir>/answers/…           <dir>/redflags/…
+    <dir>/_manifest.jsonl     one line per chunk state change
+
+A run takes submissions older than `older_than_days` in id order,
+`chunk_size` at a time.  Each chunk goes through three steps:
+
+    written  – parquet files fsynced and renamed into place, and their row
+               counts re-read from the footers and checked against the DB rows
+    deleted  – the chunk's answers / redflags / submissions deleted in one
+               transaction, each DELETE's rowcount checked as well
+    (done)   – recorded in the manifest
+
+Resuming after a crash: a chunk left at "written" is re-checked – if its
+rows are still in the DB and match the files they are deleted now, if
+they are gone the delete had committed, otherwise the files are dropped
+and the chunk is redone.  File names are fixed by the id range, so a
+redo overwrites rather than duplicates.
+
+A chunk is exactly the submissions the run selected: older than the
+cutoff and already folded into the daily rollups (reports keep counting
+them).  Reading and deleting repeat both conditions, and the manifest
+records them, so a resumed chunk means the same rows.  The delete also
+moves the "archived" horizon in rollup_watermarks, in the same
+transaction; `rollups rebuild` refuses days before it, since their
+submissions are no longer in the live tables.
+
+On PostgreSQL, whole months past retention are cheaper to drop by
+detaching their partitions (app/db/partitions.py) once archived here.
+
+pyarrow is only needed here; it is imported on first use.
+"""
+
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.settings import archive_cfg
+
+FS, A, SRF = models.FormSubmission, models.Answer, models.SubmissionRedFlag
+HORIZON = "archived"  # rollup_watermarks row: submissions before `horizon` may be archived
+TABLES = ("submissions", "answers", "redflags")
+
+
+def _pa():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401  (submodule)
+    except ImportError:
+        raise RuntimeError("Parquet archival needs pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def _schemas(pa) -> dict:
+    return {
+        "submissions": pa.schema([
+            ("id", pa.int64()), ("session_id", pa.int64()), ("clinic_id", pa.int64()),
+            ("form_id", pa.int64()), ("submitted_at", pa.timestamp("us", tz="UTC")),
+            ("lang_code", pa.string()), ("form_version_id", pa.int64()),
+        ]),
+        "answers": pa.schema([
+            ("id", pa.int64()), ("submission_id", pa.int64()),
+            ("question_id", pa.int64()), ("option_key", pa.string()),
+            ("submitted_at", pa.timestamp("us", tz="UTC")),
+        ]),
+        "redflags": pa.schema([
+            ("id", pa.int64()), ("submission_id", pa.int64()), ("redflag_id", pa.int64()),
+            ("submitted_at", pa.timestamp("us", tz="UTC")),
+        ]),
+    }
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+# --------------------------------------------------------------------- #
+# Manifest
+# --------------------------------------------------------------------- #
+class Manifest:
+    def __init__(self, root: Path):
+        self.path = root / "_manifest.jsonl"
+        self.chunks: dict[str, dict] = {}  # "first-last" → latest entry
+        if self.path.exists():
+            for line in self.path.read_text().splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    self.chunks[entry["chunk"]] = entry
+
+    def record(self, entry: dict) -> None:
+        with open(self.path, "a") as fh:
+            fh.write(json.dumps(entry) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.chunks[entry["chunk"]] = entry
+
+    def pending(self) -> list[dict]:
+        return [e for e in self.chunks.values() if e["state"] == "written"]
+
+
+# --------------------------------------------------------------------- #
+# One chunk
+# --------------------------------------------------------------------- #
+def _in_chunk(entry: dict) -> tuple:
+    """The chunk's submissions: its id range, under the same conditions that selected them."""
+    return (
+        FS.id >= entry["first_id"], FS.id <= entry["last_id"],
+        FS.submitted_at < datetime.fromisoformat(entry["cutoff"]),
+        FS.id <= entry["folded_up_to"],
+    )
+
+
+def _answers_in(db: Session, entry: dict) -> list:
+    """Answers of the chunk, bounded by its submitted_at span so only its partitions are read."""
+    in_chunk = _in_chunk(entry)
+    lo, hi = db.execute(
+        select(func.min(FS.submitted_at), func.max(FS.submitted_at)).where(*in_chunk)
+    ).one()
+    if lo is None:
+        return [A.submission_id.in_(())]
+    return [
+        A.submission_id.in_(select(FS.id).where(*in_chunk).scalar_subquery()),
+        A.submitted_at.between(lo, hi),
+    ]
+
+
+def _rows(db: Session, entry: dict) -> dict[str, list[tuple]]:
+    in_chunk = _in_chunk(entry)
+    return {
+        "submissions": db.execute(
+            select(FS.id, FS.session_id, FS.clinic_id, FS.form_id, FS.submitted_at, FS.lang_code,
+                   FS.form_version_id)
+            .where(*in_chunk).order_by(FS.id)
+        ).all(),
+        "answers": db.execute(
+            select(A.id, A.submission_id, A.question_id, A.option_key, A.submitted_at)
+            .where(*_answers_in(db, entry)).order_by(A.id)
+        ).all(),
+        "redflags": db.execute(
+            select(SRF.id, SRF.submission_id, SRF.redflag_id, FS.submitted_at)
+            .join(FS, FS.id == SRF.submission_id).where(*in_chunk).order_by(SRF.id)
+        ).all(),
+    }
+
+
+def _partition(table: str, row: tuple) -> tuple[int, int]:
+    # answers / redflags carry their submission's submitted_at last
+    ts = _utc(row[4] if table == "submissions" else row[-1])
+    return ts.year, ts.month
+
+
+def _write(root: Path, chunk: str, rows: dict[str, list[tuple]]) -> dict[str, dict[str, int]]:
+    """Write the chunk's files; {table: {relative path: rows}}."""
+    pa = _pa()
+    schemas = _schemas(pa)
+    files: dict[str, dict[str, int]] = {}
+    for table in TABLES:
+        schema = schemas[table]
+        ts_col = schema.get_field_index("submitted_at")
+        by_month: dict[tuple, list[tuple]] = defaultdict(list)
+        for row in rows[table]:
+            by_month[_partition(table, row)].append(row)
+        files[table] = {}
+        for (year, month), part in sorted(by_month.items()):
+            cols = list(zip(*part))
+            cols[ts_col] = [_utc(ts) for ts in cols[ts_col]]
+            arrow = pa.table([pa.array(c, type=f.type) for c, f in zip(cols, schema)], schema=schema)
+            rel = f"{table}/year={year}/month={month}/part-{chunk}.parquet"
+            path = root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.tmp")
+            with open(tmp, "wb") as fh:
+                pa.parquet.write_table(arrow, fh, compression="zstd")
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, path)
+            files[table][rel] = len(part)
+    return files
+
+
+def _verify_files(root: Path, files: dict[str, dict[str, int]]) -> bool:
+    pa = _pa()
+    for table_files in files.values():
+        for rel, n in table_files.items():
+            path = root / rel
+            if not path.exists() or pa.parquet.read_metadata(path).num_rows != n:
+                return False
+    return True
+
+
+def _counts(rows: dict[str, list]) -> dict[str, int]:
+    return {t: len(rows[t]) for t in TABLES}
+
+
+def _advance_horizon(db: Session, cutoff: datetime) -> None:
+    wm = db.get(models.RollupWatermark, HORIZON, with_for_update=True)
+    if wm is None:
+        wm = models.RollupWatermark(name=HORIZON, last_submission_id=0)
+        db.add(wm)
+    if wm.horizon is None or _utc(wm.horizon) < cutoff:
+        wm.horizon = cutoff
+    wm.updated_at = datetime.now(timezone.utc)
+
+
+def _delete(db: Session, entry: dict, expected: dict[str, int]) -> None:
+    in_chunk = _in_chunk(entry)
+    sub_ids = select(FS.id).where(*in_chunk).scalar_subquery()
+    done = {
+        "answers": db.execute(delete(A).where(*_answers_in(db, entry))).rowcount,
+        "redflags": db.execute(delete(SRF).where(SRF.submission_id.in_(sub_ids))).rowcount,
+        "submissions": db.execute(delete(FS).where(*in_chunk)).rowcount,
+    }
+    if done != expected:
+        db.rollback()
+        raise RuntimeError(f"archive delete mismatch for {entry['chunk']}: {done} != {expected}")
+    _advance_horizon(db, datetime.fromisoformat(entry["cutoff"]))
+    db.commit()
+
+
+def _resume(db: Session, root: Path, manifest: Manifest) -> None:
+    for entry in manifest.pending():
+        rows = _rows(db, entry)
+        now = _counts(rows)
+        if sum(now.values()) == 0 and _verify_files(root, entry["files"]):
+            manifest.record({**entry, "state": "deleted"})      # delete had committed
+        elif now == entry["counts"] and _verify_files(root, entry["files"]):
+            _delete(db, entry, now)
+            manifest.record({**entry, "state": "deleted"})
+        else:                                                     # start this chunk over
+            for table_files in entry["files"].values():
+                for rel in table_files:
+                    (root / rel).unlink(missing_ok=True)
+            manifest.record({**entry, "state": "abandoned"})
+
+
+# --------------------------------------------------------------------- #
+# Entry points
+# --------------------------------------------------------------------- #
+def run(
+    db: Session,
+    older_than_days: int | None = None,
+    max_chunks: int | None = None,
+    now: datetime | None = None,
+    progress=print,
+) -> int:
+    """Archive eligible submissions; returns how many were moved."""
+    cfg = archive_cfg()
+    root = Path(cfg["dir"])
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(root)
+    _resume(db, root, manifest)
+
+    days = cfg["older_than_days"] if older_than_days is None else older_than_days
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=days)
+    wm = db.get(models.RollupWatermark, "daily")
+    folded_up_to = wm.last_submission_id if wm else 0
+
+    moved = chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        ids = db.scalars(
+            select(FS.id)
+            .where(FS.submitted_at < cutoff, FS.id <= folded_up_to)
+            .order_by(FS.id)
+            .limit(cfg["chunk_size"])
+        ).all()
+        if not ids:
+            break
+        first, last = ids[0], ids[-1]
+        chunk = f"{first}-{last}"
+        entry = {"chunk": chunk, "first_id": first, "last_id": last,
+                 "cutoff": cutoff.isoformat(), "folded_up_to": folded_up_to}
+        rows = _rows(db, entry)
+        counts = _counts(rows)
+        files = _write(root, chunk, rows)
+        if not _verify_files(root, files):
+            raise RuntimeError(f"archive chunk {chunk}: files do not match the rows written")
+        entry.update(counts=counts, files=files, state="written",
+                     at=datetime.now(timezone.utc).isoformat())
+        manifest.record(entry)
+        _delete(db, entry, counts)
+        manifest.record({**entry, "state": "deleted"})
+        moved += counts["submissions"]
+        chunks += 1
+        progress(f"  chunk {chunk}: {counts}")
+    return moved
+
+
+def read_archive(
+    table: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    filters: list | None = None,
+    columns: list[str] | None = None,
+    root: str | Path | None = None,
+):
+    """
+    Archived rows as a pyarrow Table, for research exports.
+
+    start / end ([start, end), UTC) prune whole month partitions first,
+    then apply to submitted_at exactly – every table carries its
+    submission's submitted_at.
+    `filters` are extra pyarrow.dataset expressions, e.g.
+    [ds.field("clinic_id") == 3].
+    """
+    if table not in TABLES:
+        raise ValueError(f"unknown archive table {table!r} (one of {TABLES})")
+    _pa()
+    import pyarrow.dataset as ds
+
+    path = Path(root or archive_cfg()["dir"]) / table
+    if not path.exists():
+        raise FileNotFoundError(f"no archived {table} under {path}")
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+
+    expr = None
+
+    def add(e):
+        nonlocal expr
+        expr = e if expr is None else expr & e
+
+    if start is not None:
+        start = _utc(start)
+        add((ds.field("year") > start.year)
+            | ((ds.field("year") == start.year) & (ds.field("month") >= start.month)))
+        add(ds.field("submitted_at") >= start)
+    if end is not None:
+        end = _utc(end)
+        last = end - timedelta(microseconds=1)  # an end on the 1st leaves that month out
+        add((ds.field("year") < last.year)
+            | ((ds.field("year") == last.year) & (ds.field("month") <= last.month)))
+        add(ds.field("submitted_at") < end)
+    for f in filters or ():
+        add(f)
+    return dataset.to_table(columns=columns, filter=expr)
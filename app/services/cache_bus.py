@@ -0,0 +1,146 @@
+# app/services/cache_bus.py
+"""
+Cache invalidation bus: writers publish "this form / clinic changed"
+after commit; every worker on every host evicts just that key.
+
+  message  {"kind": "form" | "clinic" | "redflag", "key": "<slug or id>", "version": n}
+
+`version` comes from a per-key counter (Redis INCR), so it only goes up;
+receivers ignore anything not newer than what they already applied
+(see local_cache.VersionedCache).
+
+Backends
+  RedisBus    – PUBLISH on `channel`; publish() is sync so scripts can
+                call it, listen() is an asyncio task in each worker
+  LoopbackBus – in-process, for tests and single-process dev
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+from typing import Callable
+
+from app.settings import cache_bus_cfg
+
+log = logging.getLogger("cache_bus")
+
+Handler = Callable[[str, int], None]  # (key, version)
+HANDLERS: dict[str, list[Handler]] = {}
+
+
+def on(kind: str):
+    """Register an invalidation handler: @on("form") def _(slug, version): ..."""
+    def deco(fn: Handler) -> Handler:
+        HANDLERS.setdefault(kind, []).append(fn)
+        return fn
+    return deco
+
+
+def dispatch(message: dict) -> None:
+    for handler in HANDLERS.get(message["kind"], ()):
+        try:
+            handler(message["key"], int(message["version"]))
+        except Exception:  # one bad handler must not stop the others
+            log.exception("invalidation handler failed for %s", message)
+
+
+class LoopbackBus:
+    def __init__(self):
+        self._versions: dict[tuple[str, str], itertools.count] = {}
+
+    def publish(self, kind: str, key: str | int) -> int:
+        counter = self._versions.setdefault((kind, str(key)), itertools.count(1))
+        version = next(counter)
+        dispatch({"kind": kind, "key": str(key), "version": version})
+        return version
+
+    async def listen(self) -> None:
+        return  # publish() delivers directly
+
+
+class RedisBus:
+    def __init__(self, url: str, channel: str):
+        self.url = url
+        self.channel = channel
+
+    def publish(self, kind: str, key: str | int) -> int:
+        import redis
+
+        client = redis.Redis.from_url(self.url)
+        try:
+            version = client.incr(f"{self.channel}:ver:{kind}:{key}")
+            client.publish(
+                self.channel,
+                json.dumps({"kind": kind, "key": str(key), "version": version}),
+            )
+        finally:
+            client.close()
+        return version
+
+    async def listen(self) -> None:
+        """Run forever in the worker; reconnects with back-off on Redis errors."""
+        import redis.asyncio as aredis
+
+        delay = 1.0
+        disconnected = False
+        while True:
+            client = aredis.from_url(self.url, decode_responses=True)
+            try:
+                async with client.pubsub() as ps:
+                    await ps.subscribe(self.channel)
+                    delay = 1.0
+                    if disconnected:
+                        # anything published while we were away is missed → drop
+                        # everything we hold.  Only now: a reset before the
+                        # subscribe could be refilled and then miss a message.
+                        dispatch_reset()
+                        disconnected = False
+                    async for msg in ps.listen():
+                        if msg.get("type") == "message":
+                            dispatch(json.loads(msg["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("cache bus disconnected; retrying in %.0fs", delay)
+                disconnected = True
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                await client.aclose()
+
+
+RESET_HANDLERS: list[Callable[[], None]] = []
+
+
+def on_reset(fn: Callable[[], None]) -> Callable[[], None]:
+    RESET_HANDLERS.append(fn)
+    return fn
+
+
+def dispatch_reset() -> None:
+    for fn in RESET_HANDLERS:
+        fn()
+
+
+_bus: LoopbackBus | RedisBus | None = None
+
+
+def get_bus() -> LoopbackBus | RedisBus:
+    global _bus
+    if _bus is None:
+        cfg = cache_bus_cfg()
+        if cfg["backend"] == "loopback":
+            _bus = LoopbackBus()
+        elif cfg["backend"] == "redis":
+            _bus = RedisBus(cfg["redis_url"], cfg["channel"])
+        else:
+            raise ValueError(f"unknown cache_bus backend {cfg['backend']!r}")
+    return _bus
+
+
+def publish(kind: str, key: str | int) -> int:
+    """Call after the change is committed."""
+    return get_bus().publish(kind, key)
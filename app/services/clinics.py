@@ -0,0 +1,84 @@
+# app/services/clinics.py
+"""
+Clinic look-ups for the patient flow, cached per worker and evicted via
+the cache bus whenever a clinic is edited (publish("clinic", clinic_id)).
+"""
+
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.executor import db_executor
+from app.db.session import SessionLocal
+from app.services import cache_bus
+from app.services.local_cache import MISSING, VersionedCache
+from app.services.singleflight import SingleFlight
+
+clinics = VersionedCache("clinics", max_entries=2048)
+clinic_loads = SingleFlight("clinics")
+
+
+@cache_bus.on("clinic")
+def _invalidate(key: str, version: int) -> None:
+    clinics.invalidate(int(key), version)
+
+
+@cache_bus.on_reset
+def _reset() -> None:
+    clinics.clear()
+
+
+def _load_clinic(db: Session, clinic_id: int) -> models.Clinic | None:
+    clinic = db.get(models.Clinic, clinic_id)
+    if clinic is not None:
+        db.expunge(clinic)  # shared across requests; must not be tied to this session
+    return clinic
+
+
+def get_clinic(db: Session, clinic_id: int) -> models.Clinic | None:
+    clinic = clinics.get(clinic_id)
+    if clinic is MISSING:
+        token = clinics.begin_load(clinic_id)
+        clinic = _load_clinic(db, clinic_id)
+        if clinic is not None:
+            clinics.put(clinic_id, clinic, token)
+    return clinic
+
+
+def _load_detached(clinic_id: int) -> models.Clinic | None:
+    # own session: the load may outlive the request that started it
+    with SessionLocal() as db:
+        return _load_clinic(db, clinic_id)
+
+
+async def aget_clinic(clinic_id: int) -> models.Clinic | None:
+    """get_clinic() for async handlers, with concurrent misses coalesced."""
+    clinic = clinics.get(clinic_id)
+    if clinic is not MISSING:
+        return clinic
+
+    async def load() -> models.Clinic | None:
+        token = clinics.begin_load(clinic_id)
+        clinic = await db_executor.run(_load_detached, clinic_id)
+        if clinic is not None:
+            clinics.put(clinic_id, clinic, token)
+        return clinic
+
+    return await clinic_loads.do(clinic_id, load)
+
+
+def _session_clinic_id(db: Session, session_id: int) -> int | None:
+    clinic_id = db.query(models.PatientSession.clinic_id).filter_by(id=session_id).scalar()
+    if clinic_id is None:
+        clinic_id = db.query(models.Clinic.id).order_by(models.Clinic.id).limit(1).scalar()
+    return clinic_id
+
+
+def clinic_for_session(db: Session, session_id: int) -> models.Clinic | None:
+    """Clinic that issued the patient session; first clinic until sessions are written."""
+    clinic_id = _session_clinic_id(db, session_id)
+    return get_clinic(db, clinic_id) if clinic_id is not None else None
+
+
+async def aclinic_for_session(db: Session, session_id: int) -> models.Clinic | None:
+    clinic_id = await db_executor.run(_session_clinic_id, db, session_id)
+    return await aget_clinic(clinic_id) if clinic_id is not None else None
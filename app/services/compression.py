@@ -0,0 +1,169 @@
+# app/services/compression.py
+"""
+gzip for the HTML pages served by the patient router.
+
+• only text/html bodies under `path_prefix`, and only above `min_size`
+• a CPU budget (ms of compression per wall-clock second, per worker) –
+  once spent, responses go out uncompressed until the bucket refills
+• bodies tagged with `request.state.render_key` (form slug, version id, lang)
+  are memoised, so a form page is compressed once per form version
+  instead of once per request
+"""
+
+import gzip
+import hashlib
+import time
+from collections import OrderedDict
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class CpuBudget:
+    """Token bucket measured in seconds of compression per second."""
+
+    def __init__(self, ms_per_sec: float):
+        self.rate = ms_per_sec / 1000.0
+        self.tokens = self.rate
+        self.last = time.monotonic()
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        return self.tokens > 0
+
+    def charge(self, seconds: float) -> None:
+        self.tokens -= seconds
+
+
+class CompressedBodyCache:
+    """Small LRU of {(render_key, body digest): gzip bytes}."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._data: OrderedDict[tuple, bytes] = OrderedDict()
+
+    def get(self, key: tuple) -> bytes | None:
+        gz = self._data.get(key)
+        if gz is not None:
+            self._data.move_to_end(key)
+        return gz
+
+    def put(self, key: tuple, gz: bytes) -> None:
+        self._data[key] = gz
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+def _accepts_gzip(scope: Scope) -> bool:
+    for token in Headers(scope=scope).get("accept-encoding", "").split(","):
+        coding, _, params = token.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware; buffers one-shot HTML bodies and gzips them."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        path_prefix: str = "/patient",
+        min_size: int = 1024,
+        level: int = 6,
+        cpu_budget_ms: float = 50,
+        cache_entries: int = 256,
+    ):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.min_size = min_size
+        self.level = level
+        self.budget = CpuBudget(cpu_budget_ms)
+        self.cache = CompressedBodyCache(cache_entries)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not scope["path"].startswith(self.path_prefix)
+            or not _accepts_gzip(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        chunks: list[bytes] = []
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    not headers.get("content-type", "").startswith("text/html")
+                    or "content-encoding" in headers
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                # streamed response – don't buffer it, send as-is
+                passthrough = True
+                await send(start)
+                await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                return
+
+            await self._finish(scope, start, b"".join(chunks), send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _finish(self, scope: Scope, start: Message, body: bytes, send: Send) -> None:
+        gz = self._compress(scope, body) if len(body) >= self.min_size else None
+
+        headers = MutableHeaders(raw=start["headers"])
+        if gz is not None:
+            body = gz
+            headers["Content-Encoding"] = "gzip"
+            headers["Content-Length"] = str(len(body))
+        headers.add_vary_header("Accept-Encoding")
+
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
+
+    def _compress(self, scope: Scope, body: bytes) -> bytes | None:
+        render_key = scope.get("state", {}).get("render_key")
+        cache_key = None
+        if render_key is not None:
+            # the digest guards against per-request bits sneaking into the page
+            cache_key = (render_key, hashlib.blake2b(body, digest_size=16).digest())
+            gz = self.cache.get(cache_key)
+            if gz is not None:
+                return gz
+
+        if not self.budget.allow():
+            return None
+
+        t0 = time.perf_counter()
+        gz = gzip.compress(body, compresslevel=self.level, mtime=0)
+        self.budget.charge(time.perf_counter() - t0)
+
+        if cache_key is not None:
+            self.cache.put(cache_key, gz)
+        return gz
@@ -0,0 +1,103 @@
+# app/services/dashboard.py
+"""
+Doctor dashboard: a clinic's flagged submissions, newest first.
+
+Keyset pagination over (clinic_id, submitted_at, id) on the partial index
+ix_submissions_clinic_flagged – the cursor is the last row's
+(submitted_at, id), so page N is an index range scan starting where page
+N-1 stopped, never an OFFSET over everything before it.
+
+Every page is exactly three queries, whatever its size:
+
+    1. the page itself (+ form title and patient phone, joined by PK)
+    2. answers of those submissions           (WHERE submission_id IN …,
+                                               pruned to the page's months)
+    3. red flags of those submissions, named  (WHERE submission_id IN …)
+"""
+
+import base64
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+FS, PS, F = models.FormSubmission, models.PatientSession, models.Form
+A, Q, SRF, RF = models.Answer, models.Question, models.SubmissionRedFlag, models.RedFlag
+
+MAX_LIMIT = 100
+
+
+class BadCursor(ValueError):
+    pass
+
+
+def encode_cursor(submitted_at: datetime, submission_id: int) -> str:
+    raw = f"{submitted_at.isoformat()}|{submission_id}".encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, sid = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(sid)
+    except (ValueError, UnicodeDecodeError):
+        raise BadCursor("invalid cursor") from None
+
+
+def flagged_page(db: Session, clinic_id: int, limit: int = 20, cursor: str | None = None) -> dict:
+    limit = max(1, min(limit, MAX_LIMIT))
+    stmt = (
+        select(FS.id, FS.submitted_at, FS.form_id, F.title_en, FS.lang_code, PS.patient_phone_e164)
+        .join(F, F.id == FS.form_id)
+        .join(PS, PS.id == FS.session_id)
+        .where(FS.clinic_id == clinic_id, FS.flagged.is_(True))
+        .order_by(FS.submitted_at.desc(), FS.id.desc())
+        .limit(limit + 1)  # one extra row says whether there is a next page
+    )
+    if cursor:
+        stmt = stmt.where(tuple_(FS.submitted_at, FS.id) < tuple_(*decode_cursor(cursor)))
+    rows = db.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    ids = [r.id for r in rows]
+
+    answers: dict[int, list] = defaultdict(list)
+    redflags: dict[int, list] = defaultdict(list)
+    if ids:
+        for sub_id, q_key, q_id, opt_key in db.execute(
+            select(A.submission_id, Q.question_key, Q.id, A.option_key)
+            .join(Q, Q.id == A.question_id)
+            .where(
+                A.submission_id.in_(ids),
+                A.submitted_at.between(rows[-1].submitted_at, rows[0].submitted_at),
+            )
+            .order_by(A.submission_id, Q.order_idx, A.id)
+        ):
+            answers[sub_id].append({"q": q_key or f"q{q_id}", "o": opt_key})
+        for sub_id, rf_id, rf_slug, rf_name in db.execute(
+            select(SRF.submission_id, RF.id, RF.slug, RF.name_en)
+            .join(RF, RF.id == SRF.redflag_id)
+            .where(SRF.submission_id.in_(ids))
+            .order_by(SRF.submission_id, SRF.id)
+        ):
+            redflags[sub_id].append({"id": rf_id, "slug": rf_slug, "name": rf_name})
+
+    items = [
+        {
+            "id": r.id,
+            "submitted_at": r.submitted_at.isoformat(),
+            "form_id": r.form_id,
+            "form_title": r.title_en,
+            "lang": r.lang_code,
+            "phone": r.patient_phone_e164,  # the doctor calls the patient back
+            "redflags": redflags[r.id],
+            "answers": answers[r.id],
+        }
+        for r in rows
+    ]
+    next_cursor = encode_cursor(rows[-1].submitted_at, rows[-1].id) if has_more else None
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,24 @@
+# app/services/doctor_auth.py
+"""
+Doctor access to clinic data (dashboard).  Doctors send
+`Authorization: Bearer <token>` with a token from
+`python -m app.scripts.doctor_token`; it names the user and their clinic
+and is checked by HMAC alone, so polling the dashboard costs no user lookup.
+"""
+
+from fastapi import HTTPException, Request, status
+
+from app.services.session_tokens import DoctorClaims, InvalidSessionToken, verify_doctor
+
+
+async def require_doctor(request: Request) -> DoctorClaims:
+    """FastAPI dependency: the caller's claims, 401 without a valid doctor token."""
+    auth = request.headers.get("authorization", "")
+    if not auth.lower().startswith("bearer "):
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Doctor token required",
+                            headers={"WWW-Authenticate": "Bearer"})
+    try:
+        return verify_doctor(auth[7:].strip())
+    except InvalidSessionToken as exc:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, str(exc),
+                            headers={"WWW-Authenticate": "Bearer"}) from None
@@ -0,0 +1,167 @@
+# app/services/exports.py
+"""
+Streaming exports of submissions with their answers and red flags.
+
+Memory stays flat whatever the size of the export: two server-side
+cursors (yield_per) are read side by side, both ordered by submission id:
+
+    submissions ⟕ submission_redflags ⟕ redflags   one row per (submission, flag)
+    answers ⋈ questions                            one row per answer
+
+and merged one submission at a time, so at most one submission's rows
+plus one `yield_per` batch per cursor are held.  Output is produced in
+~64 KiB chunks, optionally gzip-compressed as it goes.
+
+Formats
+  ndjson  {"submission_id", "submitted_at", "clinic_id", "form_id",
+           "form_version_id" (the version the patient answered), "lang",
+           "redflags": [slug, ...], "answers": {question_key: [option_key, ...]}}
+  csv     same fields; redflags "|"-joined, answers as a JSON object
+"""
+
+import csv
+import io
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+FS, SRF, RF = models.FormSubmission, models.SubmissionRedFlag, models.RedFlag
+A, Q = models.Answer, models.Question
+
+FORMATS = ("csv", "ndjson")
+CSV_FIELDS = (
+    "submission_id", "submitted_at", "clinic_id", "form_id", "form_version_id",
+    "lang", "redflags", "answers",
+)
+CHUNK_BYTES = 64 * 1024
+YIELD_PER = 1000
+
+
+@dataclass(frozen=True)
+class ExportFilter:
+    clinic_id: int | None = None
+    form_id: int | None = None
+    start: datetime | None = None   # submitted_at >= start
+    end: datetime | None = None     # submitted_at <  end
+
+    def where(self) -> list:
+        cond = []
+        if self.clinic_id is not None:
+            cond.append(FS.clinic_id == self.clinic_id)
+        if self.form_id is not None:
+            cond.append(FS.form_id == self.form_id)
+        if self.start is not None:
+            cond.append(FS.submitted_at >= self.start)
+        if self.end is not None:
+            cond.append(FS.submitted_at < self.end)
+        return cond
+
+    def answer_where(self) -> list:
+        """where() plus the same bounds on answers' own partition key."""
+        cond = self.where()
+        if self.start is not None:
+            cond.append(A.submitted_at >= self.start)
+        if self.end is not None:
+            cond.append(A.submitted_at < self.end)
+        return cond
+
+
+def iter_submissions(db: Session, flt: ExportFilter, yield_per: int = YIELD_PER) -> Iterator[dict]:
+    """One dict per submission, in id order, merged from the two cursors."""
+    subs = db.execute(
+        select(FS.id, FS.submitted_at, FS.clinic_id, FS.form_id, FS.form_version_id, FS.lang_code, RF.slug)
+        .outerjoin(SRF, SRF.submission_id == FS.id)
+        .outerjoin(RF, RF.id == SRF.redflag_id)
+        .where(*flt.where())
+        .order_by(FS.id, SRF.id)
+        .execution_options(yield_per=yield_per)
+    )
+    answers = db.execute(
+        select(A.submission_id, Q.question_key, Q.id, A.option_key)
+        .join(FS, (FS.id == A.submission_id) & (FS.submitted_at == A.submitted_at))
+        .join(Q, Q.id == A.question_id)
+        .where(*flt.answer_where())
+        .order_by(A.submission_id, A.id)
+        .execution_options(yield_per=yield_per)
+    )
+
+    ans = next(answers, None)
+    current = None
+    for sub_id, ts, clinic_id, form_id, version_id, lang, rf_slug in subs:
+        if current is not None and current["submission_id"] != sub_id:
+            yield current
+            current = None
+        if current is None:
+            current = {
+                "submission_id": sub_id,
+                "submitted_at": ts.isoformat(),
+                "clinic_id": clinic_id,
+                "form_id": form_id,
+                "form_version_id": version_id,
+                "lang": lang,
+                "redflags": [],
+                "answers": {},
+            }
+            # both cursors filter the same submissions, so answers never run ahead
+            while ans is not None and ans[0] <= sub_id:
+                if ans[0] == sub_id:
+                    key = ans[1] or f"q{ans[2]}"
+                    current["answers"].setdefault(key, []).append(ans[3])
+                ans = next(answers, None)
+        if rf_slug is not None:
+            current["redflags"].append(rf_slug)
+    if current is not None:
+        yield current
+
+
+def _encode(rows: Iterator[dict], fmt: str) -> Iterator[str]:
+    if fmt == "ndjson":
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n"
+        return
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_FIELDS)
+    # on its own: an export matching nothing is still a valid CSV
+    yield buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    for row in rows:
+        writer.writerow((
+            row["submission_id"], row["submitted_at"], row["clinic_id"], row["form_id"],
+            row["form_version_id"], row["lang"], "|".join(row["redflags"]),
+            json.dumps(row["answers"], ensure_ascii=False, separators=(",", ":")),
+        ))
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+
+
+def export_chunks(db: Session, flt: ExportFilter, fmt: str, gzip: bool = False) -> Iterator[bytes]:
+    """The export as ~CHUNK_BYTES byte chunks (gzip members if `gzip`)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r} (one of {FORMATS})")
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None  # wbits 31 = gzip framing
+    pending: list[bytes] = []
+    size = 0
+    for text in _encode(iter_submissions(db, flt), fmt):
+        data = text.encode()
+        if gz is not None:
+            data = gz.compress(data)
+        if data:
+            pending.append(data)
+            size += len(data)
+        if size >= CHUNK_BYTES:
+            yield b"".join(pending)
+            pending, size = [], 0
+    if gz is not None:
+        pending.append(gz.flush())
+    if pending:
+        yield b"".join(pending)
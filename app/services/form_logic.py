@@ -2,85 +2,241 @@
 """
 Shared logic for loading a form + evaluating answers against red-flag rules.
 This MVP version covers:
-• fetch-by-slug
+• fetch-by-slug (the active version) or by version id
 • localisation of questions/options
-• evaluate() → list[RedFlag]   (empty list if none)
+• evaluate() → list[RedFlagRef]   (empty list if none)
+• evaluate_options() – same, keyed by option ids (JSON API)
+
+A FormPack is compiled once from the ORM graph and then holds no ORM
+objects at all: small frozen __slots__ records, so a cached form costs no
+identity-map state or relationship collections, can't fire a lazy load,
+and can be shared by every request and thread of a worker.  Localised
+text lives in per-language interned tables (string_tables); questions and
+options only keep an index per language.
 """
 
-from typing import Dict, List
-from sqlalchemy.orm import Session, joinedload
+import sys
+from typing import Dict, Iterable, List, Mapping, Tuple
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.db import form_versions, models
+from app.services.metrics import timed
+from app.services.string_tables import table
+
+# compiled-form budget for the reference form (30 questions × 4 options × 3
+# languages, 8 red flags), excluding the shared string tables – checked by
+# benchmarks/bench_form.py
+MEMORY_TARGET_BYTES = 64 * 1024
+
+
+class _Frozen:
+    """Base for the immutable records below – attributes are set once in __init__."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{s}={getattr(self, s)!r}" for s in self.__slots__[:3])
+        return f"{type(self).__name__}({fields}, …)"
+
+
+_set = object.__setattr__
+
+
+class FormMeta(_Frozen):
+    # id is the form's, version_id the (immutable) FormVersion it was compiled from
+    __slots__ = ("id", "slug", "version", "title_en", "description_en", "version_id")
+
+    def __init__(
+        self, id: int, slug: str, version: str, title_en: str,
+        description_en: str | None = None, version_id: int | None = None,
+    ):
+        _set(self, "id", id)
+        _set(self, "slug", slug)
+        _set(self, "version", version)
+        _set(self, "title_en", title_en)
+        _set(self, "description_en", description_en)
+        _set(self, "version_id", version_id)
+
+
+class RedFlagRef(_Frozen):
+    __slots__ = ("id", "slug", "name_en")
+
+    def __init__(self, id: int, slug: str, name_en: str):
+        _set(self, "id", id)
+        _set(self, "slug", slug)
+        _set(self, "name_en", name_en)
+
+    def __eq__(self, other):
+        return isinstance(other, RedFlagRef) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class OptionItem(_Frozen):
+    # texts: string-table indices aligned with FormPack.langs (NO_TEXT = not translated)
+    __slots__ = ("id", "option_key", "order_idx", "is_redflag", "redflag", "texts")
+
+    def __init__(self, id, option_key, order_idx, is_redflag, redflag, texts):
+        _set(self, "id", id)
+        _set(self, "option_key", option_key)
+        _set(self, "order_idx", order_idx)
+        _set(self, "is_redflag", is_redflag)
+        _set(self, "redflag", redflag)
+        _set(self, "texts", texts)
+
+
+class QuestionItem(_Frozen):
+    __slots__ = ("id", "question_key", "order_idx", "input_type", "texts", "options")
 
-from app.db import models
+    def __init__(self, id, question_key, order_idx, input_type, texts, options):
+        _set(self, "id", id)
+        _set(self, "question_key", question_key)
+        _set(self, "order_idx", order_idx)
+        _set(self, "input_type", input_type)
+        _set(self, "texts", texts)
+        _set(self, "options", options)
 
 
-class FormPack:
-    """Bundle of metadata, questions, and rules for a single form."""
+def _texts(localisations, langs: Tuple[str, ...]) -> Tuple[int, ...]:
+    by_lang = {l.lang_code: l.text for l in localisations}
+    return tuple(table(l).intern(by_lang.get(l)) for l in langs)
 
-    def __init__(self, meta: models.Form, questions: list[models.Question]):
-        self.meta = meta
-        self.questions = questions
 
-        # Build quick look-ups
-        self.q_by_key = {q.question_key: q for q in questions}
-        self.rule_lookup: Dict[str, models.RedFlag | None] = {}
+class FormPack(_Frozen):
+    """Compiled, immutable bundle of metadata, questions and rules for one form."""
 
+    __slots__ = ("meta", "langs", "questions", "rule_lookup", "rule_by_option_id")
+
+    def __init__(self, meta: FormMeta, langs: tuple, questions: tuple):
+        _set(self, "meta", meta)
+        _set(self, "langs", langs)
+        _set(self, "questions", questions)
+
+        # Build quick look-ups.  Answers arrive keyed by question_key (API /
+        # older pages) or by the field name form.html renders, "q<id>".
+        rule_lookup: Dict[Tuple[str, str], RedFlagRef] = {}
+        rule_by_option_id: Dict[int, RedFlagRef | None] = {}
         for q in questions:
-            for opt in q.options:  # option relationship set below
-                key = f"{q.question_key}:{opt.option_key}"
-                self.rule_lookup[key] = opt.redflag  # may be None
+            for opt in q.options:
+                rule_by_option_id[opt.id] = opt.redflag  # may be None
+                if opt.redflag is not None:
+                    rule_lookup[(f"q{q.id}", opt.option_key)] = opt.redflag
+                    if q.question_key:
+                        rule_lookup[(q.question_key, opt.option_key)] = opt.redflag
+        _set(self, "rule_lookup", rule_lookup)
+        _set(self, "rule_by_option_id", rule_by_option_id)
 
     # --------------------------------------------------------------------- #
     # Static constructors
     # --------------------------------------------------------------------- #
     @staticmethod
-    def by_slug(db: Session, slug: str) -> "FormPack":
-        meta: models.Form = (
-            db.query(models.Form)
-            .filter(models.Form.slug == slug, models.Form.is_active.is_(True))
+    def from_orm(fv: models.FormVersion) -> "FormPack":
+        questions = sorted(fv.questions, key=lambda q: q.order_idx)
+        langs = tuple(sorted(
+            {l.lang_code for q in questions for l in q.localisations}
+            | {l.lang_code for q in questions for o in q.options for l in o.localisations}
+        ))
+        redflags: Dict[int, RedFlagRef] = {}
+
+        def rf_ref(rf: models.RedFlag | None) -> RedFlagRef | None:
+            if rf is None:
+                return None
+            if rf.id not in redflags:
+                redflags[rf.id] = RedFlagRef(rf.id, rf.slug, rf.name_en)
+            return redflags[rf.id]
+
+        compiled = tuple(
+            QuestionItem(
+                q.id,
+                q.question_key,
+                q.order_idx,
+                q.input_type.value,
+                _texts(q.localisations, langs),
+                tuple(
+                    OptionItem(
+                        o.id, sys.intern(o.option_key), o.order_idx, bool(o.is_redflag),
+                        rf_ref(o.redflag), _texts(o.localisations, langs),
+                    )
+                    for o in sorted(q.options, key=lambda o: o.order_idx)
+                ),
+            )
+            for q in questions
+        )
+        meta = FormMeta(
+            fv.form_id, fv.form.slug, fv.version, fv.title_en, fv.description_en, fv.id,
+        )
+        return FormPack(meta, langs, compiled)
+
+    @staticmethod
+    @timed("form_by_version")
+    def by_version(db: Session, version_id: int) -> "FormPack":
+        fv: models.FormVersion = (
+            db.query(models.FormVersion)
+            .filter(models.FormVersion.id == version_id)
             .options(
-                joinedload(models.Form.questions)
+                joinedload(models.FormVersion.form),
+                joinedload(models.FormVersion.questions)
+                .joinedload(models.Question.options)
+                .joinedload(models.Option.redflag),
+                # localisations too – lazy-loading them in localised() was N+1
+                joinedload(models.FormVersion.questions)
+                .selectinload(models.Question.localisations),
+                joinedload(models.FormVersion.questions)
                 .joinedload(models.Question.options)
-                .joinedload(models.Option.redflag)
+                .selectinload(models.Option.localisations),
             )
             .one_or_none()
         )
-        if meta is None:
-            raise ValueError(f"Form slug '{slug}' not found")
+        if fv is None:
+            raise ValueError(f"Form version {version_id} not found")
 
-        return FormPack(meta, meta.questions)
+        return FormPack.from_orm(fv)
+
+    @staticmethod
+    @timed("form_by_slug")
+    def by_slug(db: Session, slug: str) -> "FormPack":
+        """The form's active version."""
+        return FormPack.by_version(db, form_versions.resolve(db, slug))
 
     # --------------------------------------------------------------------- #
     # Localisation helpers
     # --------------------------------------------------------------------- #
+    @timed("form_localised")
     def localised(self, lang: str = "EN") -> list[dict]:
         """
-        Returns a list of dicts → [{ text, question_key, options:[{text, option_key}] }]
+        Returns a list of dicts →
+        [{ id, text, question_key, input_type, options:[{id, text, option_key}] }]
         """
+        if lang in self.langs:
+            li, text = self.langs.index(lang), table(lang).get
+        else:
+            li, text = None, None
         out = []
-        for q in sorted(self.questions, key=lambda x: x.order_idx):
-            qloc = next(
-                (l for l in q.localisations if l.lang_code == lang), None
-            )
-            q_text = qloc.text if qloc else q.question_key  # fallback
-
-            opts = []
-            for opt in sorted(q.options, key=lambda x: x.order_idx):
-                oloc = next(
-                    (l for l in opt.localisations if l.lang_code == lang), None
-                )
-                opt_text = oloc.text if oloc else opt.option_key
-                opts.append(
-                    {
-                        "option_key": opt.option_key,
-                        "text": opt_text,
-                        "is_redflag": opt.is_redflag,
-                    }
-                )
-
+        for q in self.questions:  # already in order_idx order
+            q_text = text(q.texts[li]) if li is not None else None
+            opts = [
+                {
+                    "id": opt.id,
+                    "order_idx": opt.order_idx,
+                    "option_key": opt.option_key,
+                    "text": (text(opt.texts[li]) if li is not None else None) or opt.option_key,
+                    "is_redflag": opt.is_redflag,
+                }
+                for opt in q.options
+            ]
             out.append(
                 {
+                    "id": q.id,
                     "question_key": q.question_key,
-                    "text": q_text,
+                    "input_type": q.input_type,
+                    "text": q_text or q.question_key,  # fallback
                     "options": opts,
                 }
             )
@@ -89,11 +245,28 @@ class FormPack:
     # --------------------------------------------------------------------- #
     # Evaluation
     # --------------------------------------------------------------------- #
-    def evaluate(self, answers: Dict[str, str]) -> List[models.RedFlag]:
-        """answers = {question_key: option_key}"""
-        triggered: list[models.RedFlag] = []
-        for q_key, opt_key in answers.items():
-            rf = self.rule_lookup.get(f"{q_key}:{opt_key}")
+    @timed("form_evaluate")
+    def evaluate(
+        self, answers: Mapping[str, str] | Iterable[Tuple[str, str]]
+    ) -> List[RedFlagRef]:
+        """
+        answers = {question_key | "q<id>": option_key}, or (field, value)
+        pairs so checkbox groups ("q<id>[]", several values) count every box.
+        """
+        pairs = answers.items() if isinstance(answers, Mapping) else answers
+        triggered: list[RedFlagRef] = []
+        for field, opt_key in pairs:
+            rf = self.rule_lookup.get((field.removesuffix("[]"), opt_key))
+            if rf is not None and rf not in triggered:
+                triggered.append(rf)
+        return triggered
+
+    @timed("form_evaluate")
+    def evaluate_options(self, option_ids: Iterable[int]) -> List[RedFlagRef]:
+        """option_ids = ids of every option the patient picked"""
+        triggered: list[RedFlagRef] = []
+        for opt_id in option_ids:
+            rf = self.rule_by_option_id.get(opt_id)
             if rf is not None and rf not in triggered:
                 triggered.append(rf)
-        return triggered
\ No newline at end of file
+        return triggered
@@ -0,0 +1,522 @@
+# app/services/form_store.py
+"""
+Read-only, cross-worker form store in a memory-mapped file.
+
+A loader (app/scripts/build_form_store.py, or the importer after a run)
+compiles every form's active version into one flat binary segment and atomically
+renames it into place – ideally under /dev/shm.  Each worker mmaps the
+file read-only, so all workers on a host share the same physical pages;
+localised text is decoded straight from the buffer on each request.  A
+worker keeps only one small object per form and segment: its header, and
+its answer rules (field / option → red flag), decoded on first evaluate.
+
+A segment that can't be read (truncated, or left by a loader of another
+format) is logged and ignored: forms are served from the DB until the
+loader writes a good one.
+
+Layout (little-endian, offsets from file start):
+
+  header   8s magic | u32 format | u32 n_forms | u64 generation
+           | u32 strtab_off | u32 n_strings | u32 index_off
+  strtab   u32 offsets[n_strings + 1] (relative to blob) | utf-8 blob
+  index    n_forms × (u32 slug_sid, u32 form_off)
+  form     u32 id | u32 version_id | u32 slug | u32 version | u32 title | u16 n_langs
+           | u16 n_questions | u16 n_redflags
+           | u32 lang_sid[n_langs]
+           | n_redflags × (u32 id, u32 slug, u32 name_en)
+           | n_questions × question
+  question u32 id | u32 key | u16 order_idx | u8 input_type | u16 n_options
+           | u32 text_sid[n_langs]
+           | n_options × (u32 id | u32 key | u16 order_idx | u8 is_redflag
+                          | u32 redflag_id | u32 text_sid[n_langs])
+
+Strings are stored once per segment, so "Yes"/"No" and friends cost one
+copy for the whole corpus.  NONE (0xFFFFFFFF) marks a missing string.
+
+Compiled forms are keyed by FormVersion id.  Versions are immutable, so
+those entries are never invalidated; a "form" invalidation on the cache
+bus only drops the slug → active version mapping (and marks the slug
+stale in the segment).  Requests still holding the previous version keep
+using it, and pages rendered from it submit against it.
+"""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.db import form_versions, models
+from app.db.executor import db_executor
+from app.db.session import SessionLocal
+from app.services import cache_bus
+from app.services.form_logic import FormMeta, FormPack, RedFlagRef
+from app.services.local_cache import MISSING, VersionedCache
+from app.services.metrics import timed
+from app.services.singleflight import SingleFlight
+from app.settings import form_store_cfg
+
+log = logging.getLogger("form_store")
+
+MAGIC = b"RFAFORM1"
+FORMAT = 2
+NONE = 0xFFFFFFFF
+
+HEADER = struct.Struct("<8sIIQIII")
+INDEX = struct.Struct("<II")
+FORM = struct.Struct("<IIIIIHHH")
+REDFLAG = struct.Struct("<III")
+QUESTION = struct.Struct("<IIHBH")
+OPTION = struct.Struct("<IIHBI")
+U32 = struct.Struct("<I")
+
+INPUT_TYPES = [t.value for t in models.InputType]
+
+
+# --------------------------------------------------------------------- #
+# Writer
+# --------------------------------------------------------------------- #
+class _Strings:
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.items: list[bytes] = []
+
+    def __call__(self, s: str | None) -> int:
+        if s is None:
+            return NONE
+        sid = self.ids.get(s)
+        if sid is None:
+            sid = self.ids[s] = len(self.items)
+            self.items.append(s.encode())
+        return sid
+
+
+def _load_all(db: Session) -> list[models.FormVersion]:
+    """The active version of every active form."""
+    FV = models.FormVersion
+    return (
+        db.query(FV)
+        .join(models.Form, models.Form.active_version_id == FV.id)
+        .filter(models.Form.is_active.is_(True))
+        .options(
+            joinedload(FV.form),
+            joinedload(FV.questions)
+            .joinedload(models.Question.options)
+            .joinedload(models.Option.redflag),
+            joinedload(FV.questions).selectinload(models.Question.localisations),
+            joinedload(FV.questions)
+            .joinedload(models.Question.options)
+            .selectinload(models.Option.localisations),
+        )
+        .order_by(models.Form.slug)
+        .all()
+    )
+
+
+def _encode_form(fv: models.FormVersion, sid: _Strings) -> bytes:
+    questions = sorted(fv.questions, key=lambda q: q.order_idx)
+    langs = sorted(
+        {l.lang_code for q in questions for l in q.localisations}
+        | {l.lang_code for q in questions for o in q.options for l in o.localisations}
+    )
+    redflags = {o.redflag.id: o.redflag for q in questions for o in q.options if o.redflag}
+
+    out = bytearray(FORM.pack(
+        fv.form_id, fv.id, sid(fv.form.slug), sid(fv.version), sid(fv.title_en),
+        len(langs), len(questions), len(redflags),
+    ))
+    for l in langs:
+        out += U32.pack(sid(l))
+    for rf in redflags.values():
+        out += REDFLAG.pack(rf.id, sid(rf.slug), sid(rf.name_en))
+
+    def texts(locs) -> bytes:
+        by_lang = {l.lang_code: l.text for l in locs}
+        return b"".join(U32.pack(sid(by_lang.get(l))) for l in langs)
+
+    for q in questions:
+        options = sorted(q.options, key=lambda o: o.order_idx)
+        out += QUESTION.pack(
+            q.id, sid(q.question_key), q.order_idx,
+            INPUT_TYPES.index(q.input_type.value), len(options),
+        )
+        out += texts(q.localisations)
+        for o in options:
+            out += OPTION.pack(o.id, sid(o.option_key), o.order_idx, o.is_redflag, o.redflag_id or 0)
+            out += texts(o.localisations)
+    return bytes(out)
+
+
+def build_segment(db: Session, path: str | Path) -> int:
+    """Compile all active versions into `path` (atomic replace). Returns the generation."""
+    path = Path(path)
+    sid = _Strings()
+    compiled = [(sid(fv.form.slug), _encode_form(fv, sid)) for fv in _load_all(db)]
+
+    generation = time.time_ns()
+    offsets = [0]
+    for b in sid.items:
+        offsets.append(offsets[-1] + len(b))
+    strtab = struct.pack(f"<{len(offsets)}I", *offsets) + b"".join(sid.items)
+
+    strtab_off = HEADER.size
+    index_off = strtab_off + len(strtab)
+    body = bytearray()
+    index = bytearray()
+    cursor = index_off + INDEX.size * len(compiled)
+    for slug_sid, blob in compiled:
+        index += INDEX.pack(slug_sid, cursor + len(body))
+        body += blob
+
+    header = HEADER.pack(MAGIC, FORMAT, len(compiled), generation, strtab_off, len(sid.items), index_off)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(header + strtab + index + body)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)  # readers keep their old mapping until they re-open
+    return generation
+
+
+# --------------------------------------------------------------------- #
+# Reader
+# --------------------------------------------------------------------- #
+class Segment:
+    def __init__(self, path: Path):
+        with open(path, "rb") as fh:
+            self.buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self.stat = os.stat(path)
+        magic, fmt, n_forms, self.generation, self.strtab_off, n_strings, index_off = (
+            HEADER.unpack_from(self.buf, 0)
+        )
+        if magic != MAGIC or fmt != FORMAT:
+            raise ValueError(f"{path} is not a form store segment (format {FORMAT})")
+        self.blob_off = self.strtab_off + 4 * (n_strings + 1)
+        self._forms: dict[int, SharedForm] = {}  # offset → decoded header + rules
+        # slug / version id → offset are the only per-worker structures (one entry per form)
+        self.index: dict[str, int] = {}
+        self.by_version: dict[int, int] = {}
+        for i in range(n_forms):
+            slug_sid, form_off = INDEX.unpack_from(self.buf, index_off + i * INDEX.size)
+            self.index[self.str(slug_sid)] = form_off
+            self.by_version[FORM.unpack_from(self.buf, form_off)[1]] = form_off
+
+    def str(self, sid: int) -> str | None:
+        if sid == NONE:
+            return None
+        a, b = struct.unpack_from("<II", self.buf, self.strtab_off + 4 * sid)
+        return str(self.buf[self.blob_off + a: self.blob_off + b], "utf-8")
+
+    def _shared(self, off: int | None) -> "SharedForm | None":
+        if off is None:
+            return None
+        form = self._forms.get(off)
+        if form is None:
+            form = self._forms[off] = SharedForm(self, off)
+        return form
+
+    def form(self, slug: str) -> "SharedForm | None":
+        return self._shared(self.index.get(slug))
+
+    def version(self, version_id: int) -> "SharedForm | None":
+        return self._shared(self.by_version.get(version_id))
+
+
+class SharedForm:
+    """FormPack look-alike decoding straight from the mapped segment."""
+
+    __slots__ = ("seg", "off", "meta", "langs", "redflags", "n_questions", "q_off",
+                 "_by_field", "_by_option")
+
+    def __init__(self, seg: Segment, off: int):
+        self.seg = seg
+        self.off = off
+        fid, vid, slug, version, title, n_langs, n_q, n_rf = FORM.unpack_from(seg.buf, off)
+        self.meta = FormMeta(fid, seg.str(slug), seg.str(version), seg.str(title), version_id=vid)
+        pos = off + FORM.size
+        self.langs = [seg.str(s) for s in struct.unpack_from(f"<{n_langs}I", seg.buf, pos)]
+        pos += 4 * n_langs
+        self.redflags: dict[int, RedFlagRef] = {}
+        for _ in range(n_rf):
+            rid, rslug, rname = REDFLAG.unpack_from(seg.buf, pos)
+            self.redflags[rid] = RedFlagRef(rid, seg.str(rslug), seg.str(rname))
+            pos += REDFLAG.size
+        self.n_questions = n_q
+        self.q_off = pos
+        self._by_field: dict[tuple[str, str], RedFlagRef] | None = None
+        self._by_option: dict[int, RedFlagRef | None] | None = None
+
+    def _walk(self):
+        """Yield (question tuple, q text sids, [(option tuple, o text sids)])."""
+        buf, n_langs = self.seg.buf, len(self.langs)
+        texts = struct.Struct(f"<{n_langs}I")
+        pos = self.q_off
+        for _ in range(self.n_questions):
+            q = QUESTION.unpack_from(buf, pos)
+            pos += QUESTION.size
+            q_texts = texts.unpack_from(buf, pos)
+            pos += texts.size
+            opts = []
+            for _ in range(q[4]):
+                o = OPTION.unpack_from(buf, pos)
+                pos += OPTION.size
+                opts.append((o, texts.unpack_from(buf, pos)))
+                pos += texts.size
+            yield q, q_texts, opts
+
+    @timed("form_localised")
+    def localised(self, lang: str = "EN") -> list[dict]:
+        s = self.seg.str
+        li = self.langs.index(lang) if lang in self.langs else None
+        out = []
+        for (qid, qkey, qorder, itype, _), q_texts, opts in self._walk():
+            q_key = s(qkey)
+            q_text = s(q_texts[li]) if li is not None else None
+            out.append(
+                {
+                    "id": qid,
+                    "question_key": q_key,
+                    "input_type": INPUT_TYPES[itype],
+                    "text": q_text or q_key,
+                    "options": [
+                        {
+                            "id": oid,
+                            "order_idx": oorder,
+                            "option_key": s(okey),
+                            "text": (s(o_texts[li]) if li is not None else None) or s(okey),
+                            "is_redflag": bool(is_rf),
+                        }
+                        for (oid, okey, oorder, is_rf, _), o_texts in opts
+                    ],
+                }
+            )
+        return out
+
+    def _decode_rules(self) -> None:
+        # one walk for both tables; the segment is immutable, so once is enough
+        s = self.seg.str
+        by_field, by_option = {}, {}
+        for (qid, qkey, _, _, _), _, opts in self._walk():
+            for (oid, okey, _, _, rf_id), _ in opts:
+                by_option[oid] = self.redflags.get(rf_id)
+                if rf_id:
+                    by_field[(f"q{qid}", s(okey))] = self.redflags[rf_id]
+                    by_field[(s(qkey), s(okey))] = self.redflags[rf_id]
+        self._by_field, self._by_option = by_field, by_option
+
+    @property
+    def rule_by_option_id(self) -> Dict[int, RedFlagRef | None]:
+        if self._by_option is None:
+            self._decode_rules()
+        return self._by_option
+
+    @timed("form_evaluate")
+    def evaluate(
+        self, answers: Mapping[str, str] | Iterable[Tuple[str, str]]
+    ) -> List[RedFlagRef]:
+        """Same answer shapes as FormPack.evaluate."""
+        if self._by_field is None:
+            self._decode_rules()
+        rules = self._by_field
+        pairs = answers.items() if isinstance(answers, Mapping) else answers
+        triggered: list[RedFlagRef] = []
+        for field, opt_key in pairs:
+            rf = rules.get((field.removesuffix("[]"), opt_key))
+            if rf is not None and rf not in triggered:
+                triggered.append(rf)
+        return triggered
+
+    @timed("form_evaluate")
+    def evaluate_options(self, option_ids: Iterable[int]) -> List[RedFlagRef]:
+        rules = self.rule_by_option_id
+        triggered: list[RedFlagRef] = []
+        for opt_id in option_ids:
+            rf = rules.get(opt_id)
+            if rf is not None and rf not in triggered:
+                triggered.append(rf)
+        return triggered
+
+
+class SharedFormStore:
+    """Keeps the current Segment mapped; re-maps when the loader replaces the file."""
+
+    def __init__(self, path: str | Path, check_interval: float = 1.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.segment: Segment | None = None
+        self._next_check = 0.0
+        self._bad: tuple | None = None  # (inode, mtime) of a file that failed to map
+        # slug → generation that was current when the slug was invalidated;
+        # the slug is served from the DB until the loader writes a newer segment
+        self.stale: dict[str, int] = {}
+
+    def current(self) -> Segment | None:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self.segment = None
+                return None
+            seg = self.segment
+            key = (st.st_ino, st.st_mtime_ns)
+            if (seg is None or key != (seg.stat.st_ino, seg.stat.st_mtime_ns)) and key != self._bad:
+                # the old mapping is released once no SharedForm refers to it
+                try:
+                    self.segment = Segment(self.path)
+                    self._bad = None
+                except (OSError, ValueError, struct.error):
+                    log.exception("unreadable form store %s; serving forms from the DB", self.path)
+                    self.segment, self._bad = None, key
+        return self.segment
+
+    def mark_stale(self, slug: str) -> None:
+        seg = self.current()
+        if seg is not None:
+            self.stale[slug] = seg.generation
+
+    def form(self, slug: str) -> SharedForm | None:
+        """The slug's active version, unless invalidated since this segment was written."""
+        seg = self.current()
+        if seg is None:
+            return None
+        if slug in self.stale:
+            if self.stale[slug] == seg.generation:
+                return None
+            del self.stale[slug]
+        return seg.form(slug)
+
+    def version(self, version_id: int) -> SharedForm | None:
+        # versions are immutable: never stale
+        seg = self.current()
+        return None if seg is None else seg.version(version_id)
+
+
+_store: SharedFormStore | None = None
+
+# DB-loaded forms, per worker (used when there is no shared segment or it
+# lacks the version):  version id → FormPack, never invalidated
+forms = VersionedCache("forms", max_entries=256)
+form_loads = SingleFlight("forms")
+# slug → active version id (dropped on a "form" invalidation), and
+# (slug, version label) → version id (published labels never move)
+active = VersionedCache("form_active", max_entries=1024)
+active_loads = SingleFlight("form_active")
+labels = VersionedCache("form_labels", max_entries=1024)
+
+
+def shared_store() -> SharedFormStore | None:
+    global _store
+    cfg = form_store_cfg()
+    if not cfg["path"]:
+        return None
+    if _store is None:
+        _store = SharedFormStore(cfg["path"], cfg["check_interval"])
+    return _store
+
+
+@cache_bus.on("form")
+def _invalidate(slug: str, version: int) -> None:
+    if active.invalidate(slug, version):
+        store = shared_store()
+        if store is not None:
+            store.mark_stale(slug)
+
+
+@cache_bus.on_reset
+def _reset() -> None:
+    active.clear()
+
+
+def get_version(db: Session, version_id: int) -> SharedForm | FormPack:
+    store = shared_store()
+    if store is not None:
+        form = store.version(version_id)
+        if form is not None:
+            return form
+    return forms.get_or_load(version_id, lambda: FormPack.by_version(db, version_id))
+
+
+def get_form(db: Session, slug: str) -> SharedForm | FormPack:
+    """The active version: shared segment, then this worker's caches, then the DB (ValueError if unknown)."""
+    store = shared_store()
+    if store is not None:
+        form = store.form(slug)
+        if form is not None:
+            return form
+    vid = active.get_or_load(slug, lambda: form_versions.resolve(db, slug))
+    return get_version(db, vid)
+
+
+# own sessions: a load may outlive the request that started it
+def _load_detached(version_id: int) -> FormPack:
+    with SessionLocal() as db:
+        return FormPack.by_version(db, version_id)
+
+
+def _resolve_detached(slug: str, version: str | None) -> int:
+    with SessionLocal() as db:
+        return form_versions.resolve(db, slug, version)
+
+
+async def aget_version(version_id: int) -> SharedForm | FormPack:
+    """A compiled version by id; concurrent misses share a single DB load off the event loop."""
+    store = shared_store()
+    if store is not None:
+        form = store.version(version_id)
+        if form is not None:
+            return form
+    fp = forms.get(version_id)
+    if fp is not MISSING:
+        return fp
+
+    async def load() -> FormPack:
+        token = forms.begin_load(version_id)
+        fp = await db_executor.run(_load_detached, version_id)
+        forms.put(version_id, fp, token)
+        return fp
+
+    return await form_loads.do(version_id, load)
+
+
+async def aget_form(slug: str, version_id: int | None = None) -> SharedForm | FormPack:
+    """
+    get_form() for async handlers.  With `version_id` (a page rendered from
+    that version submitting back) that version, provided it is one of `slug`'s.
+    """
+    if version_id is not None:
+        fp = await aget_version(version_id)
+        if fp.meta.slug != slug:
+            raise ValueError(f"Form version {version_id} is not a version of '{slug}'")
+        return fp
+    store = shared_store()
+    if store is not None:
+        form = store.form(slug)
+        if form is not None:
+            return form
+    vid = active.get(slug)
+    if vid is MISSING:
+        async def load() -> int:
+            token = active.begin_load(slug)
+            vid = await db_executor.run(_resolve_detached, slug, None)
+            active.put(slug, vid, token)
+            return vid
+
+        vid = await active_loads.do(slug, load)
+    return await aget_version(vid)
+
+
+async def aget_form_version(slug: str, version: str) -> SharedForm | FormPack:
+    """A published version by its label – what the immutable JSON URLs name."""
+    vid = labels.get((slug, version))
+    if vid is MISSING:
+        vid = await db_executor.run(_resolve_detached, slug, version)
+        labels.put((slug, version), vid, 0)
+    return await aget_version(vid)
@@ -0,0 +1,75 @@
+# app/services/idempotency.py
+"""
+Idempotent submit: a patient tapping Submit again gets the first result.
+
+The key is derived from what identifies one submission – session, form
+and phone – so it needs nothing from the page (the form page stays
+identical for every patient and can be memoised).  It lives in the quota
+Redis next to the counters:
+
+    rfa:idem:<kind>:<hash>  =  PENDING           while the first submit runs  (pending_ttl)
+                            =  <response body>   once it succeeded            (ttl)
+
+claim() runs before anything else in the handler – before the body is
+parsed, the form evaluated or check_submit() spends quota – and returns
+the stored body for a repeat.  A repeat arriving while the first submit
+is still running waits for its result (up to `wait` seconds, then 409).
+If the first submit fails the key is released so a retry runs for real.
+"""
+
+import asyncio
+import hashlib
+import time
+
+from fastapi import HTTPException, status
+
+from app.services import quota
+from app.services.metrics import REGISTRY
+from app.settings import idempotency_cfg
+
+PENDING = "\x00pending"
+POLL_INTERVAL = 0.05
+
+replays = REGISTRY.counter(
+    "rfa_submit_replays_total", "Repeat submits answered from the idempotency cache", ("kind",),
+)
+
+
+def submit_key(kind: str, session_id: int, form_slug: str, phone: str) -> str:
+    """kind ("html" / "json") keeps the two submit endpoints' bodies apart."""
+    raw = f"{kind}|{session_id}|{form_slug}|{phone.strip()}".encode()
+    return f"rfa:idem:{kind}:" + hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+async def claim(key: str, kind: str) -> str | None:
+    """None → caller owns the submit (finish() or release() it); else the stored body."""
+    cfg = idempotency_cfg()
+    redis = quota.redis_client
+    if await redis.set(key, PENDING, ex=cfg["pending_ttl"], nx=True):
+        return None
+
+    deadline = time.monotonic() + cfg["wait"]
+    while True:
+        body = await redis.get(key)
+        if body is None:
+            # first attempt failed (released) or expired – try to take over
+            if await redis.set(key, PENDING, ex=cfg["pending_ttl"], nx=True):
+                return None
+        elif body != PENDING:
+            replays.inc((kind,))
+            return body
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status.HTTP_409_CONFLICT,
+                "This form is already being submitted",
+                headers={"Retry-After": "1"},
+            )
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+async def finish(key: str, body: str) -> None:
+    await quota.redis_client.set(key, body, ex=idempotency_cfg()["ttl"])
+
+
+async def release(key: str) -> None:
+    await quota.redis_client.delete(key)
@@ -0,0 +1,64 @@
+# app/services/local_cache.py
+"""
+Per-worker LRU caches whose entries are invalidated by version.
+
+Every key has a "seen" version – the highest invalidation version this
+worker has applied for it.  An invalidation carrying a version <= seen is
+stale (delivered late or twice) and ignored, so it can never roll a newer
+entry back.  A load records the seen version when it starts; if an
+invalidation lands while it is running, the result is returned to the
+caller but not cached.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+MISSING = object()
+
+
+class VersionedCache:
+    def __init__(self, name: str, max_entries: int = 512):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._seen: dict[Hashable, int] = {}
+
+    def get(self, key: Hashable) -> Any:
+        value = self._entries.get(key, MISSING)
+        if value is not MISSING:
+            self._entries.move_to_end(key)
+        return value
+
+    def begin_load(self, key: Hashable) -> int:
+        return self._seen.get(key, 0)
+
+    def put(self, key: Hashable, value: Any, loaded_at: int) -> bool:
+        if self._seen.get(key, 0) > loaded_at:
+            return False  # invalidated while loading – don't cache old data
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return True
+
+    def get_or_load(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is MISSING:
+            token = self.begin_load(key)
+            value = load()
+            self.put(key, value, token)
+        return value
+
+    def invalidate(self, key: Hashable, version: int) -> bool:
+        """Apply an invalidation; False if it is stale and was ignored."""
+        if version <= self._seen.get(key, 0):
+            return False
+        self._seen[key] = version
+        self._entries.pop(key, None)
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
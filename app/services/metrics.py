@@ -0,0 +1,406 @@
+# app/services/metrics.py
+"""
+In-process request / stage metrics, exposed in Prometheus text format.
+
+Hot path is lock-free: every series is a preallocated list of bucket
+counters bumped in place (asyncio runs handlers on one thread; the rare
+lost increment from a threadpool race is accepted over taking a lock).
+
+Multiple workers: when `[metrics] multiproc_dir` is set, each process
+dumps its registry to `<dir>/<pid>-<nonce>.json` from a background
+thread every `flush_interval` seconds, and /metrics sums every file in
+the directory.  The per-start nonce keeps a worker that got a dead
+worker's pid from overwriting its file.  Exited workers' counters are
+folded into `<dir>/_retired.json` and their files deleted, so counters
+stay monotonic while dead workers' gauges drop out.
+"""
+
+import fcntl
+import json
+import os
+import secrets
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from inspect import iscoroutinefunction
+from pathlib import Path
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+# ---------- primitives ----------------------------------------------
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Family:
+    """One metric name; series are keyed by a tuple of label values."""
+
+    def __init__(self, name: str, kind: str, help: str, labels: tuple, bounds: tuple = ()):
+        self.name = name
+        self.kind = kind            # "counter" | "gauge" | "histogram"
+        self.help = help
+        self.labels = labels
+        self.bounds = bounds
+        self.series: dict[tuple, Histogram | list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        h = self.series.get(labels)
+        if h is None:
+            h = self.series.setdefault(labels, Histogram(self.bounds))
+        h.observe(value)
+
+    def inc(self, labels: tuple, value: float = 1) -> None:
+        c = self.series.get(labels)
+        if c is None:
+            c = self.series.setdefault(labels, [0])
+        c[0] += value
+
+    def set(self, labels: tuple, value: float) -> None:
+        c = self.series.get(labels)
+        if c is None:
+            c = self.series.setdefault(labels, [0])
+        c[0] = value
+
+
+class Registry:
+    def __init__(self):
+        self.families: dict[str, Family] = {}
+
+    def histogram(self, name: str, help: str, labels: tuple, bounds: tuple) -> Family:
+        return self.families.setdefault(name, Family(name, "histogram", help, labels, bounds))
+
+    def counter(self, name: str, help: str, labels: tuple) -> Family:
+        return self.families.setdefault(name, Family(name, "counter", help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple) -> Family:
+        """Gauges are summed across workers – use them for host-wide totals."""
+        return self.families.setdefault(name, Family(name, "gauge", help, labels))
+
+    # ---- snapshot / merge (multi-process) ----
+    def snapshot(self) -> dict:
+        # list(): runs on the flush thread while requests add series
+        out = {}
+        for f in list(self.families.values()):
+            if f.kind == "histogram":
+                rows = [[list(k), list(h.counts), h.sum] for k, h in list(f.series.items())]
+            else:
+                rows = [[list(k), c[0]] for k, c in list(f.series.items())]
+            out[f.name] = rows
+        return out
+
+    def merged(self, snapshots: list[dict]) -> "Registry":
+        """Fresh registry (same families) holding the sum of `snapshots`."""
+        total = Registry()
+        for f in self.families.values():
+            tf = total.families[f.name] = Family(f.name, f.kind, f.help, f.labels, f.bounds)
+            for snap in snapshots:
+                for row in snap.get(f.name, ()):
+                    key = tuple(row[0])
+                    if f.kind == "histogram":
+                        h = tf.series.setdefault(key, Histogram(f.bounds))
+                        if len(row[1]) != len(h.counts):
+                            continue  # bucket layout changed between deploys
+                        h.counts = [a + b for a, b in zip(h.counts, row[1])]
+                        h.sum += row[2]
+                    else:
+                        tf.inc(key, row[1])
+        return total
+
+    # ---- exposition ----
+    def render(self) -> str:
+        lines: list[str] = []
+        for f in self.families.values():
+            lines.append(f"# HELP {f.name} {f.help}")
+            lines.append(f"# TYPE {f.name} {f.kind}")
+            for key, s in sorted(f.series.items()):
+                lbl = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(f.labels, key))
+                braced = f"{{{lbl}}}" if lbl else ""
+                if f.kind != "histogram":
+                    lines.append(f"{f.name}{braced} {_num(s[0])}")
+                    continue
+                sep = "," if lbl else ""
+                cum = 0
+                for bound, n in zip(f.bounds + (float("inf"),), s.counts):
+                    cum += n
+                    le = "+Inf" if bound == float("inf") else _num(bound)
+                    lines.append(f'{f.name}_bucket{{{lbl}{sep}le="{le}"}} {cum}')
+                lines.append(f"{f.name}_sum{braced} {_num(s.sum)}")
+                lines.append(f"{f.name}_count{braced} {cum}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _num(v: float) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+# ---------- the registry the app uses ---------------------------------
+REGISTRY = Registry()
+
+http_latency = REGISTRY.histogram(
+    "rfa_http_request_duration_seconds", "Request latency by route",
+    ("route", "method"), LATENCY_BUCKETS,
+)
+http_req_size = REGISTRY.histogram(
+    "rfa_http_request_size_bytes", "Request body size by route",
+    ("route", "method"), SIZE_BUCKETS,
+)
+http_resp_size = REGISTRY.histogram(
+    "rfa_http_response_size_bytes", "Response body size (as sent) by route",
+    ("route", "method"), SIZE_BUCKETS,
+)
+http_requests = REGISTRY.counter(
+    "rfa_http_requests_total", "Requests by route and status",
+    ("route", "method", "status"),
+)
+stage_latency = REGISTRY.histogram(
+    "rfa_stage_duration_seconds", "Time spent in internal stages",
+    ("stage",), LATENCY_BUCKETS,
+)
+
+
+# ---------- stage timing ----------------------------------------------
+@contextmanager
+def stage(name: str):
+    """with stage("render"): ..."""
+    key = (name,)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_latency.observe(key, time.perf_counter() - t0)
+
+
+def timed(name: str):
+    """Decorator form of stage(); works on sync and async callables."""
+    key = (name,)
+
+    def deco(fn):
+        if iscoroutinefunction(fn):
+            @wraps(fn)
+            async def awrapper(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    stage_latency.observe(key, time.perf_counter() - t0)
+            return awrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stage_latency.observe(key, time.perf_counter() - t0)
+        return wrapper
+
+    return deco
+
+
+# ---------- multi-process support -------------------------------------
+RETIRED = "_retired"  # <dir>/_retired.json: summed counters of exited workers
+
+
+def _pid_of(name: str) -> int:
+    return int(name.split("-", 1)[0])
+
+
+def _write_json(path: Path, doc: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(doc))
+    os.replace(tmp, path)  # readers never see a half-written file
+
+
+class _Flusher:
+    def __init__(self):
+        self.dir: Path | None = None
+        self.interval = 5.0
+        self.name = ""  # "<pid>-<nonce>", this process's file; set when its thread starts
+        self._thread: threading.Thread | None = None
+        os.register_at_fork(after_in_child=self._forked)
+
+    def _forked(self) -> None:
+        # threads don't survive fork, and the child is a worker of its own
+        self._thread = None
+        self.name = ""
+
+    def configure(self, multiproc_dir: str | None, flush_interval: float) -> None:
+        self.dir = Path(multiproc_dir) if multiproc_dir else None
+        self.interval = flush_interval
+        if self.dir is not None:
+            self.dir.mkdir(parents=True, exist_ok=True)
+
+    def ensure_started(self) -> None:
+        """Start this process's flush thread – the request path never writes files."""
+        if self.dir is None or self._thread is not None:
+            return
+        # the nonce keeps a worker that reuses a dead worker's pid off its file
+        self.name = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except OSError:
+                pass  # full disk etc. – the next round tries again
+
+    def flush(self) -> None:
+        if self.name:
+            _write_json(self.dir / f"{self.name}.json", REGISTRY.snapshot())
+
+    def _retire_dead(self) -> set[str]:
+        """
+        Fold exited workers' counters into _retired.json and delete their
+        files (their gauges are dropped).  A pid with several files is a
+        reused pid: only its newest file can be alive.  Returns the worker
+        files already counted in _retired.json.
+        """
+        files = [p for p in self.dir.glob("*.json") if p.stem != RETIRED]
+        newest: dict[int, float] = {}
+        mtimes = {}
+        for p in files:
+            try:
+                mtimes[p] = p.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            pid = _pid_of(p.stem)
+            newest[pid] = max(newest.get(pid, 0.0), mtimes[p])
+        dead = [
+            p for p, m in mtimes.items()
+            if p.stem != self.name and (not _alive(_pid_of(p.stem)) or m < newest[_pid_of(p.stem)])
+        ]
+        path = self.dir / f"{RETIRED}.json"
+        with open(self.dir / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # one worker folds at a time
+            try:
+                base = json.loads(path.read_text())
+            except FileNotFoundError:
+                base = {}
+            # names whose counters are in `base`; kept until their files are gone,
+            # so a crash between the write and the unlink never counts them twice
+            retired = {n for n in base.pop(RETIRED, []) if (self.dir / f"{n}.json").exists()}
+            gauges = [f.name for f in REGISTRY.families.values() if f.kind == "gauge"]
+            folded = []
+            for p in dead:
+                if p.stem in retired:
+                    continue
+                try:
+                    snap = json.loads(p.read_text())
+                except (OSError, ValueError):
+                    continue
+                for name in gauges:
+                    snap.pop(name, None)
+                folded.append(snap)
+                retired.add(p.stem)
+            if folded:
+                total = REGISTRY.merged([base, *folded]).snapshot()
+                _write_json(path, {**total, RETIRED: sorted(retired)})
+            for p in dead:
+                p.unlink(missing_ok=True)
+        return retired
+
+    def collect(self) -> Registry:
+        if self.dir is None:
+            return REGISTRY
+        self.ensure_started()
+        self.flush()
+        counted = self._retire_dead()
+        snaps = []
+        for p in self.dir.glob("*.json"):
+            if p.stem in counted:
+                continue
+            try:
+                snap = json.loads(p.read_text())
+            except (OSError, ValueError):
+                continue  # worker replaced it mid-read; next scrape gets it
+            snap.pop(RETIRED, None)
+            snaps.append(snap)
+        return REGISTRY.merged(snaps)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+FLUSHER = _Flusher()
+
+
+def configure(multiproc_dir: str | None = None, flush_interval: float = 5.0) -> None:
+    FLUSHER.configure(multiproc_dir, flush_interval)
+
+
+def render_latest() -> str:
+    return FLUSHER.collect().render()
+
+
+# ---------- ASGI middleware -------------------------------------------
+class MetricsMiddleware:
+    """Per-route latency, sizes and status counts (route = path template)."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        req_bytes = 0
+        resp_bytes = 0
+        status = 500
+
+        async def receive_wrapper() -> Message:
+            nonlocal req_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                req_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal resp_bytes, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                resp_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            now = time.perf_counter()
+            route = scope.get("route")
+            key = (getattr(route, "path", "<unmatched>"), scope["method"])
+            http_latency.observe(key, now - t0)
+            http_req_size.observe(key, req_bytes)
+            http_resp_size.observe(key, resp_bytes)
+            http_requests.inc(key + (str(status),))
+            FLUSHER.ensure_started()
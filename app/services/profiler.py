@@ -0,0 +1,173 @@
+# app/services/profiler.py
+"""
+Opt-in sampling profiler for individual slow requests.
+
+A single background thread snapshots every thread's stack with
+sys._current_frames() every `interval_ms`, but only while at least one
+profiled request is in flight.  When such a request ends, the samples
+taken during its lifetime are written as flamegraph.pl / speedscope
+"folded" stacks to `out_dir`, next to a small .json with the request's
+details.  Only the newest `max_profiles` are kept.
+
+A request is profiled when
+  • it carries `X-RFA-Profile: <admin token>` or `?__profile=<admin token>`, or
+  • it takes longer than `threshold_ms` (if > 0) – every request is then
+    sampled, and all but the slow ones are discarded.
+
+Requests that overlap in time share the event-loop thread, so their
+samples overlap too; the .json records how many requests were in flight.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.services.admin_auth import is_admin_token
+
+APP_DIR = str(Path(__file__).resolve().parents[1])
+
+
+class StackSampler:
+    def __init__(self, interval: float, max_samples: int = 200_000):
+        self.interval = interval
+        self.samples: deque[tuple[float, str]] = deque(maxlen=max_samples)
+        self.active = 0
+        self._wake = threading.Event()
+        self._labels: dict = {}
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    # ---- request bookkeeping (event-loop thread) ----
+    def acquire(self) -> None:
+        with self._lock:
+            self.active += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rfa-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def release(self) -> None:
+        with self._lock:
+            self.active -= 1
+            if self.active == 0:
+                self._wake.clear()
+
+    def window(self, t0: float, t1: float) -> list[str]:
+        return [stack for ts, stack in list(self.samples) if t0 <= ts <= t1]
+
+    # ---- sampler thread ----
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            self._wake.wait()
+            now = time.monotonic()
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                ours = False
+                while frame is not None:
+                    code = frame.f_code
+                    ours = ours or code.co_filename.startswith(APP_DIR)
+                    stack.append(self._label(code))
+                    frame = frame.f_back
+                # the loop thread is always interesting (its idle time = awaiting I/O);
+                # other threads only while they run our code (threadpool DB work)
+                if ours or tid == threading.main_thread().ident:
+                    self.samples.append((now, ";".join(reversed(stack))))
+            time.sleep(self.interval)
+
+
+class ProfilerMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        enabled: bool = False,
+        threshold_ms: float = 0,
+        interval_ms: float = 5,
+        out_dir: str = "profiles",
+        max_profiles: int = 50,
+    ):
+        self.app = app
+        self.enabled = enabled
+        self.threshold = threshold_ms / 1000.0
+        self.out_dir = Path(out_dir)
+        self.max_profiles = max_profiles
+        self.sampler = StackSampler(interval_ms / 1000.0)
+
+    def _forced(self, scope: Scope) -> bool:
+        token = Headers(scope=scope).get("x-rfa-profile")
+        if token is None:
+            query = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+            token = query.get("__profile")
+        return is_admin_token(token)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        forced = self._forced(scope)
+        if not forced and self.threshold <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        self.sampler.acquire()
+        concurrent = self.sampler.active
+        t0 = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            t1 = time.monotonic()
+            self.sampler.release()
+            if forced or t1 - t0 >= self.threshold:
+                self._store(scope, t0, t1, forced, concurrent)
+
+    def _store(self, scope: Scope, t0: float, t1: float, forced: bool, concurrent: int) -> None:
+        folded: dict[str, int] = {}
+        for stack in self.sampler.window(t0, t1):
+            folded[stack] = folded.get(stack, 0) + 1
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        ms = int((t1 - t0) * 1000)
+        route = getattr(scope.get("route"), "path", scope["path"])
+        name = f"{int(time.time() * 1000)}_{scope['method']}_{_safe(route)}_{ms}ms"
+        (self.out_dir / f"{name}.folded").write_text(
+            "".join(f"{stack} {n}\n" for stack, n in folded.items())
+        )
+        (self.out_dir / f"{name}.json").write_text(json.dumps({
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "duration_ms": ms,
+            "samples": sum(folded.values()),
+            "interval_ms": self.sampler.interval * 1000,
+            "trigger": "admin" if forced else "threshold",
+            "in_flight_at_start": concurrent,
+        }))
+        self._prune()
+
+    def _prune(self) -> None:
+        profiles = sorted(self.out_dir.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+        for old in profiles[: max(0, len(profiles) - self.max_profiles)]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".json").unlink(missing_ok=True)
+
+
+def _safe(route: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in route).strip("_")[:60] or "root"
@@ -1,12 +1,59 @@
 import datetime, fastapi
+import time
 import redis.asyncio as redis
 
+from app.services.metrics import timed
+
 redis_client = redis.from_url("redis://localhost", decode_responses=True)
 
+
+class MemoryQuotaClient:
+    """
+    In-process stand-in for the Redis calls used here and by
+    idempotency.py (tests, benchmarks).
+    Swap it in with `quota.redis_client = MemoryQuotaClient()`.
+    """
+
+    def __init__(self):
+        self.data: dict[str, int | str] = {}
+        self.expires: dict[str, float] = {}
+
+    def _live(self, key: str) -> bool:
+        exp = self.expires.get(key)
+        if exp is not None and exp <= time.monotonic():
+            self.data.pop(key, None)
+            del self.expires[key]
+        return key in self.data
+
+    async def get(self, key: str):
+        return self.data.get(key) if self._live(key) else None
+
+    async def incr(self, key: str) -> int:
+        self.data[key] = int(self.data.get(key, 0) if self._live(key) else 0) + 1
+        return self.data[key]
+
+    async def set(self, key: str, value, ex: int | None = None, nx: bool = False):
+        if nx and self._live(key):
+            return None
+        self.data[key] = value
+        if ex is not None:
+            self.expires[key] = time.monotonic() + ex
+        else:
+            self.expires.pop(key, None)
+        return True
+
+    async def delete(self, key: str) -> int:
+        live = self._live(key)
+        self.data.pop(key, None)
+        self.expires.pop(key, None)
+        return int(live)
+
+
 MAX_OPENS = 10
 MAX_SUBMITS = 2
 
 
+@timed("quota_open")
 async def check_open(phone: str):
     key = f"{phone}:{datetime.date.today()}:opens"
     if int(await redis_client.get(key) or 0) >= MAX_OPENS:
@@ -14,6 +61,7 @@ async def check_open(phone: str):
     await redis_client.incr(key)
 
 
+@timed("quota_submit")
 async def check_submit(phone: str):
     key = f"{phone}:{datetime.date.today()}:submits"
     if int(await redis_client.get(key) or 0) >= MAX_SUBMITS:
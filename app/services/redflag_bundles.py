@@ -0,0 +1,224 @@
+# app/services/redflag_bundles.py
+"""
+Localised red-flag resource bundles for the response page.
+
+A bundle is everything redflag_response.html shows for one red flag in
+one language: localised name and at-a-glance text, the patient video
+URL, the other videos and the references.  Those live in five tables;
+resolving them per flag per submit was several queries each.
+
+Bundles are cached per (redflag_id, lang).  The first miss for a form
+loads every red flag of that form, in every language the form has, with
+one outer-joined query, so the rest of the form's submits render
+without touching the DB.  Edits are announced with
+publish("redflag", redflag_id), which evicts that flag in all languages.
+"""
+
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.executor import db_executor
+from app.db.session import SessionLocal
+from app.services import cache_bus
+from app.services.form_logic import RedFlagRef
+from app.services.local_cache import MISSING, VersionedCache
+from app.services.metrics import timed
+from app.services.singleflight import SingleFlight
+
+VIDEO_URLS = {
+    models.VideoHost.VIMEO: "https://vimeo.com/{}",
+    models.VideoHost.YOUTUBE: "https://www.youtube.com/watch?v={}",
+}
+
+
+class VideoLink(NamedTuple):
+    type: str      # models.VideoType value
+    url: str
+    title: str | None
+
+
+class ReferenceLink(NamedTuple):
+    citation: str
+    url: str
+
+
+class RedFlagBundle(NamedTuple):
+    id: int
+    slug: str
+    lang: str
+    name: str
+    ataglance: str | None
+    patient_video_url: str | None
+    videos: tuple        # VideoLink, ...
+    references: tuple    # ReferenceLink, ...
+
+
+bundles = VersionedCache("redflag_bundles", max_entries=4096)
+bundle_loads = SingleFlight("redflag_bundles")
+_langs: set[str] = set()  # every lang ever cached – invalidation fans out over them
+
+
+@cache_bus.on("redflag")
+def _invalidate(key: str, version: int) -> None:
+    rid = int(key)
+    for lang in tuple(_langs):
+        bundles.invalidate((rid, lang), version)
+
+
+@cache_bus.on_reset
+def _reset() -> None:
+    bundles.clear()
+
+
+def _youtube(v: str | None) -> str | None:
+    if not v:
+        return None
+    return v if v.startswith(("http://", "https://")) else VIDEO_URLS[models.VideoHost.YOUTUBE].format(v)
+
+
+def _vimeo(v: str | None) -> str | None:
+    if not v:
+        return None
+    return v if v.startswith(("http://", "https://")) else VIDEO_URLS[models.VideoHost.VIMEO].format(v)
+
+
+@timed("redflag_bundles_load")
+def _load_bundles(db: Session, redflag_ids: Iterable[int], langs: Iterable[str]) -> dict:
+    """
+    {(redflag_id, lang): RedFlagBundle} for every id × lang, in one query.
+
+    Localisations, videos and references are all outer-joined onto the red
+    flag, so a flag comes back as langs × videos × references rows – a
+    handful for real data – and is folded back together here.
+    """
+    ids, langs = sorted(set(redflag_ids)), sorted(set(langs))
+    if not ids:
+        return {}
+    RF, RFL, RFV, V, RFR, R = (
+        models.RedFlag, models.RedFlagLocalised, models.RedFlagVideo,
+        models.Video, models.RedFlagReference, models.Reference,
+    )
+    stmt = (
+        select(
+            RF.id, RF.slug, RF.name_en, RF.ataglance_en, RF.mini_cme_vimeo,
+            RF.long_cme_vimeo, RF.references_json,
+            RFL.lang_code, RFL.name, RFL.ataglance_text, RFL.patient_video_youtube,
+            RFV.type, V.host, V.video_id, V.title_en,
+            R.citation_text, R.doi_or_url,
+        )
+        .outerjoin(RFL, and_(RFL.redflag_id == RF.id, RFL.lang_code.in_(langs)))
+        .outerjoin(RFV, RFV.redflag_id == RF.id)
+        .outerjoin(V, V.id == RFV.video_id)
+        .outerjoin(RFR, RFR.redflag_id == RF.id)
+        .outerjoin(R, R.id == RFR.reference_id)
+        .where(RF.id.in_(ids))
+        .order_by(RF.id, RFV.id, RFR.id)
+    )
+
+    base: dict[int, tuple] = {}
+    local: dict[tuple, tuple] = {}
+    videos: dict[int, dict] = {}
+    refs: dict[int, dict] = {}
+    for (rid, slug, name_en, ataglance_en, mini_cme, long_cme, refs_json,
+         lang, name, ataglance, patient_yt, vtype, host, video_id, vtitle,
+         citation, ref_url) in db.execute(stmt):
+        base.setdefault(rid, (slug, name_en, ataglance_en, mini_cme, long_cme, refs_json))
+        if lang is not None:
+            local.setdefault((rid, lang), (name, ataglance, patient_yt))
+        if video_id is not None:
+            url = VIDEO_URLS[host].format(video_id)
+            videos.setdefault(rid, {}).setdefault((vtype.value, url), vtitle)
+        if citation is not None:
+            refs.setdefault(rid, {}).setdefault((citation, ref_url), None)
+
+    out = {}
+    for rid, (slug, name_en, ataglance_en, mini_cme, long_cme, refs_json) in base.items():
+        vids = [VideoLink(t, u, title) for (t, u), title in videos.get(rid, {}).items()]
+        # inline columns are the fallback when nothing is normalised yet
+        if not any(v.type == models.VideoType.MINI_CME.value for v in vids) and _vimeo(mini_cme):
+            vids.append(VideoLink(models.VideoType.MINI_CME.value, _vimeo(mini_cme), None))
+        if not any(v.type == models.VideoType.LONG_CME.value for v in vids) and _vimeo(long_cme):
+            vids.append(VideoLink(models.VideoType.LONG_CME.value, _vimeo(long_cme), None))
+        references = [ReferenceLink(c, u) for c, u in refs.get(rid, {})]
+        if not references and isinstance(refs_json, list):
+            references = [
+                ReferenceLink(r.get("citation", ""), r.get("url", ""))
+                for r in refs_json if isinstance(r, dict)
+            ]
+        patient_default = next(
+            (v.url for v in vids if v.type == models.VideoType.PATIENT.value), None
+        )
+        for lang in langs:
+            name, ataglance, patient_yt = local.get((rid, lang), (None, None, None))
+            out[(rid, lang)] = RedFlagBundle(
+                rid, slug, lang,
+                name or name_en,
+                ataglance or ataglance_en,
+                _youtube(patient_yt) or patient_default,
+                tuple(vids),
+                tuple(references),
+            )
+    return out
+
+
+def _form_redflag_ids(fp) -> list[int]:
+    return sorted({rf.id for rf in fp.rule_by_option_id.values() if rf is not None})
+
+
+def _fallback(rf: RedFlagRef, lang: str) -> RedFlagBundle:
+    # flag deleted since the form was compiled – show what the form knows
+    return RedFlagBundle(rf.id, rf.slug, lang, rf.name_en, None, None, (), ())
+
+
+def _pick(found: dict, refs: Iterable[RedFlagRef], lang: str) -> list[RedFlagBundle]:
+    return [found.get((rf.id, lang)) or _fallback(rf, lang) for rf in refs]
+
+
+def _langs_for(fp, lang: str) -> set[str]:
+    langs = set(fp.langs) | {lang}
+    _langs.update(langs)
+    return langs
+
+
+def bundles_for(db: Session, fp, refs: Iterable[RedFlagRef], lang: str) -> list[RedFlagBundle]:
+    """Bundles for the triggered `refs` of form `fp`, preloading the whole form on a miss."""
+    refs = list(refs)
+    cached = [bundles.get((rf.id, lang)) for rf in refs]
+    if all(b is not MISSING for b in cached):
+        return cached
+    langs = _langs_for(fp, lang)
+    ids = _form_redflag_ids(fp)
+    tokens = {(rid, l): bundles.begin_load((rid, l)) for rid in ids for l in langs}
+    found = _load_bundles(db, ids, langs)
+    for key, bundle in found.items():
+        bundles.put(key, bundle, tokens[key])
+    return _pick(found, refs, lang)
+
+
+def _load_detached(ids: list[int], langs: set[str]) -> dict:
+    # own session: the load may outlive the request that started it
+    with SessionLocal() as db:
+        return _load_bundles(db, ids, langs)
+
+
+async def abundles_for(fp, refs: Iterable[RedFlagRef], lang: str) -> list[RedFlagBundle]:
+    """bundles_for() for async handlers; concurrent misses for a form share one load."""
+    refs = list(refs)
+    cached = [bundles.get((rf.id, lang)) for rf in refs]
+    if all(b is not MISSING for b in cached):
+        return cached
+    langs = _langs_for(fp, lang)
+    ids = _form_redflag_ids(fp)
+
+    async def load() -> dict:
+        tokens = {(rid, l): bundles.begin_load((rid, l)) for rid in ids for l in langs}
+        found = await db_executor.run(_load_detached, ids, langs)
+        for key, bundle in found.items():
+            bundles.put(key, bundle, tokens[key])
+        return found
+
+    found = await bundle_loads.do((fp.meta.version_id, lang), load)
+    return _pick(found, refs, lang)
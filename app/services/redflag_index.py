@@ -0,0 +1,223 @@
+# app/services/redflag_index.py
+"""
+Inverted index: red flag → the (form, question, option) tuples that
+trigger it, across every active form.
+
+    "which forms and options can trigger purpuric_rash?"   triggers_for()
+    "which forms can raise it at all?"                     forms_for()
+    "which flags can this form raise?"                     flags_for_form()
+
+Lookups are dict reads on a per-worker index.  Only the active version
+of each active form is indexed – that is what patients are shown.
+
+The index is built once per worker (one query over the red-flag options,
+plus the red flags themselves) and then kept current by the cache bus
+instead of being rebuilt:
+
+    "form"     the form's postings are reloaded (an import or version swap
+               changes which options carry which flag)
+    "redflag"  the flag's slug / name are reloaded
+    reset      the whole index is dropped and rebuilt on next use
+
+Bus handlers only note what changed; the next lookup reloads those forms
+/ flags with one query each (off the event loop, concurrent callers
+sharing it) and patches the index in place.  Changes arriving while a
+reload runs stay noted for the one after.
+"""
+
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.executor import db_executor
+from app.db.session import SessionLocal
+from app.services import cache_bus
+from app.services.metrics import timed
+from app.services.singleflight import SingleFlight
+
+F, FV, Q, O, RF = models.Form, models.FormVersion, models.Question, models.Option, models.RedFlag
+
+
+class Trigger(NamedTuple):
+    form_id: int
+    form_slug: str
+    form_version_id: int
+    question_id: int
+    question_key: str | None
+    option_id: int
+    option_key: str
+
+
+class FlagInfo(NamedTuple):
+    id: int
+    slug: str
+    name: str
+
+
+class RedFlagIndex:
+    """Postings per red flag, plus the reverse (form → flags) for patching."""
+
+    def __init__(self):
+        self.flags: dict[int, FlagInfo] = {}
+        self.ids: dict[str, int] = {}                          # red flag slug → id
+        self.triggers: dict[int, tuple[Trigger, ...]] = {}     # in form slug, question, option order
+        self.forms: dict[int, tuple[str, ...]] = {}            # distinct form slugs per flag
+        self.form_flags: dict[str, frozenset[int]] = {}        # form slug → flag ids
+
+    # ---------- lookups -----------------------------------------
+    def resolve(self, ref: int | str) -> int | None:
+        """Red flag id for an id or a slug; None if there is no such flag."""
+        if isinstance(ref, str):
+            return self.ids.get(ref)
+        return ref if ref in self.flags else None
+
+    def triggers_for(self, ref: int | str) -> tuple[Trigger, ...]:
+        return self.triggers.get(self.resolve(ref), ())
+
+    def forms_for(self, ref: int | str) -> tuple[str, ...]:
+        return self.forms.get(self.resolve(ref), ())
+
+    def flags_for_form(self, form_slug: str) -> frozenset[int]:
+        return self.form_flags.get(form_slug, frozenset())
+
+    # ---------- maintenance -------------------------------------
+    def set_flags(self, rows: Iterable[tuple]) -> None:
+        for rid, slug, name in rows:
+            old = self.flags.get(rid)
+            if old is not None and self.ids.get(old.slug) == rid:
+                del self.ids[old.slug]
+            self.flags[rid] = FlagInfo(rid, slug, name)
+            self.ids[slug] = rid
+
+    def set_forms(self, slugs: Iterable[str], rows: Iterable[tuple]) -> None:
+        """Replace the postings of `slugs` with `rows` (redflag_id, *Trigger fields)."""
+        added: dict[int, list[Trigger]] = {}
+        for rid, *fields in rows:
+            added.setdefault(rid, []).append(Trigger(*fields))
+        slugs = set(slugs)
+        touched = set(added)
+        for slug in slugs:
+            touched |= self.form_flags.pop(slug, frozenset())
+        by_form: dict[str, set[int]] = {}
+        for rid in touched:
+            kept = [t for t in self.triggers.get(rid, ()) if t.form_slug not in slugs]
+            merged = sorted(kept + added.get(rid, []), key=lambda t: (t.form_slug, t.question_id, t.option_id))
+            for t in added.get(rid, ()):
+                by_form.setdefault(t.form_slug, set()).add(rid)
+            if merged:
+                self.triggers[rid] = tuple(merged)
+                self.forms[rid] = tuple(dict.fromkeys(t.form_slug for t in merged))
+            else:
+                self.triggers.pop(rid, None)
+                self.forms.pop(rid, None)
+        for slug, rids in by_form.items():
+            self.form_flags[slug] = frozenset(rids)
+
+    def stats(self) -> dict:
+        return {
+            "redflags": len(self.flags),
+            "triggered": len(self.triggers),
+            "forms": len(self.form_flags),
+            "triggers": sum(len(t) for t in self.triggers.values()),
+        }
+
+
+# ---------- loading ------------------------------------------------
+def _trigger_rows(db: Session, form_slugs: set[str] | None = None) -> list[tuple]:
+    stmt = (
+        select(O.redflag_id, F.id, F.slug, FV.id, Q.id, Q.question_key, O.id, O.option_key)
+        .join(Q, Q.id == O.question_id)
+        .join(FV, FV.id == Q.form_version_id)
+        .join(F, F.active_version_id == FV.id)
+        .where(O.redflag_id.is_not(None), F.is_active.is_(True))
+    )
+    if form_slugs is not None:
+        stmt = stmt.where(F.slug.in_(form_slugs))
+    return db.execute(stmt).all()
+
+
+def _flag_rows(db: Session, ids: set[int] | None = None) -> list[tuple]:
+    stmt = select(RF.id, RF.slug, RF.name_en)
+    if ids is not None:
+        stmt = stmt.where(RF.id.in_(ids))
+    return db.execute(stmt).all()
+
+
+def _load(db: Session, forms: set[str] | None, flags: set[int] | None) -> tuple[list, list]:
+    """(flag rows, trigger rows); None means everything."""
+    triggers = _trigger_rows(db, forms) if forms is None or forms else []
+    if flags is not None:
+        # flags first met through a reloaded form (new ones from an import)
+        flags = flags | {row[0] for row in triggers}
+    return (_flag_rows(db, flags) if flags is None or flags else []), triggers
+
+
+def _load_detached(forms: set[str] | None, flags: set[int] | None) -> tuple[list, list]:
+    # own session: the load may outlive the request that started it
+    with SessionLocal() as db:
+        return _load(db, forms, flags)
+
+
+# ---------- per-worker state --------------------------------------
+_index: RedFlagIndex | None = None
+_dirty_forms: set[str] = set()
+_dirty_flags: set[int] = set()
+index_loads = SingleFlight("redflag_index")
+
+
+@cache_bus.on("form")
+def _form_changed(slug: str, version: int) -> None:
+    _dirty_forms.add(slug)
+
+
+@cache_bus.on("redflag")
+def _flag_changed(key: str, version: int) -> None:
+    _dirty_flags.add(int(key))
+
+
+@cache_bus.on_reset
+def _reset() -> None:
+    global _index
+    _index = None
+
+
+def _pending() -> tuple[RedFlagIndex, set[str] | None, set[int] | None]:
+    """Take the noted changes: (index to patch, forms, flags) – None = rebuild everything."""
+    forms, flags = set(_dirty_forms), set(_dirty_flags)
+    _dirty_forms.clear()
+    _dirty_flags.clear()
+    if _index is None:
+        return RedFlagIndex(), None, None
+    return _index, forms, flags
+
+
+def _apply(index: RedFlagIndex, forms: set[str] | None, flag_rows: list, trigger_rows: list) -> RedFlagIndex:
+    global _index
+    index.set_flags(flag_rows)
+    index.set_forms(forms if forms is not None else (), trigger_rows)
+    if forms is None or _index is index:  # a reset during the load wins
+        _index = index
+    return index
+
+
+@timed("redflag_index")
+def get_index(db: Session) -> RedFlagIndex:
+    """The current index, built or patched with `db` first if needed."""
+    if _index is not None and not _dirty_forms and not _dirty_flags:
+        return _index
+    index, forms, flags = _pending()
+    return _apply(index, forms, *_load(db, forms, flags))
+
+
+async def aget_index() -> RedFlagIndex:
+    """get_index() for async handlers; the load runs off the event loop, shared by concurrent callers."""
+    if _index is not None and not _dirty_forms and not _dirty_flags:
+        return _index
+
+    async def load() -> RedFlagIndex:
+        index, forms, flags = _pending()
+        return _apply(index, forms, *await db_executor.run(_load_detached, forms, flags))
+
+    return await index_loads.do("index", load)
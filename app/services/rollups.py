@@ -0,0 +1,288 @@
+# app/services/rollups.py
+"""
+Per-clinic, per-form, per-day rollups of submissions and red flags.
+
+Reports read rollup_daily_submissions / rollup_daily_redflags (primary-key
+range scans, one row per day) instead of grouping form_submissions ×
+submission_redflags.  The rollups are folded in incrementally by
+run(), which walks form_submissions by id past a watermark:
+
+  • one transaction per batch adds the batch's counts (upsert ... +=)
+    and moves the watermark, so every submission is counted exactly once
+    even if the aggregator dies half-way;
+  • the watermark row is locked FOR UPDATE, so two aggregators queue up
+    instead of double-counting;
+  • submissions younger than `settle_seconds` are left for the next run:
+    a submission id handed out by a transaction that commits later than
+    a higher id would otherwise be skipped for good.  Transactions
+    running longer than that are assumed not to exist.
+
+rebuild() recomputes a day range (or everything) from the source tables
+for backfills and corrections.  Days are local to `utc_offset_minutes`.
+Days before the archive horizon (app/services/archive.py) can't be
+rebuilt – their submissions are in Parquet, not in the source tables.
+"""
+
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.services.metrics import REGISTRY
+from app.settings import rollups_cfg
+
+WATERMARK = "daily"
+ARCHIVED = "archived"  # archive.HORIZON
+EPOCH = date(2020, 1, 1)  # earlier than any submission
+
+FS, SRF = models.FormSubmission, models.SubmissionRedFlag
+SUBS, RFS = models.DailySubmissionRollup, models.DailyRedFlagRollup
+
+folded = REGISTRY.counter(
+    "rfa_rollup_submissions_folded_total", "Submissions added to the daily rollups", (),
+)
+
+
+class ArchivedRange(ValueError):
+    pass
+
+
+def _offset() -> timedelta:
+    return timedelta(minutes=rollups_cfg()["utc_offset_minutes"])
+
+
+def today(offset: timedelta | None = None) -> date:
+    """The current rollup day (local to `utc_offset_minutes`)."""
+    return local_day(datetime.now(timezone.utc), _offset() if offset is None else offset)
+
+
+def local_day(ts: datetime, offset: timedelta) -> date:
+    if ts.tzinfo is None:  # written with datetime.utcnow
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts.astimezone(timezone.utc) + offset).date()
+
+
+def day_bounds(day_from: date, day_to: date, offset: timedelta) -> tuple[datetime, datetime]:
+    """UTC [start, end) covering local days day_from..day_to inclusive."""
+    start = datetime.combine(day_from, datetime.min.time(), timezone.utc) - offset
+    end = datetime.combine(day_to + timedelta(days=1), datetime.min.time(), timezone.utc) - offset
+    return start, end
+
+
+# --------------------------------------------------------------------- #
+# Folding
+# --------------------------------------------------------------------- #
+def _fold(db: Session, *where, yield_per: int = 5000) -> tuple[Counter, Counter, Counter]:
+    """(submissions, flagged submissions, red flags) counters for FS rows matching `where`."""
+    offset = _offset()
+    subs, flagged, rfs = Counter(), Counter(), Counter()
+
+    stmt = (
+        select(FS.clinic_id, FS.form_id, FS.submitted_at)
+        .where(*where)
+        .execution_options(yield_per=yield_per)
+    )
+    for clinic_id, form_id, ts in db.execute(stmt):
+        subs[(local_day(ts, offset), clinic_id, form_id)] += 1
+
+    stmt = (
+        select(FS.id, FS.clinic_id, FS.form_id, FS.submitted_at, SRF.redflag_id)
+        .join(SRF, SRF.submission_id == FS.id)
+        .where(*where)
+        .order_by(FS.id)
+        .execution_options(yield_per=yield_per)
+    )
+    last = None
+    for sub_id, clinic_id, form_id, ts, redflag_id in db.execute(stmt):
+        key = (local_day(ts, offset), clinic_id, form_id)
+        rfs[key + (redflag_id,)] += 1
+        if sub_id != last:
+            flagged[key] += 1
+            last = sub_id
+    return subs, flagged, rfs
+
+
+def _insert(db: Session):
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"rollup upserts not implemented for {name}")
+    return insert
+
+
+def _add(db: Session, subs: Counter, flagged: Counter, rfs: Counter) -> None:
+    """rollup += counts (insert, or add onto the existing row)."""
+    insert = _insert(db)
+    if subs:
+        stmt = insert(SUBS)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "clinic_id", "form_id"],
+            set_={
+                "submissions": SUBS.submissions + stmt.excluded.submissions,
+                "flagged_submissions": SUBS.flagged_submissions + stmt.excluded.flagged_submissions,
+            },
+        )
+        db.execute(stmt, [
+            {"day": d, "clinic_id": c, "form_id": f, "submissions": n,
+             "flagged_submissions": flagged.get((d, c, f), 0)}
+            for (d, c, f), n in subs.items()
+        ])
+    if rfs:
+        stmt = insert(RFS)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "clinic_id", "form_id", "redflag_id"],
+            set_={"triggered": RFS.triggered + stmt.excluded.triggered},
+        )
+        db.execute(stmt, [
+            {"day": d, "clinic_id": c, "form_id": f, "redflag_id": r, "triggered": n}
+            for (d, c, f, r), n in rfs.items()
+        ])
+
+
+def _watermark(db: Session) -> models.RollupWatermark:
+    wm = db.get(models.RollupWatermark, WATERMARK, with_for_update=True)
+    if wm is None:
+        wm = models.RollupWatermark(name=WATERMARK, last_submission_id=0)
+        db.add(wm)
+        db.flush()
+    return wm
+
+
+def run_batch(db: Session, now: datetime | None = None) -> int | None:
+    """Fold the next batch past the watermark and commit; submissions folded, None if caught up."""
+    cfg = rollups_cfg()
+    now = now or datetime.now(timezone.utc)
+    wm = _watermark(db)
+    lo = wm.last_submission_id
+
+    # stop just below the first submission that hasn't settled yet
+    cutoff = now - timedelta(seconds=cfg["settle_seconds"])
+    unsettled = db.scalar(select(func.min(FS.id)).where(FS.id > lo, FS.submitted_at >= cutoff))
+    hi = db.scalar(select(func.max(FS.id)).where(FS.id > lo)) if unsettled is None else unsettled - 1
+    if hi is None or hi <= lo:
+        db.rollback()
+        return None
+    hi = min(hi, lo + cfg["batch_size"])
+
+    subs, flagged, rfs = _fold(db, FS.id > lo, FS.id <= hi)
+    _add(db, subs, flagged, rfs)
+    wm.last_submission_id = hi
+    wm.updated_at = now
+    db.commit()
+    n = sum(subs.values())
+    folded.inc((), n)
+    return n
+
+
+def run(db: Session) -> int:
+    """Fold everything that has settled. Returns submissions folded."""
+    total = 0
+    while (n := run_batch(db)) is not None:
+        total += n
+    return total
+
+
+def rebuild(db: Session, day_from: date | None = None, day_to: date | None = None) -> int:
+    """
+    Recompute rollups from the source tables.  No range = drop everything,
+    reset the watermark and re-fold; with a range only those days are
+    replaced (up to the current watermark – run() adds the rest).
+    Once submissions have been archived, no day_from means the first live
+    day (archived days keep their rollups), and an explicit day_from
+    before it raises ArchivedRange.
+    """
+    offset = _offset()
+    archived = db.get(models.RollupWatermark, ARCHIVED)
+    if archived is not None and archived.horizon is not None:
+        first_live = local_day(archived.horizon, offset) + timedelta(days=1)
+        if day_from is None:
+            day_from = first_live
+        elif day_from < first_live:
+            raise ArchivedRange(
+                f"submissions before {archived.horizon.isoformat()} are archived; "
+                f"rebuild can only replace days from {first_live.isoformat()} on"
+            )
+
+    if day_from is None and day_to is None:
+        _watermark(db).last_submission_id = 0
+        db.execute(delete(RFS))
+        db.execute(delete(SUBS))
+        db.commit()
+        return run(db)
+
+    day_from = day_from or EPOCH
+    day_to = day_to or today(offset)
+    wm = _watermark(db)
+    start, end = day_bounds(day_from, day_to, offset)
+    db.execute(delete(RFS).where(RFS.day.between(day_from, day_to)))
+    db.execute(delete(SUBS).where(SUBS.day.between(day_from, day_to)))
+    subs, flagged, rfs = _fold(
+        db, FS.id <= wm.last_submission_id, FS.submitted_at >= start, FS.submitted_at < end,
+    )
+    _add(db, subs, flagged, rfs)
+    db.commit()
+    return sum(subs.values())
+
+
+# --------------------------------------------------------------------- #
+# Reporting (rollups only – never touches the source tables)
+# --------------------------------------------------------------------- #
+def freshness(db: Session) -> dict:
+    wm = db.get(models.RollupWatermark, WATERMARK)
+    return {
+        "as_of_submission_id": wm.last_submission_id if wm else 0,
+        "updated_at": wm.updated_at.isoformat() if wm else None,
+    }
+
+
+def daily_report(
+    db: Session, clinic_id: int, day_from: date, day_to: date, form_id: int | None = None
+) -> dict:
+    """Per-day submissions / flagged submissions / red-flag counts for one clinic."""
+    where = [SUBS.clinic_id == clinic_id, SUBS.day.between(day_from, day_to)]
+    rf_where = [RFS.clinic_id == clinic_id, RFS.day.between(day_from, day_to)]
+    if form_id is not None:
+        where.append(SUBS.form_id == form_id)
+        rf_where.append(RFS.form_id == form_id)
+
+    days: dict[date, dict] = {}
+    for day, subs, flagged in db.execute(
+        select(SUBS.day, func.sum(SUBS.submissions), func.sum(SUBS.flagged_submissions))
+        .where(*where).group_by(SUBS.day).order_by(SUBS.day)
+    ):
+        days[day] = {"day": day.isoformat(), "submissions": int(subs),
+                     "flagged_submissions": int(flagged), "redflags": {}}
+    for day, redflag_id, n in db.execute(
+        select(RFS.day, RFS.redflag_id, func.sum(RFS.triggered))
+        .where(*rf_where).group_by(RFS.day, RFS.redflag_id)
+    ):
+        days[day]["redflags"][redflag_id] = int(n)
+    return {"clinic_id": clinic_id, "days": list(days.values()), **freshness(db)}
+
+
+def summary_report(
+    db: Session, clinic_id: int, day_from: date, day_to: date
+) -> dict:
+    """Totals over the range, per form and per red flag."""
+    forms = [
+        {"form_id": form_id, "submissions": int(s), "flagged_submissions": int(f)}
+        for form_id, s, f in db.execute(
+            select(SUBS.form_id, func.sum(SUBS.submissions), func.sum(SUBS.flagged_submissions))
+            .where(SUBS.clinic_id == clinic_id, SUBS.day.between(day_from, day_to))
+            .group_by(SUBS.form_id).order_by(SUBS.form_id)
+        )
+    ]
+    redflags = [
+        {"redflag_id": redflag_id, "triggered": int(n)}
+        for redflag_id, n in db.execute(
+            select(RFS.redflag_id, func.sum(RFS.triggered))
+            .where(RFS.clinic_id == clinic_id, RFS.day.between(day_from, day_to))
+            .group_by(RFS.redflag_id).order_by(func.sum(RFS.triggered).desc())
+        )
+    ]
+    return {"clinic_id": clinic_id, "forms": forms, "redflags": redflags, **freshness(db)}
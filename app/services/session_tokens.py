@@ -0,0 +1,182 @@
+# app/services/session_tokens.py
+"""
+Signed, expiring patient session links – checked without touching the DB.
+
+The doctor side issues a link
+
+    /patient/open/<session_id>/<form_slug>?phone=<e164>&t=<token>
+
+with  token = "<kid>.<clinic_id>.<expires>.<mac>"  and
+
+    mac = HMAC-SHA256(keys[kid], "v1|session_id|clinic_id|phone|form_slug|expires")
+
+truncated to 128 bits.  Session id, phone and slug are already in the URL,
+so they are authenticated but not repeated in the token; the clinic id
+rides in the token, which spares the patient_sessions lookup as well.
+
+Keys come from `[session_tokens]` in inditech_secrets.toml (see
+settings.session_token_cfg); `kid` says which one signed the link so
+keys can be rotated while old links stay valid until they expire.
+The same keys sign the doctors' dashboard tokens (issue_doctor /
+verify_doctor).
+"""
+
+import base64
+import hashlib
+import hmac
+import time
+from typing import NamedTuple
+from urllib.parse import urlencode
+
+from fastapi import HTTPException, status
+
+from app.settings import session_token_cfg
+
+VERSION = b"v1"
+MAC_BYTES = 16
+
+
+class InvalidSessionToken(ValueError):
+    """Token malformed, signed with an unknown key, tampered with, or expired."""
+
+
+class SessionClaims(NamedTuple):
+    session_id: int
+    clinic_id: int
+    phone: str
+    form_slug: str
+    expires_at: int
+    kid: str
+
+
+def _normalise_phone(phone: str) -> str:
+    return phone.strip().replace(" ", "")
+
+
+def _sign(secret: str, *parts) -> str:
+    msg = b"|".join(str(p).encode() if not isinstance(p, bytes) else p for p in parts)
+    digest = hmac.new(secret.encode(), msg, hashlib.sha256).digest()[:MAC_BYTES]
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def _mac(secret: str, session_id: int, clinic_id: int, phone: str, form_slug: str, expires: int) -> str:
+    return _sign(secret, VERSION, session_id, clinic_id, _normalise_phone(phone), form_slug, expires)
+
+
+def _current_key() -> tuple[str, str]:
+    cfg = session_token_cfg()
+    kid = cfg["current"]
+    if not kid or kid not in cfg["keys"]:
+        raise RuntimeError("[session_tokens] current key is not configured")
+    return kid, cfg["keys"][kid]
+
+
+def issue(
+    session_id: int,
+    clinic_id: int,
+    phone: str,
+    form_slug: str,
+    ttl_hours: float | None = None,
+    now: float | None = None,
+) -> str:
+    kid, secret = _current_key()
+    ttl = session_token_cfg()["ttl_hours"] if ttl_hours is None else ttl_hours
+    expires = int((time.time() if now is None else now) + ttl * 3600)
+    mac = _mac(secret, session_id, clinic_id, phone, form_slug, expires)
+    return f"{kid}.{clinic_id}.{expires}.{mac}"
+
+
+def verify(
+    token: str,
+    session_id: int,
+    phone: str,
+    form_slug: str,
+    now: float | None = None,
+) -> SessionClaims:
+    """Claims of a valid token for this URL; InvalidSessionToken otherwise."""
+    try:
+        kid, clinic, expires, mac = token.split(".")
+        clinic_id, expires_at = int(clinic), int(expires)
+    except (AttributeError, ValueError):
+        raise InvalidSessionToken("malformed session token") from None
+    secret = session_token_cfg()["keys"].get(kid)
+    if secret is None:
+        raise InvalidSessionToken("session token signed with an unknown key")
+    expected = _mac(secret, session_id, clinic_id, phone, form_slug, expires_at)
+    if not hmac.compare_digest(mac, expected):
+        raise InvalidSessionToken("session token does not match this link")
+    if (time.time() if now is None else now) >= expires_at:
+        raise InvalidSessionToken("session link has expired")
+    return SessionClaims(session_id, clinic_id, _normalise_phone(phone), form_slug, expires_at, kid)
+
+
+def check_link(
+    token: str | None, session_id: int, phone: str, form_slug: str
+) -> SessionClaims | None:
+    """
+    Router helper: claims for a valid token, 403 for a bad one.  Links
+    without a token pass (None) until `required = true` is set.
+    """
+    if not token:
+        if session_token_cfg()["required"]:
+            raise HTTPException(status.HTTP_403_FORBIDDEN, "Signed session link required")
+        return None
+    try:
+        return verify(token, session_id, phone, form_slug)
+    except InvalidSessionToken as exc:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, str(exc)) from None
+
+
+# --------------------------------------------------------------------- #
+# Doctor tokens – same keys, separate domain ("d1") so neither kind of
+# token can be passed off as the other.
+# --------------------------------------------------------------------- #
+DOCTOR_VERSION = b"d1"
+
+
+class DoctorClaims(NamedTuple):
+    user_id: int
+    clinic_id: int
+    expires_at: int
+    kid: str
+
+
+def issue_doctor(user_id: int, clinic_id: int, ttl_hours: float | None = None,
+                 now: float | None = None) -> str:
+    """Bearer token for a doctor's dashboard: "d1.<kid>.<user>.<clinic>.<expires>.<mac>"."""
+    kid, secret = _current_key()
+    ttl = session_token_cfg()["doctor_ttl_hours"] if ttl_hours is None else ttl_hours
+    expires = int((time.time() if now is None else now) + ttl * 3600)
+    mac = _sign(secret, DOCTOR_VERSION, user_id, clinic_id, expires)
+    return f"d1.{kid}.{user_id}.{clinic_id}.{expires}.{mac}"
+
+
+def verify_doctor(token: str, now: float | None = None) -> DoctorClaims:
+    try:
+        version, kid, user, clinic, expires, mac = token.split(".")
+        user_id, clinic_id, expires_at = int(user), int(clinic), int(expires)
+    except (AttributeError, ValueError):
+        raise InvalidSessionToken("malformed doctor token") from None
+    secret = session_token_cfg()["keys"].get(kid)
+    if version != "d1" or secret is None:
+        raise InvalidSessionToken("doctor token signed with an unknown key")
+    if not hmac.compare_digest(mac, _sign(secret, DOCTOR_VERSION, user_id, clinic_id, expires_at)):
+        raise InvalidSessionToken("doctor token is not valid")
+    if (time.time() if now is None else now) >= expires_at:
+        raise InvalidSessionToken("doctor token has expired")
+    return DoctorClaims(user_id, clinic_id, expires_at, kid)
+
+
+def patient_link(
+    base_url: str,
+    session_id: int,
+    clinic_id: int,
+    phone: str,
+    form_slug: str,
+    lang: str = "EN",
+    ttl_hours: float | None = None,
+) -> str:
+    """Full patient URL for the doctor to send (WhatsApp / SMS)."""
+    token = issue(session_id, clinic_id, phone, form_slug, ttl_hours)
+    query = urlencode({"phone": _normalise_phone(phone), "lang": lang, "t": token})
+    return f"{base_url.rstrip('/')}/patient/open/{session_id}/{form_slug}?{query}"
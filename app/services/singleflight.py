@@ -0,0 +1,51 @@
+# app/services/singleflight.py
+"""
+Single-flight: concurrent callers asking for the same key share one load.
+
+The first caller starts the load as its own task; everyone arriving while
+it runs awaits that task and gets its result – or its exception.  The
+load runs to completion even if the caller that started it goes away
+(client disconnect), so the waiters aren't cancelled with it.  Once
+the task finishes the key is forgotten; caching the result is the
+caller's business (see local_cache.VersionedCache).
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from app.services.metrics import REGISTRY
+
+T = TypeVar("T")
+
+coalesced = REGISTRY.counter(
+    "rfa_singleflight_coalesced_total", "Calls that joined an in-flight load", ("group",),
+)
+loads = REGISTRY.counter(
+    "rfa_singleflight_loads_total", "Loads actually started", ("group",),
+)
+
+
+class SingleFlight:
+    def __init__(self, group: str):
+        self.group = (group,)
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            loads.inc(self.group)
+            task = asyncio.ensure_future(load())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+        else:
+            coalesced.inc(self.group)
+        # shield: one waiter being cancelled must not cancel the shared load
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
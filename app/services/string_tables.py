@@ -0,0 +1,88 @@
+# app/services/string_tables.py
+"""
+Per-language interned string tables for compiled forms.
+
+"Yes", "No", "Don't know" … repeat across hundreds of questions and every
+form, once per language.  Compiled forms don't hold the text: each
+question / option keeps one int per language, an index into that
+language's table, and identical strings share one entry worker-wide.
+
+Tables are append-only.  Indices stay valid for every FormPack ever
+handed out, at the cost of keeping strings that a re-imported form no
+longer uses until the worker restarts – the set of distinct strings is
+small and grows only with genuinely new wording.
+
+Interning happens while compiling (DB pool threads) and takes a lock;
+lookups are plain list indexing.
+"""
+
+import sys
+import threading
+
+from app.services.metrics import REGISTRY
+
+NO_TEXT = -1  # "not translated" – callers fall back to the key
+
+strings_gauge = REGISTRY.gauge(
+    "rfa_form_strings", "Distinct interned form strings per language", ("lang",),
+)
+bytes_gauge = REGISTRY.gauge(
+    "rfa_form_string_bytes", "Memory held by the interned form strings per language", ("lang",),
+)
+
+
+class StringTable:
+    __slots__ = ("lang", "strings", "nbytes", "refs", "_ids")
+
+    def __init__(self, lang: str):
+        self.lang = lang
+        self.strings: list[str] = []
+        self.nbytes = 0      # str objects only; the list / index dict are in report()
+        self.refs = 0        # intern() calls – what storing every copy would cost
+        self._ids: dict[str, int] = {}
+
+    def intern(self, s: str | None) -> int:
+        if s is None:
+            return NO_TEXT
+        with _lock:
+            self.refs += 1
+            i = self._ids.get(s)
+            if i is None:
+                i = self._ids[s] = len(self.strings)
+                self.strings.append(s)
+                self.nbytes += sys.getsizeof(s)
+                key = (self.lang,)
+                strings_gauge.set(key, len(self.strings))
+                bytes_gauge.set(key, self.nbytes)
+            return i
+
+    def get(self, i: int) -> str | None:
+        return None if i == NO_TEXT else self.strings[i]
+
+
+_lock = threading.Lock()
+TABLES: dict[str, StringTable] = {}
+
+
+def table(lang: str) -> StringTable:
+    t = TABLES.get(lang)
+    if t is None:
+        with _lock:
+            t = TABLES.setdefault(lang, StringTable(lang))
+    return t
+
+
+def memory_report() -> dict[str, dict]:
+    """
+    {lang: {strings, refs, string_bytes, table_bytes}} –
+    refs / strings is the dedup factor; table_bytes adds the list and index.
+    """
+    out = {}
+    for lang, t in sorted(TABLES.items()):
+        out[lang] = {
+            "strings": len(t.strings),
+            "refs": t.refs,
+            "string_bytes": t.nbytes,
+            "table_bytes": t.nbytes + sys.getsizeof(t.strings) + sys.getsizeof(t._ids),
+        }
+    return out
@@ -0,0 +1,85 @@
+# app/services/traffic_recorder.py
+"""
+Records patient open / submit traffic as JSONL for the load generator
+(benchmarks/loadtest.py).  One event per line:
+
+  {"ts": 1718000000.12, "kind": "open",   "session_id": 7, "form": "rash_body",
+   "lang": "EN", "phone": "ph_3f2a…"}
+  {"ts": 1718000041.80, "kind": "submit", "session_id": 7, "form": "rash_body",
+   "lang": "EN", "phone": "ph_3f2a…", "answers": [["q12", "red"], ["q13[]", "a"], ["q13[]", "b"]]}
+
+Answers are the form's (field, value) pairs in order, so checkbox groups
+(repeated "q<id>[]" fields) keep every ticked box.
+
+Phone numbers are replaced by a keyed hash, so a recording keeps
+"same patient" structure (repeat opens, quota hits) without holding PII.
+Enabled by `[traffic] record_path`; `sample_rate` records a fraction of
+visits (decided per phone, so visits stay whole).
+"""
+
+import hashlib
+import json
+import re
+import time
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_PATH = re.compile(r"^/patient/(open|submit)/(\d+)/([^/]+)$")
+MAX_BODY = 64 * 1024
+
+
+class TrafficRecorder:
+    def __init__(self, app: ASGIApp, record_path: str, sample_rate: float = 1.0, salt: str = ""):
+        self.app = app
+        self.out = open(record_path, "a", buffering=1, encoding="utf-8")  # line-buffered
+        self.sample_rate = sample_rate
+        self.salt = salt.encode()
+
+    def _pseudonym(self, phone: str) -> str:
+        return "ph_" + hashlib.blake2b(phone.encode(), key=self.salt[:64], digest_size=8).hexdigest()
+
+    def _sampled(self, pseudonym: str) -> bool:
+        return int(pseudonym[3:11], 16) / 0xFFFFFFFF < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        m = _PATH.match(scope.get("path", "")) if scope["type"] == "http" else None
+        if m is None:
+            await self.app(scope, receive, send)
+            return
+
+        query = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+        phone = query.get("phone")
+        kind = "open" if scope["method"] == "GET" else "submit"
+        body = bytearray()
+
+        async def receive_wrapper() -> Message:
+            message = await receive()
+            if message["type"] == "http.request" and len(body) < MAX_BODY:
+                body.extend(message.get("body", b""))
+            return message
+
+        await self.app(scope, receive_wrapper if kind == "submit" else receive, send)
+
+        answers = None
+        if kind == "submit":
+            fields = parse_qsl(bytes(body).decode("utf-8", "replace"))
+            phone = phone or next((v for k, v in fields if k == "patient_phone"), None)
+            answers = [[k, v] for k, v in fields if k != "patient_phone"]
+        if not phone:
+            return
+        pseudonym = self._pseudonym(phone)
+        if not self._sampled(pseudonym):
+            return
+
+        event = {
+            "ts": round(time.time(), 3),
+            "kind": kind,
+            "session_id": int(m.group(2)),
+            "form": m.group(3),
+            "lang": query.get("lang", "EN"),
+            "phone": pseudonym,
+        }
+        if answers is not None:
+            event["answers"] = answers
+        self.out.write(json.dumps(event, ensure_ascii=False) + "\n")
@@ -26,4 +26,125 @@ def ses_apikey() -> str:
 
 
 def wa_api_token() -> str:
-    return get_cfg()["whatsapp"]["token"]
\ No newline at end of file
+    return get_cfg()["whatsapp"]["token"]
+
+
+def compression_cfg() -> dict:
+    """[compression] section, with defaults for anything not set."""
+    defaults = {"min_size": 1024, "level": 6, "cpu_budget_ms": 50, "cache_entries": 256}
+    return {**defaults, **get_cfg().get("compression", {})}
+
+
+def metrics_cfg() -> dict:
+    """[metrics] section; multiproc_dir unset = single-process exposition."""
+    defaults = {"multiproc_dir": None, "flush_interval": 5.0}
+    return {**defaults, **get_cfg().get("metrics", {})}
+
+
+def db_audit_cfg() -> dict:
+    """[db_audit] section – per-request SQL budget (see app/db/querystats.py)."""
+    defaults = {"mode": "count", "max_statements": 20, "max_repeats": 5}
+    return {**defaults, **get_cfg().get("db_audit", {})}
+
+
+def traffic_cfg() -> dict:
+    """[traffic] section – patient traffic recording for load tests (off by default)."""
+    defaults = {"record_path": None, "sample_rate": 1.0, "salt": ""}
+    return {**defaults, **get_cfg().get("traffic", {})}
+
+
+def admin_tokens() -> list[str]:
+    return list(get_cfg().get("admin", {}).get("tokens", []))
+
+
+def profiling_cfg() -> dict:
+    """[profiling] section; threshold_ms = 0 disables automatic slow-request capture."""
+    defaults = {
+        "enabled": False,
+        "threshold_ms": 0,
+        "interval_ms": 5,
+        "out_dir": "profiles",
+        "max_profiles": 50,
+    }
+    return {**defaults, **get_cfg().get("profiling", {})}
+
+
+def form_store_cfg() -> dict:
+    """[form_store] section; path unset = every worker loads forms from the DB."""
+    defaults = {"path": None, "check_interval": 1.0}
+    return {**defaults, **get_cfg().get("form_store", {})}
+
+
+def cache_bus_cfg() -> dict:
+    """[cache_bus] section – backend = "redis" | "loopback"."""
+    defaults = {"backend": "redis", "redis_url": "redis://localhost", "channel": "rfa:invalidate"}
+    return {**defaults, **get_cfg().get("cache_bus", {})}
+
+
+def db_pool_cfg() -> dict:
+    """
+    Connection pool + the thread pool that runs sync DB work (same size),
+    and the admission limit for work queued behind it ([database] section).
+    """
+    defaults = {"pool_size": 5, "max_overflow": 5, "max_queued": 32, "retry_after": 2}
+    cfg = get_cfg()["database"]
+    return {k: cfg.get(k, v) for k, v in defaults.items()}
+
+
+def session_token_cfg() -> dict:
+    """
+    [session_tokens] section – signed patient links and doctor tokens
+    (app/services/session_tokens.py).
+    keys = {kid = "secret", ...}; new links are signed with `current`, any
+    listed kid verifies, so rotate by adding a key, switching `current`,
+    and dropping the old kid once its links have expired.
+    """
+    defaults = {"keys": {}, "current": None, "ttl_hours": 72, "required": False,
+                "doctor_ttl_hours": 12}
+    return {**defaults, **get_cfg().get("session_tokens", {})}
+
+
+def idempotency_cfg() -> dict:
+    """
+    [idempotency] section – repeat submits within `ttl` seconds replay the
+    first result; a submit still running is waited on for up to `wait` s.
+    """
+    defaults = {"ttl": 600, "pending_ttl": 30, "wait": 5.0}
+    return {**defaults, **get_cfg().get("idempotency", {})}
+
+
+def rollups_cfg() -> dict:
+    """
+    [rollups] section – daily reporting rollups (app/services/rollups.py).
+    Days are local to utc_offset_minutes (330 = IST); submissions younger
+    than settle_seconds are left for the next run.
+    """
+    defaults = {"utc_offset_minutes": 330, "settle_seconds": 60, "batch_size": 5000, "interval": 60}
+    return {**defaults, **get_cfg().get("rollups", {})}
+
+
+def archive_cfg() -> dict:
+    """[archive] section – Parquet archival of old submissions (app/services/archive.py)."""
+    defaults = {"dir": "archive", "older_than_days": 365, "chunk_size": 5000}
+    return {**defaults, **get_cfg().get("archive", {})}
+
+
+def partitions_cfg() -> dict:
+    """
+    [partitions] section – monthly partitions on PostgreSQL (app/db/partitions.py).
+    auto_create makes the app ensure months_ahead future months at startup;
+    retention_months (None = keep everything) is what `partitions detach` keeps.
+    """
+    defaults = {"auto_create": True, "months_ahead": 3, "retention_months": None}
+    return {**defaults, **get_cfg().get("partitions", {})}
+
+
+def backfill_cfg() -> dict:
+    """
+    [backfill] section – batched data migrations (app/db/backfill.py).
+    sleep (seconds) between batches lets replication and autovacuum keep up;
+    a batch waiting longer than lock_timeout_ms for a lock is retried.
+    """
+    defaults = {"batch_size": 2000, "sleep": 0.1, "lock_timeout_ms": 2000,
+                "max_retries": 5, "report_every": 5.0}
+    return {**defaults, **get_cfg().get("backfill", {})}
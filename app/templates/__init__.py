@@ -0,0 +1,6 @@
+# app/templates/__init__.py
+from fastapi.templating import Jinja2Templates
+
+templates = Jinja2Templates(directory="app/templates")
+# gettext placeholder until translations land (used by redflag_response.html)
+templates.env.globals.setdefault("_", lambda s: s)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+"""
+Benchmarks for the form hot path.
+
+    python -m benchmarks.bench_form run --out bench/base.json [--questions 60 ...]
+    python -m benchmarks.bench_form compare bench/base.json bench/new.json [--threshold 0.10]
+
+`run` builds a synthetic SQLite DB (benchmarks/synth.py), points the app
+at it through a throw-away INDITECH_CFG, swaps the quota backend for the
+in-memory one and times:
+
+    form_by_slug, form_localised, form_evaluate, render_form, render_response,
+    e2e_open_form, e2e_submit_form   (the last two through the ASGI app)
+
+and reports the retained size of one loaded form: the ORM graph it is
+compiled from vs the compiled FormPack, plus the per-language string
+tables the FormPack indexes into.  With the default spec (30
+questions × 4 options × 3 languages) the FormPack must stay under
+form_logic.MEMORY_TARGET_BYTES or `run` exits 1.
+
+`compare` exits 1 if any benchmark's median got slower by more than
+--threshold (fraction).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import FunctionType, ModuleType
+
+from benchmarks.synth import SynthSpec, configure_app
+
+
+# ---------------- timing helpers ------------------------------------------- #
+def _summary(samples: list[float], per_round: int) -> dict:
+    per_op = sorted(s / per_round for s in samples)
+    return {
+        "median_us": statistics.median(per_op) * 1e6,
+        "min_us": per_op[0] * 1e6,
+        "p95_us": per_op[min(len(per_op) - 1, int(len(per_op) * 0.95))] * 1e6,
+        "rounds": len(per_op),
+        "per_round": per_round,
+    }
+
+
+def bench(fn, rounds: int, per_round: int, warmup: int = 3) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for _ in range(per_round):
+            fn()
+        samples.append(time.perf_counter() - t0)
+    return _summary(samples, per_round)
+
+
+async def abench(fn, rounds: int, per_round: int, warmup: int = 3) -> dict:
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for _ in range(per_round):
+            await fn()
+        samples.append(time.perf_counter() - t0)
+    return _summary(samples, per_round)
+
+
+def deep_sizeof(obj, seen: set | None = None) -> int:
+    """Bytes retained by obj and everything it references (strings, slots, containers).
+
+    ORM instances are walked through their attribute dict; their
+    InstanceState is counted but not followed (it leads to the mapper
+    registry, which every form shares).
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, (type, ModuleType, FunctionType)):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return size + sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_sizeof(v, seen) for v in obj)
+    state = getattr(obj, "_sa_instance_state", None)
+    if state is not None:
+        size += sys.getsizeof(state)
+        seen.add(id(state))
+    if hasattr(obj, "__dict__"):
+        size += deep_sizeof(obj.__dict__, seen)
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            if hasattr(obj, slot):
+                size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ---------------- run ------------------------------------------------------ #
+def run(args) -> dict:
+    spec = SynthSpec(
+        forms=args.forms, questions=args.questions, options=args.options,
+        langs=args.langs, redflags=args.redflags, seed=args.seed,
+    )
+    # the app reads its DB URL at import time → configure before importing it
+    configure_app(spec)
+
+    import httpx
+    from app.db.session import SessionLocal
+    from app.services import quota, redflag_bundles, string_tables
+    from app.db import models
+    from app.services.form_logic import FormPack
+    from app.templates import templates
+    from app.main import app
+
+    quota.redis_client = quota.MemoryQuotaClient()
+
+    slug = "bench_0"
+    rounds, n = args.rounds, args.per_round
+    results: dict[str, dict] = {}
+
+    db = SessionLocal()
+    results["form_by_slug"] = bench(lambda: FormPack.by_slug(db, slug), rounds, n)
+
+    fp = FormPack.by_slug(db, slug)
+    lang = "EN"
+
+    # the graph by_slug compiles from, fully loaded (what used to be cached)
+    db.expunge_all()
+    orm_form = db.query(models.Form).filter_by(slug=slug).one().active_version
+    for q in orm_form.questions:
+        q.localisations
+        for o in q.options:
+            o.localisations, o.redflag
+    memory = {"orm_graph_bytes": deep_sizeof(orm_form), "form_pack_bytes": deep_sizeof(fp)}
+    # localised text lives in the worker-wide tables, shared by every form
+    for lang_code, rep in string_tables.memory_report().items():
+        memory[f"strings_{lang_code}_bytes"] = rep["table_bytes"]
+    db.expunge_all()
+    results["form_localised"] = bench(lambda: fp.localised(lang), rounds, n)
+
+    # one answer per question, first option – hits whatever red flags sit there
+    answers = {q.question_key: q.options[0].option_key for q in fp.questions}
+    results["form_evaluate"] = bench(lambda: fp.evaluate(answers), rounds, n)
+
+    qloc = fp.localised(lang)
+    form_tpl = templates.get_template("form.html")
+    ctx = {"request": None, "lang": lang, "title": fp.meta.title_en,
+           "form_meta": fp.meta, "questions": qloc, "session_id": 1}
+    results["render_form"] = bench(lambda: form_tpl.render(ctx), rounds, n)
+
+    resp_tpl = templates.get_template("redflag_response.html")
+    flagged = {q.question_key: o.option_key
+               for q in fp.questions for o in q.options if o.redflag is not None}
+    rctx = {"request": None, "lang": lang,
+            "redflags": redflag_bundles.bundles_for(db, fp, fp.evaluate(flagged), lang),
+            "clinic": {"phone_whatsapp": "919999999999"}, "whatsapp_msg": "hi",
+            "whatsapp_link": "https://wa.me/919999999999"}
+    results["render_response"] = bench(lambda: resp_tpl.render(rctx), rounds, n)
+    db.close()
+
+    async def e2e() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            phones = iter(range(10**9))
+            path = f"/patient/open/1/{slug}"
+
+            async def open_form():
+                r = await client.get(path, params={"phone": "91000", "lang": lang})
+                r.raise_for_status()
+
+            async def submit_form():
+                # fresh phone each time – MAX_SUBMITS is per phone per day
+                phone = f"91{next(phones):010d}"
+                r = await client.post(path, params={"phone": phone, "lang": lang}, data=answers)
+                r.raise_for_status()
+
+            results["e2e_open_form"] = await abench(open_form, rounds, n)
+            results["e2e_submit_form"] = await abench(submit_form, rounds, n)
+
+    asyncio.run(e2e())
+
+    return {
+        "meta": {
+            "spec": spec.as_dict(),
+            "rounds": rounds,
+            "per_round": n,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "git_rev": _git_rev(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+        "memory": memory,
+    }
+
+
+# ---------------- compare -------------------------------------------------- #
+def compare(base: dict, new: dict, threshold: float) -> list[str]:
+    """Return a line per regression (empty list = no regressions)."""
+    if base["meta"]["spec"] != new["meta"]["spec"]:
+        print("[WARN] runs used different synthetic specs; numbers may not be comparable")
+
+    regressions = []
+    print(f"{'benchmark':<20} {'base µs':>10} {'new µs':>10} {'change':>8}")
+    for name in sorted(base["results"].keys() & new["results"].keys()):
+        b = base["results"][name]["median_us"]
+        n = new["results"][name]["median_us"]
+        change = (n - b) / b if b else 0.0
+        mark = ""
+        if change > threshold:
+            mark = "  ← REGRESSION"
+            regressions.append(f"{name}: {b:.1f} → {n:.1f} µs ({change:+.1%})")
+        print(f"{name:<20} {b:>10.1f} {n:>10.1f} {change:>+8.1%}{mark}")
+    return regressions
+
+
+# ---------------- CLI ------------------------------------------------------ #
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run")
+    r.add_argument("--out", required=True)
+    r.add_argument("--forms", type=int, default=3)
+    r.add_argument("--questions", type=int, default=30)
+    r.add_argument("--options", type=int, default=4)
+    r.add_argument("--langs", type=int, default=3)
+    r.add_argument("--redflags", type=int, default=8)
+    r.add_argument("--seed", type=int, default=1234)
+    r.add_argument("--rounds", type=int, default=20)
+    r.add_argument("--per-round", type=int, default=20)
+
+    c = sub.add_parser("compare")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument("--threshold", type=float, default=0.10)
+
+    args = ap.parse_args()
+
+    if args.cmd == "run":
+        out = run(args)
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(out, indent=2))
+        for name, res in out["results"].items():
+            print(f"{name:<20} {res['median_us']:>10.1f} µs")
+        for name, size in out["memory"].items():
+            print(f"{name:<20} {size / 1024:>10.1f} KiB")
+        print(f"✓ results written to {args.out}")
+        from app.services.form_logic import MEMORY_TARGET_BYTES
+        if (args.questions, args.options, args.langs) == (30, 4, 3) and \
+                out["memory"]["form_pack_bytes"] > MEMORY_TARGET_BYTES:
+            print(f"✗ FormPack is over its {MEMORY_TARGET_BYTES // 1024} KiB budget")
+            sys.exit(1)
+        return
+
+    base = json.loads(Path(args.base).read_text())
+    new = json.loads(Path(args.new).read_text())
+    regressions = compare(base, new, args.threshold)
+    if regressions:
+        print(f"✗ {len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+    print("✓ no regressions")
+
+
+if __name__ == "__main__":
+    main()
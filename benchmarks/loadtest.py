@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+"""
+Load generator for the patient flow: open → think time → submit.
+
+    # synthetic traffic in the recorder's JSONL format
+    python -m benchmarks.loadtest synth --out traffic.jsonl --visits 2000 --rate 20
+
+    # replay it – in-process against a synthetic DB, or against a running server
+    python -m benchmarks.loadtest replay traffic.jsonl --in-process --speed 10
+    python -m benchmarks.loadtest replay traffic.jsonl --base-url http://127.0.0.1:8000
+
+    # step the replay speed up until errors / p99 blow through the limits
+    python -m benchmarks.loadtest ramp traffic.jsonl --in-process --speeds 1 2 4 8 16 32
+
+Recordings come from app/services/traffic_recorder.py (`[traffic] record_path`);
+`synth` writes the same format.  The report has throughput, latency
+percentiles per kind, status counts, error rate and quota 429s.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlencode
+
+from benchmarks.synth import SynthSpec, configure_app
+
+
+# ---------------- traffic model -------------------------------------------- #
+@dataclass
+class Visit:
+    start: float                                   # seconds from t0
+    steps: list[tuple[float, dict]] = field(default_factory=list)  # (offset, event)
+
+
+def load_events(path: Path) -> list[dict]:
+    with open(path, encoding="utf-8") as fh:
+        events = [json.loads(line) for line in fh if line.strip()]
+    return sorted(events, key=lambda e: e["ts"])
+
+
+def to_visits(events: list[dict]) -> list[Visit]:
+    """Group events per (phone, session, form); a new open starts a new visit."""
+    if not events:
+        return []
+    t0 = events[0]["ts"]
+    open_visits: dict[tuple, Visit] = {}
+    visits: list[Visit] = []
+    for ev in events:
+        key = (ev["phone"], ev["session_id"], ev["form"])
+        v = open_visits.get(key)
+        if v is None or ev["kind"] == "open":
+            v = open_visits[key] = Visit(start=ev["ts"] - t0)
+            visits.append(v)
+        v.steps.append((ev["ts"] - t0 - v.start, ev))
+    return visits
+
+
+def synth_events(
+    rng: random.Random,
+    visits: int,
+    rate: float,
+    forms: list[str],
+    langs: list[str],
+    questions: int,
+    options: int,
+    repeat_frac: float = 0.2,
+    abandon_frac: float = 0.1,
+    think_median: float = 45.0,
+) -> list[dict]:
+    """
+    Poisson arrivals at `rate` visits/s; Zipf-ish form popularity; language
+    mix skewed to the first entry; a share of phones come back (that is
+    what trips the daily quota); lognormal think time.
+    """
+    form_w = [1 / (k + 1) for k in range(len(forms))]
+    lang_w = [0.55, 0.3, 0.15, 0.1, 0.05, 0.05, 0.05, 0.05][: len(langs)]
+    phone_pool = max(1, int(visits * (1 - repeat_frac)))
+
+    t = time.time()
+    out = []
+    for i in range(visits):
+        t += rng.expovariate(rate)
+        phone = f"91{rng.randrange(phone_pool):010d}"
+        form = rng.choices(forms, form_w)[0]
+        lang = rng.choices(langs, lang_w)[0]
+        base = {"session_id": 1000 + i, "form": form, "lang": lang, "phone": phone}
+        out.append({"ts": round(t, 3), "kind": "open", **base})
+        if rng.random() < abandon_frac:
+            continue
+        think = min(600.0, max(5.0, rng.lognormvariate(math.log(think_median), 0.6)))
+        answers = [[f"q_{q}", f"opt_{rng.randrange(options)}"] for q in range(questions)]
+        out.append({"ts": round(t + think, 3), "kind": "submit", **base, "answers": answers})
+    return sorted(out, key=lambda e: e["ts"])
+
+
+# ---------------- driver --------------------------------------------------- #
+@dataclass
+class Stats:
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    statuses: Counter = field(default_factory=Counter)
+    exceptions: Counter = field(default_factory=Counter)
+    started: float = 0.0
+    finished: float = 0.0
+
+    def report(self) -> dict:
+        total = sum(self.statuses.values()) + sum(self.exceptions.values())
+        elapsed = max(self.finished - self.started, 1e-9)
+        errors = sum(n for s, n in self.statuses.items() if s >= 500) + sum(self.exceptions.values())
+        out = {
+            "requests": total,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(total / elapsed, 2),
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "quota_429": self.statuses.get(429, 0),
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "exceptions": dict(self.exceptions),
+            "latency_ms": {},
+        }
+        for kind, lat in self.latencies.items():
+            lat = sorted(lat)
+            out["latency_ms"][kind] = {
+                f"p{p}": round(_pct(lat, p) * 1000, 2) for p in (50, 90, 95, 99)
+            } | {"max": round(lat[-1] * 1000, 2), "n": len(lat)}
+        return out
+
+
+def _pct(sorted_vals: list[float], p: float) -> float:
+    k = max(0, math.ceil(p / 100 * len(sorted_vals)) - 1)
+    return sorted_vals[k]
+
+
+_FORM = {"content-type": "application/x-www-form-urlencoded"}
+
+
+def _form_body(answers) -> str:
+    # (field, value) pairs, repeated fields and all; older recordings hold a dict
+    pairs = answers.items() if isinstance(answers, dict) else answers
+    return urlencode([tuple(p) for p in pairs])
+
+
+async def _run_visit(client, visit: Visit, t0: float, speed: float, sem, stats: Stats) -> None:
+    await asyncio.sleep(max(0.0, t0 + visit.start / speed - time.perf_counter()))
+    async with sem:
+        v0 = time.perf_counter()
+        for offset, ev in visit.steps:
+            await asyncio.sleep(max(0.0, v0 + offset / speed - time.perf_counter()))
+            path = f"/patient/open/{ev['session_id']}/{ev['form']}"
+            params = {"phone": ev["phone"], "lang": ev.get("lang", "EN")}
+            t = time.perf_counter()
+            try:
+                if ev["kind"] == "open":
+                    r = await client.get(path, params=params)
+                else:
+                    r = await client.post(path, params=params, content=_form_body(ev.get("answers", [])),
+                                          headers=_FORM)
+            except Exception as exc:  # noqa: BLE001 – every failure is a data point here
+                stats.exceptions[type(exc).__name__] += 1
+                continue
+            stats.latencies[ev["kind"]].append(time.perf_counter() - t)
+            stats.statuses[r.status_code] += 1
+
+
+async def replay(visits: list[Visit], client, speed: float, max_clients: int) -> Stats:
+    stats = Stats()
+    sem = asyncio.Semaphore(max_clients)
+    stats.started = t0 = time.perf_counter()
+    await asyncio.gather(*(_run_visit(client, v, t0, speed, sem, stats) for v in visits))
+    stats.finished = time.perf_counter()
+    return stats
+
+
+def make_client(args):
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    if args.in_process:
+        configure_app(SynthSpec(forms=args.forms, questions=args.questions, options=args.options))
+        from app.services import quota
+        from app.main import app
+
+        if args.memory_quota:
+            quota.redis_client = quota.MemoryQuotaClient()
+        transport = httpx.ASGITransport(app=app)
+        return httpx.AsyncClient(transport=transport, base_url="http://loadtest", limits=limits)
+    return httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout)
+
+
+# ---------------- CLI ------------------------------------------------------ #
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    s = sub.add_parser("synth")
+    s.add_argument("--out", required=True)
+    s.add_argument("--visits", type=int, default=1000)
+    s.add_argument("--rate", type=float, default=10.0, help="visits per second")
+    s.add_argument("--forms", nargs="+", default=["bench_0", "bench_1", "bench_2"])
+    s.add_argument("--langs", nargs="+", default=["EN", "HI", "TA"])
+    s.add_argument("--questions", type=int, default=30)
+    s.add_argument("--options", type=int, default=4)
+    s.add_argument("--repeat-frac", type=float, default=0.2)
+    s.add_argument("--seed", type=int, default=1234)
+
+    for name in ("replay", "ramp"):
+        p = sub.add_parser(name)
+        p.add_argument("traffic")
+        tgt = p.add_mutually_exclusive_group(required=True)
+        tgt.add_argument("--in-process", action="store_true")
+        tgt.add_argument("--base-url")
+        p.add_argument("--clients", type=int, default=200, help="max concurrent visits")
+        p.add_argument("--timeout", type=float, default=30.0)
+        p.add_argument("--json", help="write the report(s) here")
+        # in-process target: synthetic DB shape + quota backend
+        p.add_argument("--forms", type=int, default=3)
+        p.add_argument("--questions", type=int, default=30)
+        p.add_argument("--options", type=int, default=4)
+        p.add_argument("--memory-quota", action="store_true")
+        if name == "replay":
+            p.add_argument("--speed", type=float, default=1.0)
+        else:
+            p.add_argument("--speeds", type=float, nargs="+", default=[1, 2, 4, 8, 16, 32])
+            p.add_argument("--max-error-rate", type=float, default=0.01)
+            p.add_argument("--p99-ms", type=float, default=1000.0)
+
+    args = ap.parse_args()
+
+    if args.cmd == "synth":
+        events = synth_events(
+            random.Random(args.seed), args.visits, args.rate, args.forms, args.langs,
+            args.questions, args.options, repeat_frac=args.repeat_frac,
+        )
+        with open(args.out, "w", encoding="utf-8") as fh:
+            for ev in events:
+                fh.write(json.dumps(ev) + "\n")
+        print(f"✓ {len(events)} events → {args.out}")
+        return
+
+    visits = to_visits(load_events(Path(args.traffic)))
+    if not visits:
+        sys.exit(f"no events in {args.traffic}")
+
+    async def go():
+        async with make_client(args) as client:
+            if args.cmd == "replay":
+                rep = (await replay(visits, client, args.speed, args.clients)).report()
+                print(json.dumps(rep, indent=2))
+                return rep
+
+            steps = []
+            for speed in args.speeds:
+                rep = (await replay(visits, client, speed, args.clients)).report()
+                rep["speed"] = speed
+                steps.append(rep)
+                p99 = max((v["p99"] for v in rep["latency_ms"].values()), default=0.0)
+                print(
+                    f"speed ×{speed:<5g} {rep['throughput_rps']:>8.1f} req/s  p99 {p99:>8.1f} ms  "
+                    f"err {rep['error_rate']:.2%}  429s {rep['quota_429']}"
+                )
+                if rep["error_rate"] > args.max_error_rate or p99 > args.p99_ms:
+                    print(f"✗ saturated at ×{speed:g}")
+                    break
+            return steps
+
+    out = asyncio.run(go())
+    if args.json:
+        Path(args.json).write_text(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""
+Query-plan audit: the app's hot queries must not sequentially scan the
+big tables.
+
+    python -m benchmarks.plan_audit [--sessions 2000] [--show]
+    python -m benchmarks.plan_audit --url postgresql://…/rfa_audit   # an empty scratch DB
+
+Builds the synthetic forms (benchmarks/synth.py) plus a few thousand
+patient sessions / submissions / answers / red flags, ANALYZEs, then runs
+the real code paths:
+
+    form_load    FormPack.by_slug + red-flag bundles
+    redflags     red flag → triggering options index, full build
+    clinic       clinic by id, clinic for a session
+    dashboard    first and second page of flagged submissions
+    export       a clinic's submissions over one month
+    report       a clinic's daily rollup report
+
+Every SELECT they issue is captured and EXPLAINed.  On SQLite a plain
+"SCAN <table>" of an AUDITED table is a violation; on PostgreSQL the
+plans are taken with enable_seqscan off, so a "Seq Scan" there means no
+usable index exists at all (tiny seeded tables would otherwise always be
+scanned).  Exits 1 on any violation – run it in CI after schema or query
+changes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, inspect
+
+from benchmarks.synth import SynthSpec, add_patient_flow, build_sqlite, populate
+
+# tables that grow with traffic or with the number of forms
+AUDITED = {
+    "patient_sessions", "form_submissions", "answers", "submission_redflags",
+    "questions", "options", "question_localised", "option_localised",
+    "redflag_localised", "redflag_videos", "redflag_references",
+}
+PARTITION_SUFFIX = re.compile(r"_p\d{6}$")
+SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+# ---------------- database ------------------------------------------------- #
+def prepare(url: str | None, spec: SynthSpec, sessions: int) -> str:
+    """Seed the DB and point INDITECH_CFG at it; returns its URL."""
+    workdir = Path(tempfile.mkdtemp(prefix="rfa-plans-"))
+    if url is None:
+        url = build_sqlite(workdir / "plans.sqlite", spec)
+    else:
+        from app.db import models, partitions
+
+        engine = create_engine(url, future=True)
+        if inspect(engine).get_table_names():
+            sys.exit(f"{url} is not empty – point --url at a scratch database")
+        models.Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            partitions.ensure(conn, since=datetime.now(timezone.utc) - timedelta(days=200))
+        populate(engine, spec)
+        engine.dispose()
+    add_patient_flow(url, spec, sessions=sessions)
+
+    engine = create_engine(url, future=True)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+
+    cfg = workdir / "plans.toml"
+    cfg.write_text(f'[database]\nurl = "{url}"\n')
+    os.environ["INDITECH_CFG"] = str(cfg)
+    return url
+
+
+# ---------------- capture + explain ---------------------------------------- #
+class Recorder:
+    def __init__(self, engine):
+        self.label: str | None = None
+        self.captured: dict[str, list[tuple[str, object]]] = {}
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.label and not executemany and statement.lstrip().upper().startswith("SELECT"):
+            self.captured.setdefault(self.label, []).append((statement, parameters))
+
+    @contextmanager
+    def __call__(self, label: str):
+        self.label = label
+        try:
+            yield
+        finally:
+            self.label = None
+
+
+def _pg_seq_scans(node: dict) -> list[str]:
+    found = []
+    if node.get("Node Type") == "Seq Scan":
+        found.append(node["Relation Name"])
+    for child in node.get("Plans", ()):
+        found.extend(_pg_seq_scans(child))
+    return found
+
+
+def explain(conn, statement: str, parameters) -> tuple[list[str], list[str]]:
+    """(plan lines, tables scanned without an index)."""
+    if conn.dialect.name == "postgresql":
+        doc = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        plan = doc[0]["Plan"] if isinstance(doc, list) else json.loads(doc)[0]["Plan"]
+        scanned = [PARTITION_SUFFIX.sub("", t) for t in _pg_seq_scans(plan)]
+        lines = json.dumps(plan, indent=1).splitlines()
+    else:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        lines = [r[-1] for r in rows]
+        scanned = [m[1] for line in lines if (m := SQLITE_SCAN.match(line))]
+    return lines, [t for t in scanned if t in AUDITED]
+
+
+# ---------------- hot paths ------------------------------------------------ #
+def run_hot_paths(record: Recorder) -> None:
+    from sqlalchemy import select
+
+    from app.db import models
+    from app.db.session import SessionLocal
+    from app.services import clinics, dashboard, exports, redflag_bundles, redflag_index, rollups
+    from app.services.form_logic import FormPack
+
+    with SessionLocal() as db:
+        with record("form_load"):
+            fp = FormPack.by_slug(db, "bench_0")
+            refs = [o.redflag for q in fp.questions for o in q.options if o.redflag is not None]
+            redflag_bundles.bundles_for(db, fp, refs, "EN")
+
+        with record("redflags"):
+            redflag_index.get_index(db)
+
+        session_id = db.scalar(select(models.PatientSession.id).limit(1))
+        clinic_id = db.scalar(
+            select(models.FormSubmission.clinic_id).where(models.FormSubmission.flagged.is_(True)).limit(1)
+        )
+        with record("clinic"):
+            clinics._load_clinic(db, clinic_id)
+            clinics._session_clinic_id(db, session_id)
+
+        with record("dashboard"):
+            page = dashboard.flagged_page(db, clinic_id, limit=5)
+            if page["next_cursor"]:
+                dashboard.flagged_page(db, clinic_id, limit=5, cursor=page["next_cursor"])
+
+        end = datetime.now(timezone.utc)
+        with record("export"):
+            flt = exports.ExportFilter(clinic_id=clinic_id, start=end - timedelta(days=30), end=end)
+            for _ in exports.iter_submissions(db, flt):
+                pass
+
+        with record("report"):
+            rollups.daily_report(db, clinic_id, (end - timedelta(days=30)).date(), end.date())
+
+
+# ---------------- main ----------------------------------------------------- #
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", help="empty scratch database (default: a temp SQLite file)")
+    ap.add_argument("--sessions", type=int, default=2000)
+    ap.add_argument("--show", action="store_true", help="print every plan")
+    args = ap.parse_args()
+
+    prepare(args.url, SynthSpec(), args.sessions)
+    # the app reads its DB URL at import time → only now import it
+    from app.db.session import engine
+
+    record = Recorder(engine)
+    run_hot_paths(record)
+
+    violations = 0
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.exec_driver_sql("SET enable_seqscan = off")
+        for label, statements in record.captured.items():
+            bad = []
+            for statement, parameters in statements:
+                lines, scanned = explain(conn, statement, parameters)
+                if scanned:
+                    bad.append((statement, scanned, lines))
+                if args.show:
+                    print(f"--- {label}\n{statement}\n  " + "\n  ".join(lines))
+            mark = "✗" if bad else "✓"
+            print(f"{mark} {label:10} {len(statements):3} statements"
+                  + (f", {len(bad)} scan a table without an index" if bad else ""))
+            for statement, scanned, lines in bad:
+                print(f"    {', '.join(sorted(set(scanned)))}:\n      "
+                      + statement.replace("\n", "\n      ")
+                      + "\n    plan:\n      " + "\n      ".join(lines))
+            violations += len(bad)
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# benchmarks/synth.py
+"""
+Synthetic forms of configurable size, written into a fresh SQLite file.
+
+    questions × options × languages × red flags, per form
+
+Generation is seeded, so two runs with the same parameters produce the
+same database (and comparable benchmark numbers).
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import tempfile
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.db import form_versions, models
+
+LANG_POOL = ["EN", "HI", "TA", "MR", "BN", "TE", "KN", "GU"]
+WORDS = (
+    "child fever rash days cough vomiting breathing pain drowsy swelling "
+    "yes no sometimes mild severe since today yesterday week hours"
+).split()
+
+
+@dataclass
+class SynthSpec:
+    forms: int = 3
+    questions: int = 30
+    options: int = 4
+    langs: int = 3
+    redflags: int = 8          # red-flag options per form
+    seed: int = 1234
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "?"
+
+
+def build_sqlite(path: Path, spec: SynthSpec) -> str:
+    """Create the DB at `path` (overwritten) and return its SQLAlchemy URL."""
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, future=True)
+    models.Base.metadata.create_all(engine)
+    populate(engine, spec)
+    engine.dispose()
+    return url
+
+
+def populate(engine, spec: SynthSpec) -> None:
+    """Languages, one clinic and the synthetic forms, into an empty schema."""
+    rng = random.Random(spec.seed)
+    langs = LANG_POOL[: spec.langs]
+
+    with Session(engine) as db:
+        db.add_all(models.Language(code=c, native_name=c) for c in langs)
+        db.add(
+            models.Clinic(
+                name="Bench Clinic", state="MH", city="Mumbai",
+                phone_whatsapp="919999999999", address="1 Bench Road",
+            )
+        )
+
+        rf_id = 0
+        for f in range(spec.forms):
+            form = models.Form(
+                slug=f"bench_{f}", version="1", is_active=True,
+                title_en=f"Bench form {f}", description_en="synthetic",
+            )
+            db.add(form)
+            db.flush()  # form.id for the questions
+            fv = models.FormVersion(form=form, version="1", title_en=form.title_en,
+                                    description_en=form.description_en)
+            db.add(fv)
+
+            # which (question, option) slots carry a red flag
+            slots = [(q, o) for q in range(spec.questions) for o in range(spec.options)]
+            rf_slots = set(rng.sample(slots, min(spec.redflags, len(slots))))
+
+            for q in range(spec.questions):
+                question = models.Question(
+                    form_id=form.id,
+                    order_idx=q + 1,
+                    question_key=f"q_{q}",
+                    input_type=models.InputType.radio,
+                )
+                fv.questions.append(question)
+                question.localisations = [
+                    models.QuestionLocalised(lang_code=l, text=f"[{l}] {_sentence(rng, 8)}")
+                    for l in langs
+                ]
+                for o in range(spec.options):
+                    rf = None
+                    if (q, o) in rf_slots:
+                        rf_id += 1
+                        rf = models.RedFlag(
+                            slug=f"rf_{rf_id}", name_en=f"Red flag {rf_id}",
+                            ataglance_en=_sentence(rng, 12),
+                        )
+                        db.add(rf)
+                        db.flush()  # rf.id for the localised rows
+                        db.add_all(
+                            models.RedFlagLocalised(
+                                redflag_id=rf.id, lang_code=l,
+                                name=f"[{l}] Red flag {rf_id}",
+                                ataglance_text=_sentence(rng, 12),
+                            )
+                            for l in langs
+                        )
+                    option = models.Option(
+                        order_idx=o + 1,
+                        option_key=f"opt_{o}",
+                        is_redflag=rf is not None,
+                        redflag=rf,
+                    )
+                    question.options.append(option)
+                    option.localisations = [
+                        # short answers repeat a lot across questions, like real forms
+                        models.OptionLocalised(lang_code=l, text=f"[{l}] {rng.choice(WORDS[10:])}")
+                        for l in langs
+                    ]
+            db.flush()
+            form_versions.publish(db, fv)
+            form_versions.activate(db, form, fv)
+        db.commit()
+
+
+def configure_app(spec: SynthSpec) -> Path:
+    """
+    Build a synthetic DB in a temp dir and point INDITECH_CFG at it.
+    Must run before anything imports app.db.session (it reads the URL at import).
+    """
+    workdir = Path(tempfile.mkdtemp(prefix="rfa-bench-"))
+    url = build_sqlite(workdir / "bench.sqlite", spec)
+    cfg = workdir / "bench.toml"
+    cfg.write_text(f'[database]\nurl = "{url}"\n')
+    os.environ["INDITECH_CFG"] = str(cfg)
+    return workdir
+
+
+def add_patient_flow(url: str, spec: SynthSpec, clinics: int = 4, sessions: int = 2000) -> None:
+    """
+    Patient sessions with one submission each (answers for every question,
+    red flags where a red-flag option was picked), spread over the last
+    ~6 months.  Ids are passed explicitly: the partitioned tables draw
+    theirs from sequences, which SQLite doesn't have.
+    """
+    engine = create_engine(url, future=True)
+    rng = random.Random(spec.seed + 1)
+    now = datetime.now(timezone.utc)
+    with Session(engine) as db:
+        for c in range(1, clinics):
+            db.add(models.Clinic(
+                name=f"Bench Clinic {c}", state="MH", city="Pune",
+                phone_whatsapp=f"91888888{c:04d}", address=f"{c} Bench Road",
+            ))
+        db.flush()
+        clinic_ids = db.scalars(select(models.Clinic.id)).all()
+        forms = db.scalars(select(models.Form)).all()
+        langs = db.scalars(select(models.Language.code)).all()
+        # (question id, [(option key, red flag id)]) of the active version, per form
+        shapes = {
+            f.id: [(q.id, [(o.option_key, o.redflag_id) for o in q.options])
+                   for q in f.active_version.questions]
+            for f in forms
+        }
+        versions = {f.id: f.active_version_id for f in forms}
+
+        sessions_rows, subs, answers, flags = [], [], [], []
+        answer_id = flag_id = 0
+        for sid in range(1, sessions + 1):
+            clinic_id = rng.choice(clinic_ids)
+            form_id = rng.choice(list(shapes))
+            ts = now - timedelta(minutes=rng.randrange(180 * 24 * 60))
+            sessions_rows.append({"id": sid, "clinic_id": clinic_id, "created_at": ts,
+                                  "patient_phone_e164": f"91{rng.randrange(10**10):010d}"})
+            triggered = []
+            for q_id, opts in shapes[form_id]:
+                # mostly the first (benign) option, like real patients
+                key, rf = opts[0] if rng.random() < 0.9 else rng.choice(opts)
+                answer_id += 1
+                answers.append({"id": answer_id, "submission_id": sid, "submitted_at": ts,
+                                "question_id": q_id, "option_key": key})
+                if rf is not None:
+                    triggered.append(rf)
+            for rf in dict.fromkeys(triggered):  # one row per flag, as FormPack.evaluate gives
+                flag_id += 1
+                flags.append({"id": flag_id, "submission_id": sid, "redflag_id": rf})
+            subs.append({"id": sid, "session_id": sid, "clinic_id": clinic_id, "form_id": form_id,
+                         "form_version_id": versions[form_id], "flagged": bool(triggered), "submitted_at": ts,
+                         "lang_code": rng.choice(langs)})
+
+        db.execute(insert(models.PatientSession), sessions_rows)
+        db.execute(insert(models.FormSubmission), subs)
+        db.execute(insert(models.Answer), answers)
+        if flags:
+            db.execute(insert(models.SubmissionRedFlag), flags)
+        db.commit()
+    engine.dispose()